@@ -0,0 +1,65 @@
+"""Benchmark del cliente del servidor de autenticación contra un servidor de reemplazo local.
+
+Compara el cliente anterior (`Connection: close`, un handshake TCP por
+solicitud) con `AuthServer` y su pool keep-alive, para login y refresh bajo
+concurrencia. Mide solo HTTP sin TLS en localhost, así que subestima el ahorro
+real: contra el upstream cada handshake evitado incluye además TLS y la latencia
+de red.
+
+Uso, desde la raíz del repositorio y con las variables de entorno de la app:
+
+    python -m scripts.bench_auth_client [--requests 2000] [--concurrency 50] [--delay-ms 0]
+"""
+
+import argparse
+import asyncio
+
+import httpx
+
+from src.modules.auth.connections.auth_server import AuthServer, RetryBudget
+from scripts.bench_utils import jsonApp, measure, report, serveAsgi
+
+_TOKENS = {"access_token": "a" * 200, "refresh_token": "r" * 200, "user": {"_id": "u1"}, "expires_in": 900}
+
+
+async def main(total: int, concurrency: int, delaySeconds: float) -> None:
+    app = jsonApp({"/login": lambda scope: _TOKENS, "/refresh": lambda scope: _TOKENS}, delaySeconds)
+    with serveAsgi(app) as baseUrl:
+        # Cliente anterior: sin pool efectivo, cada solicitud abre y cierra su conexión.
+        async with httpx.AsyncClient(base_url=baseUrl, headers={"Connection": "close"}) as closeClient:
+
+            async def closeLogin() -> None:
+                response = await closeClient.post("/login", json={"email": "a@b.co", "password": "x" * 8})
+                response.raise_for_status()
+
+            async def closeRefresh() -> None:
+                response = await closeClient.post("/refresh", headers={"Authorization": "Bearer r"})
+                response.raise_for_status()
+
+            report("login  Connection: close", *await measure(closeLogin, total, concurrency))
+            report("refresh Connection: close", *await measure(closeRefresh, total, concurrency))
+
+        pooled = AuthServer(
+            baseUrl=baseUrl,
+            loginEndpoint="/login",
+            refreshEndpoint="/refresh",
+            timeoutSeconds=10.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=100, keepalive_expiry=30.0),
+            refreshMaxRetries=2,
+            retryBudget=RetryBudget(ratio=0.1),
+        )
+        await pooled.open()
+        try:
+            report("login  pooled", *await measure(lambda: pooled.login("a@b.co", "x" * 8), total, concurrency))
+            report("refresh pooled", *await measure(lambda: pooled.refresh("r"), total, concurrency))
+        finally:
+            await pooled.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="Demora del servidor de reemplazo por solicitud.")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.delay_ms / 1_000))
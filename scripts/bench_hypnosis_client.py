@@ -0,0 +1,60 @@
+"""Benchmark del cliente de la API de hipnosis contra un servidor de reemplazo local.
+
+Compara el cliente anterior (un `httpx.AsyncClient` nuevo por llamada, con su
+propio pool y su propio handshake TCP) con `HypnosisApi`, el cliente compartido
+por el proceso. Mide solo HTTP sin TLS en localhost, así que subestima el
+ahorro real: contra la API cada handshake evitado incluye además TLS y la
+latencia de red.
+
+Uso, desde la raíz del repositorio y con las variables de entorno de la app:
+
+    python -m scripts.bench_hypnosis_client [--requests 2000] [--concurrency 50] [--delay-ms 0]
+"""
+
+import argparse
+import asyncio
+
+import httpx
+
+from src.modules.v1.hypnosis.connections.hypnosis_api import HypnosisApi
+from src.modules.v1.shared.utils.resilience import CircuitBreaker
+from scripts.bench_utils import jsonApp, measure, report, serveAsgi
+
+_REMAINING_PATH = "/v1/maker/tasks/count-remaining"
+_REMAINING = {"artifact": "maker", "remainingTasks": 42}
+
+
+async def main(total: int, concurrency: int, delaySeconds: float) -> None:
+    app = jsonApp({_REMAINING_PATH: lambda scope: _REMAINING}, delaySeconds)
+    with serveAsgi(app) as baseUrl:
+
+        async def clientPerCall() -> None:
+            # Camino anterior de `PipelineService`: un cliente por llamada.
+            async with httpx.AsyncClient() as client:
+                response = await client.get(f"{baseUrl}{_REMAINING_PATH}", headers={"x-api-key": "test"})
+                response.raise_for_status()
+
+        report("remaining client per call", *await measure(clientPerCall, total, concurrency))
+
+        shared = HypnosisApi(
+            baseUrl=baseUrl,
+            apiKey="test",
+            timeout=httpx.Timeout(timeout=10.0, connect=2.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=100, keepalive_expiry=30.0),
+            # Umbrales altos: el breaker no debe abrirse durante la medición.
+            breaker=CircuitBreaker(name="bench", slowCallSeconds=60.0),
+        )
+        await shared.open()
+        try:
+            report("remaining shared client", *await measure(lambda: shared.get(_REMAINING_PATH), total, concurrency))
+        finally:
+            await shared.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="Demora del servidor de reemplazo por solicitud.")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.delay_ms / 1_000))
@@ -0,0 +1,110 @@
+"""Benchmark de `loginUser` durante una ráfaga de logins.
+
+El upstream es un servidor de reemplazo local. Mongo se simula: el repositorio
+de sesiones y el filtro de revocaciones esperan `--mongo-rtt-ms` por cada ida
+y vuelta, sin datos reales. Se mide:
+
+- el login tal como está: insertar la sesión y esperar el recorte (find + delete_many);
+- el mismo login sin recorte, como cota de lo que ganaría sacarlo de la solicitud;
+- el costo de cifrar con Fernet un token upstream, para decidir si conviene llevarlo a un hilo.
+
+Uso, desde la raíz del repositorio y con las variables de entorno de la app:
+
+    python -m scripts.bench_login_storm [--requests 2000] [--concurrency 200] [--mongo-rtt-ms 2]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+from scripts.bench_utils import freePort, jsonApp, measure, report, serveAsgi
+
+# La URL del upstream se lee de la configuración al importar la app: se fija antes.
+_PORT = freePort()
+os.environ["AUTH_BASE_URL"] = f"http://127.0.0.1:{_PORT}"
+
+from src.config import ENVIRONMENT_CONFIG  # noqa: E402
+from src.modules.auth.repository import auth_repository  # noqa: E402
+from src.modules.auth.schemas import auth_schema  # noqa: E402
+from src.modules.auth.services import auth_service  # noqa: E402
+from src.modules.auth.services.session_revocation_service import SESSION_REVOCATION_FILTER  # noqa: E402
+from src.modules.auth.connections.auth_server import AUTH_SERVER_CONNECTION  # noqa: E402
+from src.modules.auth.utils import crypto_utils  # noqa: E402
+
+_TOKENS = {
+    "access_token": "a" * 600,
+    "refresh_token": "r" * 600,
+    "user": {"_id": "u1", "email": "a@b.co"},
+    "expires_in": 900,
+    "refresh_expires_in": 86_400,
+}
+
+
+def _simulateMongo(rttSeconds: float) -> None:
+    """Reemplaza en las instancias compartidas las operaciones de Mongo del login por esperas de `rttSeconds`."""
+    repository = auth_repository.AUTH_SESSIONS_REPOSITORY
+
+    async def createSession(session):
+        await asyncio.sleep(rttSeconds)
+        return session
+
+    async def trimSessionsForUser(user, maxSessions):
+        # find + sort + skip + to_list, y luego delete_many.
+        await asyncio.sleep(2 * rttSeconds)
+        return []
+
+    async def revokeSessions(sessionIds, notBefore=None):
+        return None
+
+    repository.createSession = createSession
+    repository.trimSessionsForUser = trimSessionsForUser
+    SESSION_REVOCATION_FILTER.revokeSessions = revokeSessions
+
+
+def _fernetMicroseconds(samples: int = 5_000) -> float:
+    startedAt = time.perf_counter()
+    for _ in range(samples):
+        crypto_utils.encryptUpstreamToken(_TOKENS["access_token"])
+    return (time.perf_counter() - startedAt) / samples * 1_000_000
+
+
+async def main(total: int, concurrency: int, rttSeconds: float) -> None:
+    if not ENVIRONMENT_CONFIG.AUTH_CONFIG.APP_AUTH_SECRET:
+        raise SystemExit("APP_AUTH_SECRET debe estar configurado")
+
+    _simulateMongo(rttSeconds)
+    payload = auth_schema.LoginRequestSchema(email="a@b.co", password="x" * 8)
+    repository = auth_repository.AUTH_SESSIONS_REPOSITORY
+    trimSessionsForUser = repository.trimSessionsForUser
+
+    async def skipTrim(user, maxSessions):
+        return []
+
+    with serveAsgi(jsonApp({ENVIRONMENT_CONFIG.AUTH_CONFIG.AUTH_LOGIN_ENDPOINT: lambda scope: _TOKENS}), _PORT):
+        # uvicorn reconfigura el logging al arrancar: el INFO de cada login se silencia después.
+        logging.getLogger("uvicorn").setLevel(logging.WARNING)
+        await AUTH_SERVER_CONNECTION.open()
+        try:
+            # Calentamiento del pool y de las rutas de código.
+            await measure(lambda: auth_service.loginUser(payload), 100, 10)
+
+            report("login (trim inline)", *await measure(lambda: auth_service.loginUser(payload), total, concurrency))
+
+            repository.trimSessionsForUser = skipTrim
+            report("login (no trim, bound)", *await measure(lambda: auth_service.loginUser(payload), total, concurrency))
+            repository.trimSessionsForUser = trimSessionsForUser
+        finally:
+            await AUTH_SERVER_CONNECTION.close()
+
+    print(f"Fernet encrypt per upstream token: {_fernetMicroseconds():.1f} us (two per login)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--mongo-rtt-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.mongo_rtt_ms / 1_000))
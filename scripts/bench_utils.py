@@ -0,0 +1,105 @@
+"""Utilidades compartidas por los scripts de benchmark de `scripts/`.
+
+Levantan servidores ASGI de reemplazo en localhost con uvicorn y miden
+latencias bajo concurrencia. No forman parte de la app.
+"""
+
+import asyncio
+import contextlib
+import json
+import socket
+import statistics
+import threading
+import time
+import typing
+
+import uvicorn
+
+Call = typing.Callable[[], typing.Awaitable[typing.Any]]
+
+
+def jsonApp(routes: dict[str, typing.Callable[[dict], typing.Any]], delaySeconds: float = 0.0):
+    """App ASGI mínima que responde JSON por ruta exacta, con una demora opcional por solicitud."""
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        while (await receive()).get("more_body"):
+            pass
+        handler = routes.get(scope["path"])
+        if delaySeconds:
+            await asyncio.sleep(delaySeconds)
+        status = 200 if handler is not None else 404
+        body = json.dumps(handler(scope) if handler is not None else {"detail": "Not Found"}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    return app
+
+
+def freePort() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@contextlib.contextmanager
+def serveAsgi(app, port: int | None = None) -> typing.Iterator[str]:
+    """Sirve `app` en localhost, en su propio hilo y event loop; devuelve su URL base.
+
+    Con un event loop aparte, el servidor no compite por turnos con el cliente medido.
+    """
+    port = port or freePort()
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+    thread = threading.Thread(target=server.run, name="bench-server", daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+async def measure(call: Call, total: int, concurrency: int) -> tuple[list[float], float]:
+    """Ejecuta `call` `total` veces con `concurrency` en vuelo; devuelve latencias (s) y duración total."""
+    latencies: list[float] = []
+    remaining = iter(range(total))
+
+    async def worker() -> None:
+        for _ in remaining:
+            startedAt = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - startedAt)
+
+    startedAt = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - startedAt
+
+
+def report(name: str, latencies: list[float], elapsedSeconds: float) -> None:
+    ordered = sorted(latencies)
+
+    def percentile(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1_000
+
+    print(
+        f"{name:<28} n={len(ordered):<6} p50={percentile(0.50):7.2f}ms p95={percentile(0.95):7.2f}ms "
+        f"p99={percentile(0.99):7.2f}ms mean={statistics.fmean(ordered) * 1_000:7.2f}ms "
+        f"throughput={len(ordered) / elapsedSeconds:8.1f} req/s"
+    )
@@ -0,0 +1,95 @@
+"""Verifica el consumidor WebSocket de eventos del pipeline contra un servidor falso local.
+
+Comprueba la reanudación con `lastEventId`, el descarte de eventos repetidos
+(reenviados al reconectar o llegados también por webhook) y de frames
+inválidos. No necesita la API de hipnosis ni MongoDB.
+
+Uso, desde la raíz del repositorio y con las variables de entorno de la app:
+
+    python -m scripts.check_pipeline_ingest
+"""
+
+import asyncio
+import json
+import urllib.parse
+
+from websockets.asyncio.server import serve
+
+from src.modules.v1.hypnosis.schemas.pipeline_schema import LoggingSchema
+from src.modules.v1.hypnosis.services.pipeline_events_ingest_service import (
+    PipelineEventsIngestor,
+    ingestPipelineEvent,
+)
+
+
+def _event(eventId: str) -> dict:
+    return {
+        "id": eventId,
+        "receivedArtifact": "maker",
+        "timestamp": 1_700_000_000,
+        "eventType": "TASK_RECEIVED",
+        "eventMessage": "ok",
+        "audioRequestID": "audio-1",
+    }
+
+
+class RecordingWriter:
+    """Sustituto del `PipelineEventsWriter` que solo guarda los ids recibidos."""
+
+    def __init__(self) -> None:
+        self.ids: list[str | None] = []
+
+    def record(self, event: LoggingSchema) -> None:
+        self.ids.append(event.id)
+
+
+async def main() -> None:
+    resumeParams: list[str | None] = []
+    secondConnection = asyncio.Event()
+
+    async def handler(websocket) -> None:
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(websocket.request.path).query)
+        resumeParams.append(query.get("lastEventId", [None])[0])
+        if len(resumeParams) == 1:
+            await websocket.send(json.dumps(_event("e1")))
+            await websocket.send("no es json")
+            await websocket.send(json.dumps([_event("e2"), {"id": "sin-campos"}]))
+            return  # cierra la conexión para forzar la reconexión
+
+        # El upstream reenvía el último evento al reanudar.
+        await websocket.send(json.dumps(_event("e2")))
+        await websocket.send(json.dumps(_event("e3")))
+        secondConnection.set()
+        await websocket.wait_closed()
+
+    writer = RecordingWriter()
+    async with serve(handler, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        ingestor = PipelineEventsIngestor(
+            url=f"ws://127.0.0.1:{port}/events",
+            apiKey="test",
+            writer=writer,
+            enabled=True,
+            reconnectMinSeconds=0.05,
+            reconnectMaxSeconds=0.1,
+        )
+        await ingestor.start()
+        await asyncio.wait_for(secondConnection.wait(), timeout=5)
+        await asyncio.sleep(0.1)
+        await ingestor.stop()
+
+    assert resumeParams == [None, "e2"], resumeParams
+    assert writer.ids == ["e1", "e2", "e3"], writer.ids
+    assert ingestor.duplicates == 1, ingestor.snapshot()
+    assert ingestor.invalid == 2, ingestor.snapshot()
+    assert ingestor.reconnects >= 1, ingestor.snapshot()
+
+    # El mismo evento llegado por webhook después del WebSocket se descarta.
+    assert not await ingestPipelineEvent(LoggingSchema.model_validate(_event("e3")), writer)
+    assert writer.ids == ["e1", "e2", "e3"], writer.ids
+
+    print("OK", ingestor.snapshot())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -36,6 +36,50 @@ class AuthConfig(pydantic_settings.BaseSettings):
         description="Endpoint relativo para refrescar tokens en el servidor upstream.",
     )
 
+    AUTH_HTTP_MAX_CONNECTIONS: int = pydantic.Field(
+        default=20,
+        ge=1,
+        description="Conexiones simultáneas máximas del pool hacia el servidor upstream.",
+    )
+
+    AUTH_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = pydantic.Field(
+        default=10,
+        ge=0,
+        description="Conexiones ociosas que el pool mantiene abiertas para reutilizar (keep-alive).",
+    )
+
+    AUTH_HTTP_KEEPALIVE_EXPIRY_SECONDS: float = pydantic.Field(
+        default=30.0,
+        gt=0,
+        description="Segundos que una conexión ociosa permanece en el pool antes de cerrarse.",
+    )
+
+    AUTH_HTTP2_ENABLED: bool = pydantic.Field(
+        default=False,
+        description="Negocia HTTP/2 con el upstream. Requiere el paquete `h2`; sin él se usa HTTP/1.1.",
+    )
+
+    AUTH_REFRESH_MAX_RETRIES: int = pydantic.Field(
+        default=2,
+        ge=0,
+        description="Reintentos del refresh ante errores de conexión o 503 del upstream; nunca ante 502/504, que pueden llegar con el token ya rotado.",
+    )
+
+    AUTH_RETRY_BACKOFF_BASE_SECONDS: float = pydantic.Field(
+        default=0.1,
+        ge=0,
+        description="Base del backoff exponencial con jitter completo entre reintentos.",
+    )
+
+    AUTH_RETRY_BUDGET_RATIO: float = pydantic.Field(
+        default=0.1,
+        ge=0,
+        description=(
+            "Fracción de solicitudes que puede convertirse en reintentos. Evita multiplicar la carga "
+            "sobre un upstream degradado."
+        ),
+    )
+
     APP_AUTH_SECRET: str = pydantic.Field(
         default="",
         description="Secreto utilizado para firmar los tokens derivados que entrega nuestra API.",
@@ -56,6 +100,11 @@ class AuthConfig(pydantic_settings.BaseSettings):
         description="Nombre de la colección donde se guardan las sesiones de autenticación.",
     )
 
+    SESSION_ENSURE_INDEXES_ON_STARTUP: bool = pydantic.Field(
+        default=True,
+        description="Crea al iniciar los índices de sesiones (único, de usuario y TTL en refreshExpiresAt).",
+    )
+
     DERIVED_TOKEN_TTL_SECONDS: int = pydantic.Field(
         default=172_800,
         description="Duración máxima del token de acceso derivado (fallback) en segundos.",
@@ -83,3 +132,72 @@ class AuthConfig(pydantic_settings.BaseSettings):
         default=60,
         description="Duración de la ventana de rate limiting global expresada en segundos.",
     )
+
+    AUTH_GUARD_METRICS_ENABLED: bool = pydantic.Field(
+        default=False,
+        description=(
+            "Mide cada etapa del guard de autenticación (parseo, consulta, validación, descifrado, HMAC) "
+            "en histogramas por proceso y como spans de Sentry cuando la transacción está muestreada."
+        ),
+    )
+
+    VERIFIED_SESSION_CACHE_TTL_SECONDS: float = pydantic.Field(
+        default=30.0,
+        ge=0,
+        description=(
+            "Tiempo máximo (en segundos) que el guard reutiliza una sesión ya verificada sin volver a "
+            "consultar Mongo. 0 deshabilita el cache. Acota cuánto tarda otro worker en ver un logout."
+        ),
+    )
+
+    VERIFIED_SESSION_CACHE_MAX_ENTRIES: int = pydantic.Field(
+        default=10_000,
+        ge=1,
+        description="Cantidad máxima de tokens verificados que se mantienen en memoria por proceso (LRU).",
+    )
+
+    REFRESH_GRACE_WINDOW_SECONDS: float = pydantic.Field(
+        default=10.0,
+        ge=0,
+        description=(
+            "Segundos durante los que un refresh repetido con el token ya rotado recibe el par recién emitido "
+            "(0 lo deshabilita)."
+        ),
+    )
+
+    SESSION_ACCESS_FLUSH_INTERVAL_SECONDS: float = pydantic.Field(
+        default=5.0,
+        gt=0,
+        description="Cada cuántos segundos se vuelcan a Mongo los `lastAccessAt` acumulados en memoria.",
+    )
+
+    SESSION_ACCESS_FLUSH_BATCH_SIZE: int = pydantic.Field(
+        default=500,
+        ge=1,
+        description="Cantidad de sesiones pendientes que fuerza un volcado anticipado de `lastAccessAt`.",
+    )
+
+    STATELESS_ACCESS_TOKENS_ENABLED: bool = pydantic.Field(
+        default=False,
+        description=(
+            "Emite access tokens autocontenidos firmados con APP_AUTH_SECRET que el guard valida sin I/O. "
+            "El refresh sigue validándose contra la sesión almacenada."
+        ),
+    )
+
+    STATELESS_ACCESS_TOKEN_TTL_SECONDS: int = pydantic.Field(
+        default=900,
+        ge=1,
+        description="Duración máxima de un access token autocontenido. Acota la ventana de uso tras un refresh.",
+    )
+
+    SESSION_REVOCATION_COLLECTION_NAME: str = pydantic.Field(
+        default="session-revocations",
+        description="Colección donde se registran las sesiones revocadas para el filtro de tokens autocontenidos.",
+    )
+
+    SESSION_REVOCATION_SYNC_INTERVAL_SECONDS: float = pydantic.Field(
+        default=10.0,
+        gt=0,
+        description="Cada cuántos segundos cada proceso sincroniza su filtro de revocaciones desde Mongo.",
+    )
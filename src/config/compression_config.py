@@ -0,0 +1,42 @@
+import pydantic_settings
+import pydantic
+
+
+class CompressionConfig(pydantic_settings.BaseSettings):
+    """Configuración de la compresión de respuestas HTTP negociada por `Accept-Encoding`."""
+
+    model_config = pydantic_settings.SettingsConfigDict(
+        env_file=".env",
+        extra="ignore",
+        case_sensitive=False,
+        env_file_encoding="utf-8",
+        env_nested_delimiter="__",
+        validate_by_alias=True,
+        validate_by_name=True,
+        serialize_by_alias=True,
+    )
+
+    COMPRESSION_ENABLED: bool = pydantic.Field(
+        default=True,
+        description="Habilita la compresión gzip/brotli de las respuestas.",
+    )
+
+    COMPRESSION_MINIMUM_SIZE_BYTES: int = pydantic.Field(
+        default=1024,
+        ge=0,
+        description="Tamaño mínimo del cuerpo (en bytes) a partir del cual se comprime la respuesta.",
+    )
+
+    COMPRESSION_GZIP_LEVEL: int = pydantic.Field(
+        default=6,
+        ge=1,
+        le=9,
+        description="Nivel de compresión gzip (1 = más rápido, 9 = más compacto).",
+    )
+
+    COMPRESSION_BROTLI_QUALITY: int = pydantic.Field(
+        default=5,
+        ge=0,
+        le=11,
+        description="Calidad de compresión brotli (solo aplica si el paquete `brotli` está instalado).",
+    )
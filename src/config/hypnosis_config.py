@@ -1,3 +1,5 @@
+import typing
+
 import pydantic_settings
 import pydantic
 
@@ -36,12 +38,322 @@ class HypnosisConfig(pydantic_settings.BaseSettings):
         description="API Key para la API de hipnosis.",
     )
 
+    HYPNOSIS_API_TIMEOUT_SECONDS: float = pydantic.Field(
+        default=10.0,
+        gt=0,
+        description="Tiempo máximo (en segundos) de lectura, escritura y espera del pool hacia la API de hipnosis.",
+    )
+
+    HYPNOSIS_API_CONNECT_TIMEOUT_SECONDS: float = pydantic.Field(
+        default=5.0,
+        gt=0,
+        description="Tiempo máximo (en segundos) para establecer una conexión nueva con la API de hipnosis.",
+    )
+
+    HYPNOSIS_API_MAX_CONNECTIONS: int = pydantic.Field(
+        default=50,
+        ge=1,
+        description="Conexiones simultáneas máximas del pool hacia la API de hipnosis.",
+    )
+
+    HYPNOSIS_API_MAX_KEEPALIVE_CONNECTIONS: int = pydantic.Field(
+        default=20,
+        ge=0,
+        description="Conexiones ociosas que el pool mantiene abiertas para reutilizar (keep-alive).",
+    )
+
+    HYPNOSIS_API_KEEPALIVE_EXPIRY_SECONDS: float = pydantic.Field(
+        default=30.0,
+        gt=0,
+        description="Segundos que una conexión ociosa permanece en el pool antes de cerrarse.",
+    )
+
+    HYPNOSIS_BREAKER_FAILURE_RATE_THRESHOLD: float = pydantic.Field(
+        default=0.5,
+        gt=0,
+        le=1,
+        description="Fracción de llamadas fallidas (errores de red o 5xx) en la ventana que abre el circuito.",
+    )
+
+    HYPNOSIS_BREAKER_SLOW_CALL_SECONDS: float = pydantic.Field(
+        default=2.0,
+        gt=0,
+        description="Duración a partir de la cual una llamada a la API de hipnosis se considera lenta.",
+    )
+
+    HYPNOSIS_BREAKER_SLOW_CALL_RATE_THRESHOLD: float = pydantic.Field(
+        default=0.8,
+        gt=0,
+        le=1,
+        description="Fracción de llamadas lentas en la ventana que abre el circuito.",
+    )
+
+    HYPNOSIS_BREAKER_WINDOW_SIZE: int = pydantic.Field(
+        default=20,
+        ge=1,
+        description="Cantidad de llamadas recientes sobre las que se calculan las tasas.",
+    )
+
+    HYPNOSIS_BREAKER_MINIMUM_CALLS: int = pydantic.Field(
+        default=10,
+        ge=1,
+        description="Llamadas mínimas en la ventana antes de evaluar los umbrales.",
+    )
+
+    HYPNOSIS_BREAKER_OPEN_SECONDS: float = pydantic.Field(
+        default=15.0,
+        gt=0,
+        description="Segundos que el circuito permanece abierto antes de permitir llamadas de prueba.",
+    )
+
+    HYPNOSIS_BREAKER_HALF_OPEN_PROBES: int = pydantic.Field(
+        default=2,
+        ge=1,
+        description="Llamadas de prueba exitosas necesarias para volver a cerrar el circuito.",
+    )
+
+    HYPNOSIS_HEDGE_ENABLED: bool = pydantic.Field(
+        default=True,
+        description="Duplica los GET idempotentes (count-remaining) que superan el p95 observado.",
+    )
+
+    HYPNOSIS_HEDGE_MIN_DELAY_SECONDS: float = pydantic.Field(
+        default=0.05,
+        ge=0,
+        description="Espera mínima antes de lanzar la solicitud duplicada.",
+    )
+
+    HYPNOSIS_HEDGE_MAX_DELAY_SECONDS: float = pydantic.Field(
+        default=1.0,
+        gt=0,
+        description="Espera máxima antes de lanzar la solicitud duplicada (y la usada sin suficientes muestras).",
+    )
+
+    HYPNOSIS_REMAINING_TASKS_TIMEOUT_SECONDS: float = pydantic.Field(
+        default=3.0,
+        gt=0,
+        description="Tiempo máximo por artifact al consultar en paralelo las tareas pendientes de todos los artifacts.",
+    )
+
+    HYPNOSIS_REMAINING_TASKS_CACHE_SECONDS: int = pydantic.Field(
+        default=5,
+        ge=1,
+        description="Segundos que se cachea el conteo agregado de tareas pendientes.",
+    )
+
+    HYPNOSIS_QUEUE_SAMPLER_ENABLED: bool = pydantic.Field(
+        default=True,
+        description="Muestrea en segundo plano las tareas pendientes para servir su historial.",
+    )
+
+    HYPNOSIS_QUEUE_SAMPLER_INTERVAL_SECONDS: float = pydantic.Field(
+        default=15.0,
+        ge=1,
+        description="Cada cuántos segundos se muestrean las tareas pendientes de todos los artifacts.",
+    )
+
+    HYPNOSIS_QUEUE_SAMPLER_CAPACITY: int = pydantic.Field(
+        default=5_760,
+        ge=2,
+        description="Muestras retenidas por artifact (5760 a 15s equivalen a 24h).",
+    )
+
+    PIPELINE_EVENTS_STORE_ENABLED: bool = pydantic.Field(
+        default=True,
+        description=(
+            "Persiste los eventos recibidos por webhook en una colección time-series y sirve "
+            "/pipeline/logging/events desde ella, consultando el upstream para todo tramo sin cobertura."
+        ),
+    )
+
+    PIPELINE_EVENTS_COLLECTION_NAME: str = pydantic.Field(
+        default="pipeline-events",
+        description="Colección time-series donde se guardan los eventos del pipeline.",
+    )
+
+    PIPELINE_EVENTS_COVERAGE_COLLECTION_NAME: str = pydantic.Field(
+        default="pipeline-events-coverage",
+        description="Colección con las ventanas de tiempo en que el escritor persistió todos los eventos recibidos.",
+    )
+
+    PIPELINE_EVENTS_COVERAGE_LAG_SECONDS: int = pydantic.Field(
+        default=30,
+        ge=0,
+        description=(
+            "Margen que se descuenta al final de cada ventana de cobertura, para los eventos que llegan "
+            "con demora respecto de su timestamp; ese tramo se consulta al upstream."
+        ),
+    )
+
+    PIPELINE_EVENTS_RETENTION_SECONDS: int = pydantic.Field(
+        default=30 * 24 * 60 * 60,
+        ge=60,
+        description="Tiempo que Mongo conserva cada evento antes de purgarlo (expireAfterSeconds).",
+    )
+
+    PIPELINE_EVENTS_FLUSH_INTERVAL_SECONDS: float = pydantic.Field(
+        default=1.0,
+        gt=0,
+        description="Cada cuántos segundos se insertan en lote los eventos pendientes.",
+    )
+
+    PIPELINE_EVENTS_FLUSH_BATCH_SIZE: int = pydantic.Field(
+        default=500,
+        ge=1,
+        description="Cantidad de eventos pendientes que dispara una inserción anticipada.",
+    )
+
+    PIPELINE_EVENTS_MAX_PENDING: int = pydantic.Field(
+        default=50_000,
+        ge=1,
+        description="Eventos pendientes máximos en memoria si Mongo no responde; se descartan los más antiguos.",
+    )
+
     HYPNOSIS_WEBHOOK_SIGNATURE_SECRET: str = pydantic.Field(
         ...,
         description="Secreto compartido para validar webhooks recibidos de Hypnosis.",
     )
 
+    PIPELINE_WS_SEND_QUEUE_SIZE: int = pydantic.Field(
+        default=256,
+        ge=1,
+        description="Eventos en cola por cliente WebSocket antes de aplicar la política de consumidor lento.",
+    )
+
+    PIPELINE_WS_SLOW_CONSUMER_POLICY: typing.Literal["drop_oldest", "gap_notice", "disconnect"] = pydantic.Field(
+        default="drop_oldest",
+        description=(
+            "Qué hacer con un cliente WebSocket cuya cola está llena: descartar el evento más antiguo, "
+            "descartar los nuevos y avisar del hueco (solo a clientes con protocolo de control; al resto "
+            "se le descarta el más antiguo), o desconectarlo."
+        ),
+    )
+
+    PIPELINE_WS_PING_INTERVAL_SECONDS: float = pydantic.Field(
+        default=20.0,
+        ge=1.0,
+        description="Cada cuánto se envía `{\"type\": \"ping\"}` a los clientes WebSocket que usan el protocolo de control.",
+    )
+
+    PIPELINE_WS_PONG_TIMEOUT_SECONDS: float = pydantic.Field(
+        default=10.0,
+        gt=0,
+        description="Espera máxima del pong antes de cerrar la conexión de un cliente que ya respondió pings.",
+    )
+
+    PIPELINE_WS_SEND_TIMEOUT_SECONDS: float = pydantic.Field(
+        default=30.0,
+        gt=0,
+        description="Tiempo máximo que un envío puede quedar bloqueado antes de cerrar la conexión por muerta.",
+    )
+
+    PIPELINE_WS_IDLE_TIMEOUT_SECONDS: float = pydantic.Field(
+        default=0.0,
+        ge=0,
+        description=(
+            "Cierra las conexiones sin eventos enviados ni mensajes del cliente (salvo pongs) durante "
+            "este tiempo. 0 lo desactiva."
+        ),
+    )
+
+    PIPELINE_WS_MAX_CONNECTIONS: int = pydantic.Field(
+        default=1000,
+        ge=1,
+        description="Conexiones WebSocket de eventos simultáneas por proceso.",
+    )
+
+    PIPELINE_WS_MAX_CONNECTIONS_PER_HOST: int = pydantic.Field(
+        default=20,
+        ge=1,
+        description=(
+            "Conexiones WebSocket de eventos simultáneas por IP de cliente y por proceso. La IP sale de "
+            "X-Forwarded-For solo si el balanceador está en FORWARDED_ALLOW_IPS (variable de uvicorn)."
+        ),
+    )
+
+    PIPELINE_EVENTS_BUFFER_MAX_EVENTS: int = pydantic.Field(
+        default=50,
+        ge=1,
+        description="Eventos recientes retenidos por artefacto para el snapshot y el replay del WebSocket.",
+    )
+
+    PIPELINE_EVENTS_BUFFER_MAX_BYTES: int = pydantic.Field(
+        default=1024 * 1024,
+        ge=1024,
+        description="Bytes máximos retenidos por artefacto; se desalojan primero los eventos más antiguos.",
+    )
+
+    PIPELINE_EVENTS_BUFFER_MAX_TOTAL_BYTES: int = pydantic.Field(
+        default=16 * 1024 * 1024,
+        ge=1024,
+        description="Bytes máximos entre todos los artefactos; se desalojan los canales usados hace más tiempo.",
+    )
+
+    PIPELINE_EVENTS_BUFFER_ALLOWED_ARTIFACTS: list[str] = pydantic.Field(
+        default_factory=list,
+        description="Artefactos cuyos eventos se retienen para el snapshot (vacío: todos). Los demás solo se envían en vivo.",
+    )
+
+    PIPELINE_EVENTS_BUS_BACKEND: typing.Literal["local", "redis"] = pydantic.Field(
+        default="local",
+        description=(
+            "Bus de los eventos en tiempo real: `local` (solo este proceso) o `redis` "
+            "(stream compartido entre workers y réplicas, usa REDIS_URL)."
+        ),
+    )
+
+    PIPELINE_EVENTS_BUS_STREAM: str = pydantic.Field(
+        default="pipeline-events:realtime",
+        description="Clave del stream de Redis por el que se reparten los eventos en tiempo real.",
+    )
+
+    PIPELINE_EVENTS_BUS_STREAM_MAXLEN: int = pydantic.Field(
+        default=1_000,
+        ge=1,
+        description="Eventos que conserva (aprox.) el stream de Redis; alimentan el snapshot de cada worker.",
+    )
+
+    PIPELINE_EVENTS_BUS_DEDUPE_TTL_SECONDS: int = pydantic.Field(
+        default=600,
+        ge=1,
+        description=(
+            "Tiempo que Redis recuerda el id de cada evento publicado, para que lo recibido por varios "
+            "workers (webhook o WebSocket) se publique y persista una sola vez."
+        ),
+    )
+
     HYPNOSIS_WS_URL: str = pydantic.Field(
         default="ws://localhost:8000",
         description="URL del WebSocket de la API de hipnosis.",
+    )
+
+    HYPNOSIS_WS_INGEST_ENABLED: bool = pydantic.Field(
+        default=False,
+        description="Consume los eventos del pipeline por WebSocket persistente además del webhook.",
+    )
+
+    HYPNOSIS_WS_EVENTS_PATH: str = pydantic.Field(
+        default="/v1/logging/events/ws",
+        description="Ruta, relativa a HYPNOSIS_WS_URL, del stream de eventos del pipeline.",
+    )
+
+    HYPNOSIS_WS_RECONNECT_MIN_SECONDS: float = pydantic.Field(
+        default=0.5,
+        gt=0,
+        description="Espera inicial antes de reconectar el WebSocket de eventos.",
+    )
+
+    HYPNOSIS_WS_RECONNECT_MAX_SECONDS: float = pydantic.Field(
+        default=30.0,
+        gt=0,
+        description="Espera máxima entre reconexiones (backoff exponencial con jitter).",
+    )
+
+    HYPNOSIS_WS_DEDUPE_WINDOW: int = pydantic.Field(
+        default=10_000,
+        ge=0,
+        description=(
+            "Ids de eventos recientes recordados para descartar los repetidos: los reenviados al "
+            "reconectar y los que llegan tanto por webhook como por WebSocket."
+        ),
     )
\ No newline at end of file
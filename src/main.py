@@ -6,11 +6,25 @@ from fastapi.middleware.cors import CORSMiddleware
 from guard.middleware import SecurityMiddleware
 from guard.models import SecurityConfig
 from fastapi_cache import FastAPICache
-from fastapi_cache.backends.inmemory import InMemoryBackend
 
 from .config import ENVIRONMENT_CONFIG
 from .modules import ALL_MODULE_ROUTERS
+from .modules.auth.connections.auth_server import AUTH_SERVER_CONNECTION
 from .modules.auth.guards.token_guard import verifyAccessToken
+from .modules.auth.services.session_access_service import SESSION_ACCESS_BUFFER
+from .modules.auth.services.session_lifecycle_service import SESSION_LIFECYCLE_MANAGER
+from .modules.auth.services.session_revocation_service import SESSION_REVOCATION_FILTER
+from .modules.v1.hypnosis.connections.hypnosis_api import HYPNOSIS_API_CONNECTION
+from .modules.v1.hypnosis.services.pipeline_events_ingest_service import PIPELINE_EVENTS_INGESTOR
+from .modules.v1.hypnosis.services.pipeline_events_stream_service import (
+    PIPELINE_EVENTS_BUS,
+    PIPELINE_WS_HEARTBEAT,
+    closeAllConnections,
+)
+from .modules.v1.hypnosis.services.pipeline_events_store_service import PIPELINE_EVENTS_WRITER
+from .modules.v1.hypnosis.services.queue_depth_service import QUEUE_DEPTH_SAMPLER
+from .modules.v1.shared.utils.cache import InstrumentedInMemoryBackend
+from .modules.v1.shared.utils.compression import CompressionMiddleware
 
 sentry_sdk.init(
     dsn=ENVIRONMENT_CONFIG.SENTRY_CONFIG.SENTRY_DSN,
@@ -24,8 +38,31 @@ sentry_sdk.init(
 
 @asynccontextmanager
 async def lifespan(app: fastapi.FastAPI):
-    FastAPICache.init(InMemoryBackend(), prefix="fastapi-cache")
-    yield
+    FastAPICache.init(InstrumentedInMemoryBackend(), prefix="fastapi-cache")
+    if ENVIRONMENT_CONFIG.AUTH_CONFIG.SESSION_ENSURE_INDEXES_ON_STARTUP:
+        await SESSION_LIFECYCLE_MANAGER.ensureIndexes()
+    await AUTH_SERVER_CONNECTION.open()
+    await HYPNOSIS_API_CONNECTION.open()
+    await SESSION_ACCESS_BUFFER.start()
+    await SESSION_REVOCATION_FILTER.start()
+    await PIPELINE_EVENTS_WRITER.start()
+    await PIPELINE_EVENTS_BUS.start()
+    await PIPELINE_WS_HEARTBEAT.start()
+    await PIPELINE_EVENTS_INGESTOR.start()
+    await QUEUE_DEPTH_SAMPLER.start()
+    try:
+        yield
+    finally:
+        await QUEUE_DEPTH_SAMPLER.stop()
+        await PIPELINE_WS_HEARTBEAT.stop()
+        await closeAllConnections()
+        await PIPELINE_EVENTS_INGESTOR.stop()
+        await PIPELINE_EVENTS_BUS.stop()
+        await PIPELINE_EVENTS_WRITER.stop()
+        await SESSION_REVOCATION_FILTER.stop()
+        await SESSION_ACCESS_BUFFER.stop()
+        await AUTH_SERVER_CONNECTION.close()
+        await HYPNOSIS_API_CONNECTION.close()
 
 
 APP = fastapi.FastAPI(
@@ -37,6 +74,14 @@ APP = fastapi.FastAPI(
     lifespan=lifespan,
 )
 
+if ENVIRONMENT_CONFIG.COMPRESSION_CONFIG.COMPRESSION_ENABLED:
+    APP.add_middleware(
+        CompressionMiddleware,
+        minimumSize=ENVIRONMENT_CONFIG.COMPRESSION_CONFIG.COMPRESSION_MINIMUM_SIZE_BYTES,
+        gzipLevel=ENVIRONMENT_CONFIG.COMPRESSION_CONFIG.COMPRESSION_GZIP_LEVEL,
+        brotliQuality=ENVIRONMENT_CONFIG.COMPRESSION_CONFIG.COMPRESSION_BROTLI_QUALITY,
+    )
+
 APP.add_middleware(
     CORSMiddleware,
     allow_origins=ENVIRONMENT_CONFIG.CORS_ALLOWED_ORIGINS,
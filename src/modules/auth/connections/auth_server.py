@@ -1,14 +1,90 @@
+import asyncio
+import importlib.util
+import logging
+import random
+
 import httpx
 
 from src.config import ENVIRONMENT_CONFIG
 from ..schemas import auth_schema
 
+LOGGER = logging.getLogger("uvicorn").getChild("v1.auth.connections.auth_server")
+
+# Solo 503: el upstream rechazó la solicitud sin procesarla. 502 y 504 pueden
+# llegar después de que el servidor ya rotó el refresh token, y repetirlo con
+# el token viejo daría 401 o dispararía la detección de reutilización.
+_RETRYABLE_STATUS_CODES = frozenset({503})
+
+# Errores en los que la solicitud no llegó a enviarse completa.
+_RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class RetryBudget:
+    """Presupuesto de reintentos tipo token bucket.
+
+    Cada solicitud deposita `ratio` fichas y cada reintento consume una, de modo
+    que los reintentos nunca superan esa fracción del tráfico (más una reserva
+    mínima). Así un upstream degradado no recibe la carga multiplicada.
+    """
+
+    def __init__(self, ratio: float, reserve: float = 3.0, maxBalance: float = 10.0) -> None:
+        self._ratio = ratio
+        self._maxBalance = max(maxBalance, reserve)
+        self._balance = reserve
+
+    def deposit(self) -> None:
+        self._balance = min(self._balance + self._ratio, self._maxBalance)
+
+    def tryWithdraw(self) -> bool:
+        if self._balance < 1.0:
+            return False
+        self._balance -= 1.0
+        return True
+
 
 class AuthServer:
-    def __init__(self, client: httpx.AsyncClient, loginEndpoint: str, refreshEndpoint: str):
-        self._client = client
+    """Cliente del servidor de autenticación upstream con pool de conexiones keep-alive.
+
+    El cliente HTTP se abre en el lifespan (`open`) y se cierra al apagar
+    (`close`); si se usa antes de abrirlo, se abre de forma perezosa.
+    """
+
+    def __init__(
+        self,
+        baseUrl: str,
+        loginEndpoint: str,
+        refreshEndpoint: str,
+        timeoutSeconds: float,
+        limits: httpx.Limits,
+        http2: bool = False,
+        refreshMaxRetries: int = 0,
+        retryBackoffBaseSeconds: float = 0.1,
+        retryBudget: RetryBudget | None = None,
+    ):
+        self._baseUrl = baseUrl
         self._loginEndpoint = loginEndpoint
         self._refreshEndpoint = refreshEndpoint
+        self._timeout = httpx.Timeout(timeout=timeoutSeconds)
+        self._limits = limits
+        self._http2 = http2
+        self._refreshMaxRetries = refreshMaxRetries
+        self._retryBackoffBaseSeconds = retryBackoffBaseSeconds
+        self._retryBudget = retryBudget or RetryBudget(ratio=0.0, reserve=0.0)
+        self._client: httpx.AsyncClient | None = None
+
+    async def open(self) -> None:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self._baseUrl,
+                timeout=self._timeout,
+                limits=self._limits,
+                http2=self._http2,
+            )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def login(self, email: str, password: str) -> auth_schema.UpstreamTokenPairSchema:
         requestBody = {
@@ -16,7 +92,8 @@ class AuthServer:
             "password": password,
         }
 
-        response = await self._client.post(self._loginEndpoint, json=requestBody)
+        client = await self._getClient()
+        response = await client.post(self._loginEndpoint, json=requestBody)
         response.raise_for_status()
 
         return auth_schema.UpstreamTokenPairSchema.model_validate(response.json())
@@ -26,23 +103,70 @@ class AuthServer:
             "Authorization": f"Bearer {refreshToken}",
         }
 
-        response = await self._client.post(self._refreshEndpoint, headers=headers)
+        response = await self._postWithRetries(self._refreshEndpoint, headers=headers)
         response.raise_for_status()
 
         return auth_schema.UpstreamTokenPairSchema.model_validate(response.json())
 
-    async def close(self) -> None:
-        await self._client.aclose()
+    async def _getClient(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            await self.open()
+        return self._client
+
+    async def _postWithRetries(self, endpoint: str, headers: dict[str, str]) -> httpx.Response:
+        """POST con reintentos acotados solo ante fallos en los que el upstream no procesó la solicitud."""
+        client = await self._getClient()
+        self._retryBudget.deposit()
+
+        attempt = 0
+        while True:
+            try:
+                response = await client.post(endpoint, headers=headers)
+            except _RETRYABLE_ERRORS as error:
+                if not self._canRetry(attempt):
+                    raise
+                LOGGER.warning("Error de conexión con el upstream (intento %s): %s", attempt + 1, error)
+            else:
+                if response.status_code not in _RETRYABLE_STATUS_CODES or not self._canRetry(attempt):
+                    return response
+                LOGGER.warning(
+                    "El upstream respondió %s (intento %s); se reintenta",
+                    response.status_code,
+                    attempt + 1,
+                )
+                await response.aclose()
+
+            attempt += 1
+            # Backoff exponencial con jitter completo para no sincronizar reintentos entre clientes.
+            await asyncio.sleep(random.uniform(0, self._retryBackoffBaseSeconds * (2 ** (attempt - 1))))
+
+    def _canRetry(self, attempt: int) -> bool:
+        return attempt < self._refreshMaxRetries and self._retryBudget.tryWithdraw()
+
+
+def _resolveHttp2(enabled: bool) -> bool:
+    if not enabled:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        LOGGER.warning("AUTH_HTTP2_ENABLED está activo pero el paquete `h2` no está instalado; se usa HTTP/1.1.")
+        return False
+    return True
 
 
 config = ENVIRONMENT_CONFIG.AUTH_CONFIG
 
 AUTH_SERVER_CONNECTION = AuthServer(
-    client=httpx.AsyncClient(
-        base_url=config.AUTH_BASE_URL,
-        timeout=httpx.Timeout(timeout=config.AUTH_TIMEOUT_SECONDS),
-        headers={"Connection": "close"},
-    ),
+    baseUrl=config.AUTH_BASE_URL,
     loginEndpoint=config.AUTH_LOGIN_ENDPOINT,
     refreshEndpoint=config.AUTH_REFRESH_ENDPOINT,
-)
\ No newline at end of file
+    timeoutSeconds=config.AUTH_TIMEOUT_SECONDS,
+    limits=httpx.Limits(
+        max_connections=config.AUTH_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=config.AUTH_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=config.AUTH_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    ),
+    http2=_resolveHttp2(config.AUTH_HTTP2_ENABLED),
+    refreshMaxRetries=config.AUTH_REFRESH_MAX_RETRIES,
+    retryBackoffBaseSeconds=config.AUTH_RETRY_BACKOFF_BASE_SECONDS,
+    retryBudget=RetryBudget(ratio=config.AUTH_RETRY_BUDGET_RATIO),
+)
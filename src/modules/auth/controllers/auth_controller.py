@@ -45,4 +45,21 @@ async def getSessionStatus(request: Request) -> auth_schema.SessionStatusRespons
 )
 async def refreshTokens(request: auth_schema.RefreshRequestSchema) -> auth_schema.LoginResponseSchema:
     LOGGER.info("Solicitud de refresh de sesión recibida")
-    return await auth_service.refreshSession(request)
\ No newline at end of file
+    return await auth_service.refreshSession(request)
+
+
+@ROUTER.post(
+    "/logout",
+    summary="Cerrar la sesión actual",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def logout(request: Request) -> None:
+    sessionId = getattr(request.state, "authSessionId", None)
+    if sessionId is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Sesión no encontrada o expirada.",
+        )
+
+    LOGGER.info("Cierre de sesión solicitado para %s", sessionId)
+    await session_service.logoutSession(sessionId)
@@ -6,12 +6,24 @@ from fastapi import Request, status
 from fastapi.responses import JSONResponse
 
 from src.config import ENVIRONMENT_CONFIG
+from src.modules.v1.shared.utils.metrics import StageTimings
 from ..repository import auth_repository
+from ..schemas import auth_schema
+from ..services.session_access_service import SESSION_ACCESS_BUFFER
+from ..services.session_cache_service import VERIFIED_SESSION_CACHE, VerifiedSession
+from ..services.session_revocation_service import SESSION_REVOCATION_FILTER
 from ..utils import crypto_utils, token_utils
 
 LOGGER = logging.getLogger("uvicorn").getChild("v1.auth.guards.token")
 
 
+# Tiempos por etapa del guard; deshabilitado, cada etapa cuesta un `with` sobre un nullcontext.
+AUTH_GUARD_METRICS = StageTimings(
+    enabled=ENVIRONMENT_CONFIG.AUTH_CONFIG.AUTH_GUARD_METRICS_ENABLED,
+    spanOp="auth.guard",
+)
+
+
 PUBLIC_PATH_PREFIXES = (
     "/auth/login",
     "/auth/refresh",
@@ -34,6 +46,11 @@ async def verifyAccessToken(request: Request) -> fastapi.Response | None:
     if _isPublicPath(request.url.path):
         return None
 
+    with AUTH_GUARD_METRICS.stage("total"):
+        return await _verifyRequestToken(request)
+
+
+async def _verifyRequestToken(request: Request) -> fastapi.Response | None:
     authorization = request.headers.get("Authorization")
     token = ""
     
@@ -45,22 +62,39 @@ async def verifyAccessToken(request: Request) -> fastapi.Response | None:
     if not token:
         return _unauthorized("Falta el token de autenticación (Header Authorization o query param 'token').")
 
-    try:
-        tokenData = token_utils.parseDerivedToken(token)
-    except token_utils.TokenValidationError as error:
-        LOGGER.warning("Token con formato inválido: %s", error)
-        return _unauthorized("Token inválido.")
-
-    session = await auth_repository.AUTH_SESSIONS_REPOSITORY.getSessionBySessionId(
-        tokenData.sessionId
-    )
+    if token_utils.isStatelessToken(token):
+        with AUTH_GUARD_METRICS.stage("statelessVerify"):
+            return _verifyStatelessToken(request, token)
+
+    with AUTH_GUARD_METRICS.stage("parse"):
+        try:
+            tokenData = token_utils.parseDerivedToken(token)
+        except token_utils.TokenValidationError as error:
+            LOGGER.warning("Token con formato inválido: %s", error)
+            return _unauthorized("Token inválido.")
+
+        tokenHash = token_utils.hashToken(token)
+        now = datetime.datetime.now(datetime.timezone.utc)
+
+    # Camino rápido: el mismo token ya fue verificado hace poco en este proceso.
+    with AUTH_GUARD_METRICS.stage("cacheLookup"):
+        verifiedSession = VERIFIED_SESSION_CACHE.get(tokenHash)
+    if verifiedSession is not None and verifiedSession.sessionId == tokenData.sessionId:
+        return await _authorizeVerifiedSession(request, verifiedSession, now)
+
+    with AUTH_GUARD_METRICS.stage("sessionLookup"):
+        sessionDocument = await auth_repository.AUTH_SESSIONS_REPOSITORY.getSessionDocumentBySessionId(
+            tokenData.sessionId
+        )
 
-    if session is None:
+    if sessionDocument is None:
         LOGGER.warning("Sesión no encontrada para el token.")
         return _unauthorized("Sesión no encontrada o expirada.")
 
+    with AUTH_GUARD_METRICS.stage("sessionValidate"):
+        session = auth_schema.AuthSessionSchema.model_validate(sessionDocument)
+
     accessExpiresAt = _ensureAware(session.accessExpiresAt)
-    now = datetime.datetime.now(datetime.timezone.utc)
 
     if accessExpiresAt is not None:
         if accessExpiresAt <= now:
@@ -69,39 +103,89 @@ async def verifyAccessToken(request: Request) -> fastapi.Response | None:
 
     refreshExpiresAt = _ensureAware(session.refreshExpiresAt)
 
-    expectedHash = token_utils.hashToken(token)
-    if session.sessionTokenHash != expectedHash:
+    if session.sessionTokenHash != tokenHash:
         LOGGER.warning("Hash del token no coincide para la sesión %s", session.sessionId)
         return _unauthorized("Token no válido.")
 
-    try:
-        upstreamAccessToken = crypto_utils.decryptUpstreamToken(session.upstreamAccessToken)
-    except crypto_utils.TokenCipherError as error:
-        LOGGER.error("No se pudo descifrar el token upstream para la sesión %s: %s", session.sessionId, error)
+    with AUTH_GUARD_METRICS.stage("decrypt"):
+        try:
+            upstreamAccessToken = crypto_utils.decryptUpstreamToken(session.upstreamAccessToken)
+        except crypto_utils.TokenCipherError as error:
+            LOGGER.error("No se pudo descifrar el token upstream para la sesión %s: %s", session.sessionId, error)
+            return _unauthorized("Token inválido.")
+
+    with AUTH_GUARD_METRICS.stage("hmacVerify"):
+        try:
+            token_utils.verifyDerivedToken(
+                token=token,
+                upstreamToken=upstreamAccessToken,
+                secret=ENVIRONMENT_CONFIG.AUTH_CONFIG.APP_AUTH_SECRET,
+                expectedSessionId=session.sessionId,
+            )
+        except token_utils.TokenValidationError as error:
+            LOGGER.warning("Firma inválida para la sesión %s: %s", session.sessionId, error)
+            return _unauthorized("Token inválido.")
+
+    verifiedSession = VerifiedSession(
+        sessionId=session.sessionId,
+        user=session.user,
+        accessExpiresAt=accessExpiresAt,
+        refreshExpiresAt=refreshExpiresAt,
+    )
+    VERIFIED_SESSION_CACHE.put(tokenHash, verifiedSession, now)
+
+    return await _authorizeVerifiedSession(request, verifiedSession, now)
+
+
+def _verifyStatelessToken(request: Request, token: str) -> fastapi.Response | None:
+    """Valida un access token autocontenido sin I/O: firma, expiración y filtro de revocaciones."""
+
+    if not ENVIRONMENT_CONFIG.AUTH_CONFIG.STATELESS_ACCESS_TOKENS_ENABLED:
         return _unauthorized("Token inválido.")
 
+    now = datetime.datetime.now(datetime.timezone.utc)
     try:
-        token_utils.verifyDerivedToken(
+        tokenData = token_utils.verifyStatelessAccessToken(
             token=token,
-            upstreamToken=upstreamAccessToken,
             secret=ENVIRONMENT_CONFIG.AUTH_CONFIG.APP_AUTH_SECRET,
-            expectedSessionId=session.sessionId,
+            now=now,
         )
     except token_utils.TokenValidationError as error:
-        LOGGER.warning("Firma inválida para la sesión %s: %s", session.sessionId, error)
-        return _unauthorized("Token inválido.")
+        LOGGER.info("Token autocontenido rechazado: %s", error)
+        return _unauthorized("Token inválido o expirado.")
+
+    if SESSION_REVOCATION_FILTER.isRevoked(tokenData.sessionId, tokenData.issuedAt):
+        LOGGER.info("Token autocontenido revocado para la sesión %s", tokenData.sessionId)
+        return _unauthorized("Sesión no encontrada o expirada.")
 
-    if refreshExpiresAt is not None and refreshExpiresAt <= now:
+    request.state.authenticatedUser = {"_id": tokenData.userId}
+    request.state.authSessionId = tokenData.sessionId
+
+    SESSION_ACCESS_BUFFER.record(tokenData.sessionId, now)
+
+    return None
+
+
+async def _authorizeVerifiedSession(
+    request: Request,
+    session: VerifiedSession,
+    now: datetime.datetime,
+) -> fastapi.Response | None:
+    if session.accessExpiresAt is not None and session.accessExpiresAt <= now:
+        LOGGER.info("Token expirado para la sesión %s", session.sessionId)
+        return _unauthorized("El token ha expirado.")
+
+    if session.refreshExpiresAt is not None and session.refreshExpiresAt <= now:
         LOGGER.info("Refresh expirado para la sesión %s", session.sessionId)
         return _unauthorized("La sesión ha expirado.")
 
-    request.state.authenticatedUser = session.user
+    # Copia superficial para que un handler no altere la entrada compartida del cache.
+    request.state.authenticatedUser = dict(session.user)
     request.state.authSessionId = session.sessionId
 
-    await auth_repository.AUTH_SESSIONS_REPOSITORY.updateSessionAccess(
-        sessionId=session.sessionId,
-        timestamp=now,
-    )
+    # Se vuelca a Mongo en lote desde SESSION_ACCESS_BUFFER, no en cada solicitud.
+    with AUTH_GUARD_METRICS.stage("accessRecord"):
+        SESSION_ACCESS_BUFFER.record(session.sessionId, now)
 
     return None
 
@@ -125,4 +209,4 @@ def _ensureAware(dt: datetime.datetime | None) -> datetime.datetime | None:
     return dt
 
 
-__all__ = ["verifyAccessToken"]
\ No newline at end of file
+__all__ = ["AUTH_GUARD_METRICS", "verifyAccessToken"]
\ No newline at end of file
@@ -1,3 +1,3 @@
-from .auth_repository import AUTH_SESSIONS_REPOSITORY
+from .auth_repository import AUTH_SESSIONS_REPOSITORY, SESSION_REVOCATIONS_REPOSITORY
 
-__all__ = ["AUTH_SESSIONS_REPOSITORY"]
\ No newline at end of file
+__all__ = ["AUTH_SESSIONS_REPOSITORY", "SESSION_REVOCATIONS_REPOSITORY"]
\ No newline at end of file
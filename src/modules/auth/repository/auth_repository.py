@@ -8,10 +8,60 @@ from src.config import ENVIRONMENT_CONFIG
 from ..schemas import auth_schema
 
 
+SESSION_USER_KEYS = ("_id", "id", "email")
+
+# Sufijo del nombre de índice por clave: `_id` e `id` necesitan nombres distintos.
+_SESSION_USER_INDEX_NAMES = {"_id": "oid", "id": "id", "email": "email"}
+
+
 class AuthSessionsRepository(pydantic_mongo.AsyncAbstractRepository[auth_schema.AuthSessionSchema]):
     class Meta:
         collection_name = ENVIRONMENT_CONFIG.AUTH_CONFIG.SESSION_COLLECTION_NAME
 
+    async def ensureIndexes(self) -> list[str]:
+        """Crea los índices que usan el guard, el recorte de sesiones y la purga por TTL.
+
+        `create_indexes` es idempotente si las definiciones no cambiaron.
+        """
+        indexes = [
+            pymongo.IndexModel([("sessionId", pymongo.ASCENDING)], name="sessionId_unique", unique=True),
+            pymongo.IndexModel(
+                [("refreshExpiresAt", pymongo.ASCENDING)],
+                name="refreshExpiresAt_ttl",
+                expireAfterSeconds=0,
+            ),
+        ]
+        indexes.extend(
+            pymongo.IndexModel(
+                [
+                    (f"user.{key}", pymongo.ASCENDING),
+                    ("issuedAt", pymongo.DESCENDING),
+                    ("sessionId", pymongo.ASCENDING),
+                ],
+                name=f"user_{_SESSION_USER_INDEX_NAMES[key]}_issuedAt_sessionId",
+            )
+            for key in SESSION_USER_KEYS
+        )
+        return await self.get_collection().create_indexes(indexes)
+
+    async def getCollectionStats(self) -> dict[str, typing.Any]:
+        collection = self.get_collection()
+        return await collection.database.command("collStats", collection.name)
+
+    async def countExpiredSessions(self, now: datetime.datetime) -> int:
+        """Sesiones con refresh vencido que el monitor TTL aún no purgó."""
+        return await self.get_collection().count_documents({"refreshExpiresAt": {"$lte": now}})
+
+    async def getOldestExpiry(self, now: datetime.datetime) -> datetime.datetime | None:
+        document = await self.get_collection().find_one(
+            {"refreshExpiresAt": {"$lte": now}},
+            {"_id": 0, "refreshExpiresAt": 1},
+            sort=[("refreshExpiresAt", pymongo.ASCENDING)],
+        )
+        if document is None:
+            return None
+        return document.get("refreshExpiresAt")
+
     async def createSession(self, session: auth_schema.AuthSessionSchema) -> auth_schema.AuthSessionSchema:
         now = datetime.datetime.now(datetime.timezone.utc)
         session.lastAccessAt = session.lastAccessAt or now
@@ -23,49 +73,60 @@ class AuthSessionsRepository(pydantic_mongo.AsyncAbstractRepository[auth_schema.
         self,
         user: dict[str, typing.Any],
         maxSessions: int,
-    ) -> int:
+    ) -> list[str]:
+        """Elimina las sesiones más antiguas del usuario por encima de `maxSessions`.
+
+        Returns:
+            Los `sessionId` eliminados, para invalidar caches derivados.
+        """
         if not user:
-            return 0
+            return []
 
         filters: list[dict[str, typing.Any]] = []
-        for key in ("_id", "id", "email"):
+        for key in SESSION_USER_KEYS:
             value = user.get(key)
             if value:
                 filters.append({f"user.{key}": value})
 
         if not filters:
-            return 0
+            return []
 
         normalizedMax = max(maxSessions, 0)
 
         query = {"$or": filters}
 
-        if normalizedMax == 0:
-            deleteResult = await self.get_collection().delete_many(query)
-            return deleteResult.deleted_count
-
+        # Consulta cubierta: cada rama del `$or` usa su índice `user.<campo>, issuedAt, sessionId`
+        # y la proyección no pide nada fuera de él, así que no se leen documentos.
         cursor = (
             self.get_collection()
-            .find(query, {"_id": 1})
+            .find(query, {"_id": 0, "sessionId": 1, "issuedAt": 1})
             .sort("issuedAt", pymongo.DESCENDING)
             .skip(normalizedMax)
         )
 
         obsoleteSessions = await cursor.to_list(length=None)
-        sessionIds = [session.get("_id") for session in obsoleteSessions if session.get("_id") is not None]
+        sessionIds = [session["sessionId"] for session in obsoleteSessions if session.get("sessionId")]
 
         if not sessionIds:
-            return 0
+            return []
 
-        deleteResult = await self.get_collection().delete_many({"_id": {"$in": sessionIds}})
-        return deleteResult.deleted_count
+        await self.get_collection().delete_many({"sessionId": {"$in": sessionIds}})
+        return sessionIds
 
     async def getSessionBySessionId(self, sessionId: str) -> auth_schema.AuthSessionSchema | None:
-        document = await self.get_collection().find_one({"sessionId": sessionId})
+        document = await self.getSessionDocumentBySessionId(sessionId)
         if document is None:
             return None
         return auth_schema.AuthSessionSchema.model_validate(document)
 
+    async def getSessionDocumentBySessionId(self, sessionId: str) -> dict[str, typing.Any] | None:
+        """Documento crudo de la sesión, sin validar (el guard mide la validación por separado)."""
+        return await self.get_collection().find_one({"sessionId": sessionId})
+
+    async def deleteSessionBySessionId(self, sessionId: str) -> bool:
+        deleteResult = await self.get_collection().delete_one({"sessionId": sessionId})
+        return deleteResult.deleted_count > 0
+
     async def updateSessionAccess(
         self,
         sessionId: str,
@@ -81,6 +142,34 @@ class AuthSessionsRepository(pydantic_mongo.AsyncAbstractRepository[auth_schema.
             },
         )
 
+    async def bulkUpdateSessionAccess(
+        self,
+        accessBySessionId: typing.Mapping[str, datetime.datetime],
+    ) -> int:
+        """Actualiza `lastAccessAt` de varias sesiones en un único `bulk_write`.
+
+        Usa `$max` para que un volcado atrasado (por ejemplo, de otro worker)
+        nunca retroceda el último acceso registrado.
+        """
+        if not accessBySessionId:
+            return 0
+
+        operations = [
+            pymongo.UpdateOne(
+                {"sessionId": sessionId},
+                {
+                    "$max": {
+                        "lastAccessAt": timestamp,
+                        "updatedAt": timestamp,
+                    }
+                },
+            )
+            for sessionId, timestamp in accessBySessionId.items()
+        ]
+
+        result = await self.get_collection().bulk_write(operations, ordered=False)
+        return result.modified_count
+
     async def updateSessionTokens(
         self,
         sessionId: str,
@@ -110,10 +199,78 @@ class AuthSessionsRepository(pydantic_mongo.AsyncAbstractRepository[auth_schema.
         )
 
 
+class SessionRevocationsRepository(pydantic_mongo.AsyncAbstractRepository[auth_schema.SessionRevocationSchema]):
+    class Meta:
+        collection_name = ENVIRONMENT_CONFIG.AUTH_CONFIG.SESSION_REVOCATION_COLLECTION_NAME
+
+    async def ensureIndexes(self) -> list[str]:
+        indexes = [
+            pymongo.IndexModel([("sessionId", pymongo.ASCENDING)], name="sessionId_unique", unique=True),
+            pymongo.IndexModel([("revokedAt", pymongo.ASCENDING)], name="revokedAt"),
+            pymongo.IndexModel(
+                [("expiresAt", pymongo.ASCENDING)],
+                name="expiresAt_ttl",
+                expireAfterSeconds=0,
+            ),
+        ]
+        return await self.get_collection().create_indexes(indexes)
+
+    async def revokeSessions(
+        self,
+        notBeforeBySessionId: typing.Mapping[str, datetime.datetime],
+        retention: datetime.timedelta,
+        timestamp: datetime.datetime,
+    ) -> None:
+        """Registra (o adelanta) la revocación de los tokens de varias sesiones.
+
+        `$max` evita que una revocación más antigua pise a una más reciente.
+        """
+        if not notBeforeBySessionId:
+            return
+
+        operations = [
+            pymongo.UpdateOne(
+                {"sessionId": sessionId},
+                {
+                    "$max": {
+                        "notBefore": notBefore,
+                        "expiresAt": notBefore + retention,
+                    },
+                    "$set": {"revokedAt": timestamp},
+                },
+                upsert=True,
+            )
+            for sessionId, notBefore in notBeforeBySessionId.items()
+        ]
+
+        await self.get_collection().bulk_write(operations, ordered=False)
+
+    async def getRevocationsSince(
+        self,
+        since: datetime.datetime | None,
+        now: datetime.datetime,
+    ) -> list[auth_schema.SessionRevocationSchema]:
+        """Revocaciones vigentes registradas después de `since` (todas si es None)."""
+        query: dict[str, typing.Any] = {"expiresAt": {"$gt": now}}
+        if since is not None:
+            query["revokedAt"] = {"$gt": since}
+
+        cursor = self.get_collection().find(
+            query,
+            {"_id": 0, "sessionId": 1, "notBefore": 1, "revokedAt": 1, "expiresAt": 1},
+        )
+        documents = await cursor.to_list(length=None)
+        return [auth_schema.SessionRevocationSchema.model_validate(document) for document in documents]
+
+
 AUTH_MONGO_CLIENT = pymongo.AsyncMongoClient(
     ENVIRONMENT_CONFIG.CONNECTIONS_CONFIG.MONGO_DATABASE_URL
 )
 
 AUTH_SESSIONS_REPOSITORY = AuthSessionsRepository(
     database=AUTH_MONGO_CLIENT[ENVIRONMENT_CONFIG.AUTH_CONFIG.SESSION_DATABASE_NAME]
-)
\ No newline at end of file
+)
+
+SESSION_REVOCATIONS_REPOSITORY = SessionRevocationsRepository(
+    database=AUTH_MONGO_CLIENT[ENVIRONMENT_CONFIG.AUTH_CONFIG.SESSION_DATABASE_NAME]
+)
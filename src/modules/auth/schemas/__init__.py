@@ -2,6 +2,7 @@ from .auth_schema import (
     AuthSessionSchema,
     LoginRequestSchema,
     LoginResponseSchema,
+    SessionRevocationSchema,
     SessionStatusResponseSchema,
     UpstreamTokenPairSchema,
 )
@@ -10,6 +11,7 @@ __all__ = [
     "AuthSessionSchema",
     "LoginRequestSchema",
     "LoginResponseSchema",
+    "SessionRevocationSchema",
     "SessionStatusResponseSchema",
     "UpstreamTokenPairSchema",
 ]
\ No newline at end of file
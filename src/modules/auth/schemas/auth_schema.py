@@ -139,4 +139,33 @@ class AuthSessionSchema(pydantic.BaseModel):
     updatedAt: datetime.datetime = pydantic.Field(
         default_factory=lambda: datetime.datetime.now(datetime.timezone.utc),
         description="Fecha de la última actualización.",
-    )
\ No newline at end of file
+    )
+
+
+class SessionRevocationSchema(pydantic.BaseModel):
+    """Revocación de los access tokens autocontenidos de una sesión."""
+
+    model_config = pydantic.ConfigDict(
+        extra="ignore",
+        validate_by_alias=True,
+        validate_by_name=True,
+        serialize_by_alias=True,
+    )
+
+    id: typing.Optional[pydantic_mongo.PydanticObjectId] = pydantic.Field(
+        default=None,
+        description="Identificador interno de la revocación.",
+    )
+
+    sessionId: str = pydantic.Field(
+        description="Sesión cuyos tokens quedan revocados.",
+    )
+    notBefore: datetime.datetime = pydantic.Field(
+        description="Se rechazan los tokens de la sesión emitidos antes de este momento.",
+    )
+    revokedAt: datetime.datetime = pydantic.Field(
+        description="Momento en el que se registró (o actualizó) la revocación.",
+    )
+    expiresAt: datetime.datetime = pydantic.Field(
+        description="A partir de este momento ningún token afectado sigue vigente y el registro puede purgarse.",
+    )
@@ -1,5 +1,6 @@
 import datetime
 import logging
+import typing
 import uuid
 
 import fastapi
@@ -7,13 +8,18 @@ import httpx
 import pydantic
 
 from src.config import ENVIRONMENT_CONFIG
+from src.modules.v1.shared.utils.single_flight import SingleFlight
 from ..repository import auth_repository
 from ..schemas import auth_schema
 from ..connections.auth_server import AUTH_SERVER_CONNECTION
+from .session_cache_service import REFRESH_GRACE_CACHE, VERIFIED_SESSION_CACHE
+from .session_revocation_service import SESSION_REVOCATION_FILTER
 from ..utils import crypto_utils, token_utils
 
 LOGGER = logging.getLogger("uvicorn").getChild("v1.auth.services.auth")
 
+REFRESH_SINGLE_FLIGHT = SingleFlight()
+
 
 async def loginUser(payload: auth_schema.LoginRequestSchema) -> auth_schema.LoginResponseSchema:
     """Autentica contra el servidor upstream y genera tokens derivados."""
@@ -47,12 +53,13 @@ async def loginUser(payload: auth_schema.LoginRequestSchema) -> auth_schema.Logi
     )
 
     # Construimos los tokens derivados
-    # este es el de acceso
-    derivedAccessToken = token_utils.buildDerivedToken(
+    # este es el de acceso (autocontenido si STATELESS_ACCESS_TOKENS_ENABLED)
+    derivedAccessToken, accessExpiresAt = _buildAccessToken(
         sessionId=sessionId,
+        user=userData,
         upstreamToken=upstreamResponse.accessToken,
         issuedAt=issuedAt,
-        secret=ENVIRONMENT_CONFIG.AUTH_CONFIG.APP_AUTH_SECRET,
+        accessExpiresAt=accessExpiresAt,
     )
 
     # Aca decidimos el secreto para el refresh token
@@ -110,10 +117,14 @@ async def loginUser(payload: auth_schema.LoginRequestSchema) -> auth_schema.Logi
     await auth_repository.AUTH_SESSIONS_REPOSITORY.createSession(sessionDocument)
 
     # Limitamos a dos sesiones por usuario, conservando las más recientes.
-    await auth_repository.AUTH_SESSIONS_REPOSITORY.trimSessionsForUser(
+    removedSessionIds = await auth_repository.AUTH_SESSIONS_REPOSITORY.trimSessionsForUser(
         user=sessionDocument.user,
         maxSessions=2,
     )
+    VERIFIED_SESSION_CACHE.invalidateSessions(removedSessionIds)
+    for removedSessionId in removedSessionIds:
+        REFRESH_GRACE_CACHE.invalidateSession(removedSessionId)
+    await SESSION_REVOCATION_FILTER.revokeSessions(removedSessionIds)
 
     return auth_schema.LoginResponseSchema(
         accessToken=derivedAccessToken,
@@ -123,7 +134,12 @@ async def loginUser(payload: auth_schema.LoginRequestSchema) -> auth_schema.Logi
 
 
 async def refreshSession(payload: auth_schema.RefreshRequestSchema) -> auth_schema.LoginResponseSchema:
-    """Refresca los tokens derivados utilizando el refresh token del upstream."""
+    """Refresca los tokens derivados utilizando el refresh token del upstream.
+
+    Los refresh concurrentes con el mismo token se coalescen en una sola
+    llamada al upstream, y durante REFRESH_GRACE_WINDOW_SECONDS los duplicados
+    que llegan tarde reciben el par ya emitido en lugar de fallar.
+    """
 
     if not ENVIRONMENT_CONFIG.AUTH_CONFIG.APP_AUTH_SECRET:
         raise fastapi.HTTPException(
@@ -131,6 +147,13 @@ async def refreshSession(payload: auth_schema.RefreshRequestSchema) -> auth_sche
             detail="APP_AUTH_SECRET no está configurado.",
         )
 
+    refreshTokenHash = token_utils.hashToken(payload.refreshToken)
+
+    recentPair = REFRESH_GRACE_CACHE.get(refreshTokenHash)
+    if recentPair is not None:
+        LOGGER.info("Refresh duplicado dentro de la ventana de gracia para la sesión %s", recentPair[0])
+        return recentPair[1]
+
     try:
         tokenData = token_utils.parseDerivedToken(payload.refreshToken)
     except token_utils.TokenValidationError as error:
@@ -140,6 +163,21 @@ async def refreshSession(payload: auth_schema.RefreshRequestSchema) -> auth_sche
             detail="Refresh token inválido.",
         ) from error
 
+    # La clave incluye el hash del token: solo se coalescen quienes presentan el mismo refresh token.
+    response, coalesced = await REFRESH_SINGLE_FLIGHT.do(
+        (tokenData.sessionId, refreshTokenHash),
+        lambda: _refreshSessionTokens(payload, tokenData, refreshTokenHash),
+    )
+    if coalesced:
+        LOGGER.info("Refresh coalescido con otro en curso para la sesión %s", tokenData.sessionId)
+    return response
+
+
+async def _refreshSessionTokens(
+    payload: auth_schema.RefreshRequestSchema,
+    tokenData: token_utils.DerivedTokenData,
+    refreshTokenHash: str,
+) -> auth_schema.LoginResponseSchema:
     session = await auth_repository.AUTH_SESSIONS_REPOSITORY.getSessionBySessionId(
         tokenData.sessionId
     )
@@ -160,8 +198,7 @@ async def refreshSession(payload: auth_schema.RefreshRequestSchema) -> auth_sche
             detail="La sesión ha expirado.",
         )
 
-    expectedRefreshHash = token_utils.hashToken(payload.refreshToken)
-    if session.refreshTokenHash != expectedRefreshHash:
+    if session.refreshTokenHash != refreshTokenHash:
         LOGGER.warning("Refresh token hash no coincide para la sesión %s", session.sessionId)
         raise fastapi.HTTPException(
             status_code=fastapi.status.HTTP_401_UNAUTHORIZED,
@@ -203,11 +240,12 @@ async def refreshSession(payload: auth_schema.RefreshRequestSchema) -> auth_sche
         ENVIRONMENT_CONFIG.AUTH_CONFIG.DERIVED_TOKEN_TTL_SECONDS,
     )
 
-    derivedAccessToken = token_utils.buildDerivedToken(
+    derivedAccessToken, accessExpiresAt = _buildAccessToken(
         sessionId=session.sessionId,
+        user=session.user,
         upstreamToken=upstreamResponse.accessToken,
         issuedAt=issuedAt,
-        secret=ENVIRONMENT_CONFIG.AUTH_CONFIG.APP_AUTH_SECRET,
+        accessExpiresAt=accessExpiresAt,
     )
 
     refreshExpiresAt = _calculateExpiry(
@@ -248,11 +286,22 @@ async def refreshSession(payload: auth_schema.RefreshRequestSchema) -> auth_sche
         timestamp=issuedAt,
     )
 
-    return auth_schema.LoginResponseSchema(
+    # El access token anterior deja de ser válido: no debe seguir sirviéndose desde el cache.
+    VERIFIED_SESSION_CACHE.invalidateSession(session.sessionId)
+    # Los access tokens autocontenidos previos no pasan por Mongo: se revocan en el filtro.
+    await SESSION_REVOCATION_FILTER.revokeSessions(
+        [session.sessionId],
+        notBefore=_truncateToMillis(issuedAt),
+    )
+
+    response = auth_schema.LoginResponseSchema(
         accessToken=derivedAccessToken,
         refreshToken=derivedRefreshToken,
         user=session.user,
     )
+    REFRESH_GRACE_CACHE.put(refreshTokenHash, session.sessionId, response)
+
+    return response
 
 
 async def _performUpstreamLogin(
@@ -298,6 +347,60 @@ async def _performUpstreamLogin(
         ) from error
 
 
+def _buildAccessToken(
+    sessionId: str,
+    user: dict[str, typing.Any],
+    upstreamToken: str,
+    issuedAt: datetime.datetime,
+    accessExpiresAt: datetime.datetime | None,
+) -> tuple[str, datetime.datetime | None]:
+    """Construye el access token de la sesión y devuelve también su expiración efectiva.
+
+    Con STATELESS_ACCESS_TOKENS_ENABLED se emite un token autocontenido cuya
+    vida se acota a STATELESS_ACCESS_TOKEN_TTL_SECONDS; si no, el token
+    derivado del upstream de siempre.
+    """
+    authConfig = ENVIRONMENT_CONFIG.AUTH_CONFIG
+
+    if not authConfig.STATELESS_ACCESS_TOKENS_ENABLED:
+        token = token_utils.buildDerivedToken(
+            sessionId=sessionId,
+            upstreamToken=upstreamToken,
+            issuedAt=issuedAt,
+            secret=authConfig.APP_AUTH_SECRET,
+        )
+        return token, accessExpiresAt
+
+    # El token guarda milisegundos: se trunca para que coincida con el `notBefore` de las revocaciones.
+    statelessIssuedAt = _truncateToMillis(issuedAt)
+    statelessExpiresAt = statelessIssuedAt + datetime.timedelta(
+        seconds=authConfig.STATELESS_ACCESS_TOKEN_TTL_SECONDS
+    )
+    if accessExpiresAt is not None:
+        statelessExpiresAt = min(statelessExpiresAt, accessExpiresAt)
+
+    token = token_utils.buildStatelessAccessToken(
+        sessionId=sessionId,
+        userId=_resolveUserId(user),
+        issuedAt=statelessIssuedAt,
+        expiresAt=statelessExpiresAt,
+        secret=authConfig.APP_AUTH_SECRET,
+    )
+    return token, statelessExpiresAt
+
+
+def _resolveUserId(user: dict[str, typing.Any]) -> str:
+    for key in ("_id", "id", "email"):
+        value = user.get(key)
+        if value:
+            return str(value)
+    return ""
+
+
+def _truncateToMillis(value: datetime.datetime) -> datetime.datetime:
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+
 def _calculateExpiry(
     issuedAt: datetime.datetime,
     upstreamTtl: int | None,
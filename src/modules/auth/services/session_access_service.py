@@ -0,0 +1,109 @@
+import asyncio
+import datetime
+import logging
+
+from src.config import ENVIRONMENT_CONFIG
+from ..repository import auth_repository
+
+LOGGER = logging.getLogger("uvicorn").getChild("v1.auth.services.session_access")
+
+
+class SessionAccessBuffer:
+    """Buffer write-behind de los `lastAccessAt` de las sesiones.
+
+    El guard registra cada acceso en memoria (solo se conserva el más reciente
+    por sesión) y una tarea de fondo los vuelca a Mongo en un único `bulk_write`
+    cada `flushIntervalSeconds` o cuando se acumulan `batchSize` sesiones. Así
+    las escrituras escalan con las sesiones activas y no con las solicitudes.
+    """
+
+    def __init__(
+        self,
+        repository: auth_repository.AuthSessionsRepository,
+        flushIntervalSeconds: float,
+        batchSize: int,
+    ) -> None:
+        self._repository = repository
+        self._flushIntervalSeconds = flushIntervalSeconds
+        self._batchSize = batchSize
+        self._pending: dict[str, datetime.datetime] = {}
+        self._flushRequested = asyncio.Event()
+        self._runner: asyncio.Task[None] | None = None
+
+    def record(self, sessionId: str, timestamp: datetime.datetime) -> None:
+        """Registra un acceso; no hace I/O."""
+        previous = self._pending.get(sessionId)
+        if previous is None or timestamp > previous:
+            self._pending[sessionId] = timestamp
+
+        if len(self._pending) >= self._batchSize:
+            self._flushRequested.set()
+
+    def pendingAccess(self, sessionId: str) -> datetime.datetime | None:
+        """Último acceso aún no volcado a Mongo para la sesión, si existe."""
+        return self._pending.get(sessionId)
+
+    async def flush(self) -> int:
+        """Vuelca los accesos pendientes. Devuelve cuántas sesiones se enviaron."""
+        if not self._pending:
+            return 0
+
+        batch, self._pending = self._pending, {}
+        try:
+            await self._repository.bulkUpdateSessionAccess(batch)
+        except asyncio.CancelledError:
+            # `stop()` canceló un volcado en curso: el lote vuelve a la cola para el volcado final.
+            self._restore(batch)
+            raise
+        except Exception:
+            LOGGER.exception("No se pudo volcar lastAccessAt de %s sesiones; se reintentará", len(batch))
+            self._restore(batch)
+            return 0
+
+        return len(batch)
+
+    def _restore(self, batch: dict[str, datetime.datetime]) -> None:
+        """Reincorpora un lote sin pisar accesos más recientes registrados mientras tanto."""
+        for sessionId, timestamp in batch.items():
+            current = self._pending.get(sessionId)
+            if current is None or timestamp > current:
+                self._pending[sessionId] = timestamp
+
+    async def start(self) -> None:
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run(), name="session-access-flusher")
+
+    async def stop(self) -> None:
+        """Detiene la tarea de fondo y vuelca lo pendiente (llamar en el shutdown)."""
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flushRequested.wait(), timeout=self._flushIntervalSeconds)
+            except asyncio.TimeoutError:
+                pass
+
+            self._flushRequested.clear()
+            flushed = await self.flush()
+            if flushed == 0 and self._pending:
+                # El volcado falló: espera un intervalo completo antes de reintentar.
+                await asyncio.sleep(self._flushIntervalSeconds)
+
+
+SESSION_ACCESS_BUFFER = SessionAccessBuffer(
+    repository=auth_repository.AUTH_SESSIONS_REPOSITORY,
+    flushIntervalSeconds=ENVIRONMENT_CONFIG.AUTH_CONFIG.SESSION_ACCESS_FLUSH_INTERVAL_SECONDS,
+    batchSize=ENVIRONMENT_CONFIG.AUTH_CONFIG.SESSION_ACCESS_FLUSH_BATCH_SIZE,
+)
+
+
+__all__ = ["SESSION_ACCESS_BUFFER", "SessionAccessBuffer"]
@@ -0,0 +1,183 @@
+import collections
+import dataclasses
+import datetime
+import time
+import typing
+
+from src.config import ENVIRONMENT_CONFIG
+from ..schemas import auth_schema
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class VerifiedSession:
+    """Datos de una sesión cuyo token ya pasó hash, descifrado y firma HMAC."""
+
+    sessionId: str
+    user: dict[str, typing.Any]
+    accessExpiresAt: datetime.datetime | None
+    refreshExpiresAt: datetime.datetime | None
+
+
+class VerifiedSessionCache:
+    """Cache LRU con TTL de sesiones verificadas, indexado por el SHA-256 del token.
+
+    Permite que el guard evite la consulta a Mongo, el descifrado Fernet y la
+    verificación HMAC en solicitudes repetidas con el mismo token. Es local al
+    proceso: las invalidaciones solo se propagan a otros workers cuando vence el
+    TTL, por lo que conviene mantenerlo corto.
+    """
+
+    def __init__(self, ttlSeconds: float, maxEntries: int) -> None:
+        self._ttlSeconds = ttlSeconds
+        self._maxEntries = maxEntries
+        self._entries: collections.OrderedDict[str, tuple[float, VerifiedSession]] = collections.OrderedDict()
+        self._tokensBySession: dict[str, set[str]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttlSeconds > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, tokenHash: str) -> VerifiedSession | None:
+        """Devuelve la sesión verificada para el hash del token si sigue vigente."""
+        entry = self._entries.get(tokenHash)
+        if entry is None:
+            return None
+
+        deadline, session = entry
+        if deadline <= time.monotonic():
+            self._remove(tokenHash)
+            return None
+
+        self._entries.move_to_end(tokenHash)
+        return session
+
+    def put(
+        self,
+        tokenHash: str,
+        session: VerifiedSession,
+        now: datetime.datetime,
+    ) -> None:
+        """Guarda una sesión verificada sin superar sus propias expiraciones.
+
+        Args:
+            tokenHash: SHA-256 del token presentado por el cliente.
+            session: Datos verificados de la sesión.
+            now: Momento actual (UTC) usado para acotar el TTL.
+        """
+        if not self.enabled:
+            return
+
+        ttlSeconds = self._ttlSeconds
+        for expiresAt in (session.accessExpiresAt, session.refreshExpiresAt):
+            if expiresAt is not None:
+                ttlSeconds = min(ttlSeconds, (expiresAt - now).total_seconds())
+
+        if ttlSeconds <= 0:
+            return
+
+        self._remove(tokenHash)
+        self._entries[tokenHash] = (time.monotonic() + ttlSeconds, session)
+        self._tokensBySession.setdefault(session.sessionId, set()).add(tokenHash)
+
+        while len(self._entries) > self._maxEntries:
+            oldestHash = next(iter(self._entries))
+            self._remove(oldestHash)
+
+    def invalidateSession(self, sessionId: str) -> int:
+        """Elimina todos los tokens cacheados de una sesión. Devuelve cuántos se quitaron."""
+        tokenHashes = self._tokensBySession.pop(sessionId, set())
+        for tokenHash in tokenHashes:
+            self._entries.pop(tokenHash, None)
+        return len(tokenHashes)
+
+    def invalidateSessions(self, sessionIds: typing.Iterable[str]) -> int:
+        return sum(self.invalidateSession(sessionId) for sessionId in sessionIds)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tokensBySession.clear()
+
+    def _remove(self, tokenHash: str) -> None:
+        entry = self._entries.pop(tokenHash, None)
+        if entry is None:
+            return
+
+        sessionId = entry[1].sessionId
+        tokenHashes = self._tokensBySession.get(sessionId)
+        if tokenHashes is not None:
+            tokenHashes.discard(tokenHash)
+            if not tokenHashes:
+                del self._tokensBySession[sessionId]
+
+
+class RefreshGraceCache:
+    """Pares de tokens recién emitidos por un refresh, indexados por el hash del refresh token usado.
+
+    Un cliente que dispara varios refresh con el mismo token recibe el par ya
+    emitido mientras dure la ventana de gracia, en lugar de un 401 porque el
+    token anterior ya fue rotado. Es local al proceso.
+    """
+
+    def __init__(self, ttlSeconds: float, maxEntries: int) -> None:
+        self._ttlSeconds = ttlSeconds
+        self._maxEntries = maxEntries
+        self._entries: collections.OrderedDict[
+            str, tuple[float, str, auth_schema.LoginResponseSchema]
+        ] = collections.OrderedDict()
+
+    def get(self, refreshTokenHash: str) -> tuple[str, auth_schema.LoginResponseSchema] | None:
+        """Devuelve `(sessionId, respuesta)` si el refresh token se rotó dentro de la ventana."""
+        entry = self._entries.get(refreshTokenHash)
+        if entry is None:
+            return None
+
+        deadline, sessionId, response = entry
+        if deadline <= time.monotonic():
+            del self._entries[refreshTokenHash]
+            return None
+
+        return sessionId, response
+
+    def put(
+        self,
+        refreshTokenHash: str,
+        sessionId: str,
+        response: auth_schema.LoginResponseSchema,
+    ) -> None:
+        if self._ttlSeconds <= 0:
+            return
+
+        self._entries.pop(refreshTokenHash, None)
+        self._entries[refreshTokenHash] = (time.monotonic() + self._ttlSeconds, sessionId, response)
+
+        while len(self._entries) > self._maxEntries:
+            self._entries.popitem(last=False)
+
+    def invalidateSession(self, sessionId: str) -> None:
+        staleHashes = [tokenHash for tokenHash, entry in self._entries.items() if entry[1] == sessionId]
+        for tokenHash in staleHashes:
+            del self._entries[tokenHash]
+
+
+VERIFIED_SESSION_CACHE = VerifiedSessionCache(
+    ttlSeconds=ENVIRONMENT_CONFIG.AUTH_CONFIG.VERIFIED_SESSION_CACHE_TTL_SECONDS,
+    maxEntries=ENVIRONMENT_CONFIG.AUTH_CONFIG.VERIFIED_SESSION_CACHE_MAX_ENTRIES,
+)
+
+
+REFRESH_GRACE_CACHE = RefreshGraceCache(
+    ttlSeconds=ENVIRONMENT_CONFIG.AUTH_CONFIG.REFRESH_GRACE_WINDOW_SECONDS,
+    maxEntries=ENVIRONMENT_CONFIG.AUTH_CONFIG.VERIFIED_SESSION_CACHE_MAX_ENTRIES,
+)
+
+
+__all__ = [
+    "REFRESH_GRACE_CACHE",
+    "RefreshGraceCache",
+    "VERIFIED_SESSION_CACHE",
+    "VerifiedSession",
+    "VerifiedSessionCache",
+]
@@ -0,0 +1,82 @@
+import datetime
+import logging
+import typing
+
+from ..repository import auth_repository
+
+LOGGER = logging.getLogger("uvicorn").getChild("v1.auth.services.session_lifecycle")
+
+
+class SessionLifecycleManager:
+    """Administra índices y purga de las colecciones de sesiones.
+
+    - Índice único en `sessionId` para la búsqueda del guard y del refresh.
+    - Índices `user.<campo>, issuedAt, sessionId` que cubren el recorte de sesiones.
+    - Índice TTL en `refreshExpiresAt`: Mongo purga las sesiones vencidas.
+    """
+
+    def __init__(
+        self,
+        sessionsRepository: auth_repository.AuthSessionsRepository,
+        revocationsRepository: auth_repository.SessionRevocationsRepository,
+    ) -> None:
+        self._sessionsRepository = sessionsRepository
+        self._revocationsRepository = revocationsRepository
+        self.indexesReady = False
+
+    async def ensureIndexes(self) -> None:
+        """Crea los índices al iniciar. Un fallo no impide arrancar, solo queda registrado.
+
+        Las sesiones y las revocaciones se crean por separado, para que un
+        fallo en una colección no deje sin índices a la otra.
+        """
+        try:
+            sessionIndexes = await self._sessionsRepository.ensureIndexes()
+        except Exception:
+            LOGGER.exception("No se pudieron crear los índices de sesiones")
+            sessionIndexes = None
+
+        try:
+            revocationIndexes = await self._revocationsRepository.ensureIndexes()
+        except Exception:
+            LOGGER.exception("No se pudieron crear los índices de revocaciones")
+            revocationIndexes = None
+
+        self.indexesReady = sessionIndexes is not None and revocationIndexes is not None
+        LOGGER.info(
+            "Índices de sesiones verificados: %s",
+            ", ".join([*(sessionIndexes or ()), *(revocationIndexes or ())]) or "ninguno",
+        )
+
+    async def getStats(self) -> dict[str, typing.Any]:
+        """Tamaño de la colección de sesiones y sesiones vencidas pendientes de purga."""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        collectionStats = await self._sessionsRepository.getCollectionStats()
+        expiredSessions = await self._sessionsRepository.countExpiredSessions(now)
+        oldestExpiry = await self._sessionsRepository.getOldestExpiry(now)
+
+        if oldestExpiry is not None and oldestExpiry.tzinfo is None:
+            oldestExpiry = oldestExpiry.replace(tzinfo=datetime.timezone.utc)
+
+        return {
+            "indexesReady": self.indexesReady,
+            "documents": int(collectionStats.get("count", 0)),
+            "dataSizeBytes": int(collectionStats.get("size", 0)),
+            "storageSizeBytes": int(collectionStats.get("storageSize", 0)),
+            "totalIndexSizeBytes": int(collectionStats.get("totalIndexSize", 0)),
+            "indexSizesBytes": {
+                name: int(size) for name, size in collectionStats.get("indexSizes", {}).items()
+            },
+            "expiredSessions": expiredSessions,
+            "oldestExpiredAt": oldestExpiry,
+            "expiryBacklogSeconds": (now - oldestExpiry).total_seconds() if oldestExpiry is not None else 0.0,
+        }
+
+
+SESSION_LIFECYCLE_MANAGER = SessionLifecycleManager(
+    sessionsRepository=auth_repository.AUTH_SESSIONS_REPOSITORY,
+    revocationsRepository=auth_repository.SESSION_REVOCATIONS_REPOSITORY,
+)
+
+
+__all__ = ["SESSION_LIFECYCLE_MANAGER", "SessionLifecycleManager"]
@@ -0,0 +1,152 @@
+import asyncio
+import datetime
+import logging
+import typing
+
+from src.config import ENVIRONMENT_CONFIG
+from ..repository import auth_repository
+
+LOGGER = logging.getLogger("uvicorn").getChild("v1.auth.services.session_revocation")
+
+# Margen con el que se vuelve a pedir lo ya sincronizado, para tolerar relojes
+# desfasados entre workers. Reaplicar una revocación es idempotente.
+_SYNC_OVERLAP = datetime.timedelta(seconds=5)
+
+
+class SessionRevocationFilter:
+    """Filtro en memoria de sesiones revocadas para los access tokens autocontenidos.
+
+    Cada entrada guarda el `notBefore` de la sesión: se rechazan sus tokens
+    emitidos antes de ese momento. Un logout o un recorte de sesiones revoca la
+    sesión completa, y un refresh revoca solo los tokens previos al nuevo.
+
+    Las revocaciones locales se aplican al instante y se persisten en Mongo; las
+    de otros workers llegan en la siguiente sincronización incremental, de modo
+    que la ventana de propagación queda acotada por `syncIntervalSeconds`. Cada
+    entrada se descarta cuando vence el TTL máximo de los tokens autocontenidos.
+    """
+
+    def __init__(
+        self,
+        repository: auth_repository.SessionRevocationsRepository,
+        syncIntervalSeconds: float,
+        retentionSeconds: int,
+        enabled: bool,
+    ) -> None:
+        self._repository = repository
+        self._syncIntervalSeconds = syncIntervalSeconds
+        self._retention = datetime.timedelta(seconds=retentionSeconds)
+        self.enabled = enabled
+        self._revoked: dict[str, tuple[datetime.datetime, datetime.datetime]] = {}
+        self._lastSyncAt: datetime.datetime | None = None
+        self._runner: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def isRevoked(self, sessionId: str, issuedAt: datetime.datetime) -> bool:
+        """Indica si un token de la sesión emitido en `issuedAt` fue revocado; no hace I/O."""
+        entry = self._revoked.get(sessionId)
+        return entry is not None and issuedAt < entry[0]
+
+    async def revokeSessions(
+        self,
+        sessionIds: typing.Iterable[str],
+        notBefore: datetime.datetime | None = None,
+    ) -> None:
+        """Revoca los tokens de las sesiones emitidos antes de `notBefore` (ahora por defecto)."""
+        if not self.enabled:
+            return
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        notBefore = notBefore or now
+        revocations = {sessionId: notBefore for sessionId in sessionIds}
+        if not revocations:
+            return
+
+        for sessionId in revocations:
+            self._apply(sessionId, notBefore, notBefore + self._retention)
+
+        try:
+            await self._repository.revokeSessions(revocations, self._retention, now)
+        except Exception:
+            # La revocación local ya rige; los demás workers la recibirán cuando se persista otra.
+            LOGGER.exception("No se pudieron persistir %s revocaciones de sesión", len(revocations))
+
+    async def sync(self) -> int:
+        """Incorpora las revocaciones registradas por otros workers. Devuelve cuántas leyó."""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        since = self._lastSyncAt - _SYNC_OVERLAP if self._lastSyncAt is not None else None
+
+        revocations = await self._repository.getRevocationsSince(since, now)
+        for revocation in revocations:
+            self._apply(
+                revocation.sessionId,
+                _ensureAware(revocation.notBefore),
+                _ensureAware(revocation.expiresAt),
+            )
+
+        self._lastSyncAt = now
+        self._prune(now)
+        return len(revocations)
+
+    async def start(self) -> None:
+        if not self.enabled:
+            return
+
+        try:
+            await self.sync()
+        except Exception:
+            LOGGER.exception("No se pudo cargar el filtro de revocaciones al iniciar")
+
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run(), name="session-revocation-sync")
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._syncIntervalSeconds)
+            try:
+                await self.sync()
+            except Exception:
+                LOGGER.exception("No se pudo sincronizar el filtro de revocaciones")
+
+    def _apply(
+        self,
+        sessionId: str,
+        notBefore: datetime.datetime,
+        expiresAt: datetime.datetime,
+    ) -> None:
+        current = self._revoked.get(sessionId)
+        if current is None or notBefore > current[0]:
+            self._revoked[sessionId] = (notBefore, expiresAt)
+
+    def _prune(self, now: datetime.datetime) -> None:
+        expired = [sessionId for sessionId, (_, expiresAt) in self._revoked.items() if expiresAt <= now]
+        for sessionId in expired:
+            del self._revoked[sessionId]
+
+
+def _ensureAware(dt: datetime.datetime) -> datetime.datetime:
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=datetime.timezone.utc)
+    return dt
+
+
+SESSION_REVOCATION_FILTER = SessionRevocationFilter(
+    repository=auth_repository.SESSION_REVOCATIONS_REPOSITORY,
+    syncIntervalSeconds=ENVIRONMENT_CONFIG.AUTH_CONFIG.SESSION_REVOCATION_SYNC_INTERVAL_SECONDS,
+    retentionSeconds=ENVIRONMENT_CONFIG.AUTH_CONFIG.STATELESS_ACCESS_TOKEN_TTL_SECONDS,
+    enabled=ENVIRONMENT_CONFIG.AUTH_CONFIG.STATELESS_ACCESS_TOKENS_ENABLED,
+)
+
+
+__all__ = ["SESSION_REVOCATION_FILTER", "SessionRevocationFilter"]
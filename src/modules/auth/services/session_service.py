@@ -2,6 +2,9 @@ from fastapi import HTTPException, status
 
 from ..repository import auth_repository
 from ..schemas import auth_schema
+from .session_access_service import SESSION_ACCESS_BUFFER
+from .session_cache_service import REFRESH_GRACE_CACHE, VERIFIED_SESSION_CACHE
+from .session_revocation_service import SESSION_REVOCATION_FILTER
 
 
 async def getSessionStatus(sessionId: str) -> auth_schema.SessionStatusResponseSchema:
@@ -16,7 +19,15 @@ async def getSessionStatus(sessionId: str) -> auth_schema.SessionStatusResponseS
         sessionId=session.sessionId,
         user=session.user,
         issuedAt=session.issuedAt,
-        lastAccessAt=session.lastAccessAt,
+        lastAccessAt=SESSION_ACCESS_BUFFER.pendingAccess(session.sessionId) or session.lastAccessAt,
         accessExpiresAt=session.accessExpiresAt,
         refreshExpiresAt=session.refreshExpiresAt,
     )
+
+
+async def logoutSession(sessionId: str) -> None:
+    """Elimina la sesión y descarta los tokens verificados que la referencian."""
+    await auth_repository.AUTH_SESSIONS_REPOSITORY.deleteSessionBySessionId(sessionId)
+    VERIFIED_SESSION_CACHE.invalidateSession(sessionId)
+    REFRESH_GRACE_CACHE.invalidateSession(sessionId)
+    await SESSION_REVOCATION_FILTER.revokeSessions([sessionId])
@@ -19,6 +19,17 @@ class DerivedTokenData:
     payload: str
 
 
+@dataclasses.dataclass
+class StatelessTokenData:
+    sessionId: str
+    userId: str
+    issuedAt: datetime.datetime
+    expiresAt: datetime.datetime
+
+
+STATELESS_TOKEN_PREFIX = "st"
+
+
 def buildDerivedToken(
     sessionId: str,
     upstreamToken: str,
@@ -86,6 +97,75 @@ def verifyDerivedToken(
     return tokenData
 
 
+def buildStatelessAccessToken(
+    sessionId: str,
+    userId: str,
+    issuedAt: datetime.datetime,
+    expiresAt: datetime.datetime,
+    secret: str,
+) -> str:
+    """Construye un access token autocontenido verificable con un único HMAC.
+
+    Formato: `st.<claims base64url>.<firma>`, donde los claims son
+    `sessionId|userId|issuedAtMs|expiresAtMs`.
+    """
+    claims = "|".join(
+        (
+            sessionId,
+            userId,
+            str(int(issuedAt.timestamp() * 1000)),
+            str(int(expiresAt.timestamp() * 1000)),
+        )
+    )
+    encodedClaims = base64.urlsafe_b64encode(claims.encode()).decode().rstrip("=")
+    payload = f"{STATELESS_TOKEN_PREFIX}.{encodedClaims}"
+    signature = _generateSignature(payload, "", secret)
+    return f"{payload}.{signature}"
+
+
+def isStatelessToken(token: str) -> bool:
+    return token.startswith(f"{STATELESS_TOKEN_PREFIX}.")
+
+
+def verifyStatelessAccessToken(
+    token: str,
+    secret: str,
+    now: datetime.datetime | None = None,
+) -> StatelessTokenData:
+    parts = token.split(".")
+    if len(parts) != 3 or parts[0] != STATELESS_TOKEN_PREFIX or not parts[1] or not parts[2]:
+        raise TokenValidationError("Token autocontenido con formato inválido.")
+
+    payload = f"{parts[0]}.{parts[1]}"
+    expectedSignature = _generateSignature(payload, "", secret)
+    if not hmac.compare_digest(parts[2], expectedSignature):
+        raise TokenValidationError("Firma del token autocontenido inválida.")
+
+    try:
+        padding = "=" * (-len(parts[1]) % 4)
+        claims = base64.urlsafe_b64decode(parts[1] + padding).decode()
+        sessionId, remainder = claims.split("|", 1)
+        userId, issuedAtRaw, expiresAtRaw = remainder.rsplit("|", 2)
+        issuedAt = datetime.datetime.fromtimestamp(int(issuedAtRaw) / 1000, datetime.timezone.utc)
+        expiresAt = datetime.datetime.fromtimestamp(int(expiresAtRaw) / 1000, datetime.timezone.utc)
+    except (ValueError, UnicodeDecodeError) as error:
+        raise TokenValidationError("Claims del token autocontenido inválidos.") from error
+
+    if not sessionId:
+        raise TokenValidationError("Token autocontenido sin identificador de sesión.")
+
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    if expiresAt <= now:
+        raise TokenValidationError("Token autocontenido expirado.")
+
+    return StatelessTokenData(
+        sessionId=sessionId,
+        userId=userId,
+        issuedAt=issuedAt,
+        expiresAt=expiresAt,
+    )
+
+
 def _generateSignature(payload: str, upstreamToken: str, secret: str) -> str:
     digest = hmac.new(
         key=secret.encode(),
@@ -97,9 +177,13 @@ def _generateSignature(payload: str, upstreamToken: str, secret: str) -> str:
 
 __all__ = [
     "DerivedTokenData",
+    "StatelessTokenData",
     "TokenValidationError",
     "buildDerivedToken",
+    "buildStatelessAccessToken",
     "hashToken",
+    "isStatelessToken",
     "parseDerivedToken",
     "verifyDerivedToken",
+    "verifyStatelessAccessToken",
 ]
\ No newline at end of file
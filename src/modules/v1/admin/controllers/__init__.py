@@ -0,0 +1,5 @@
+from .metrics_controller import ROUTER as METRICS_ROUTER
+
+ALL_CONTROLLERS = [
+    METRICS_ROUTER,
+]
\ No newline at end of file
@@ -0,0 +1,135 @@
+import fastapi
+import logging
+from ..schemas import metrics_schema
+from ..services import metrics_service
+
+LOGGER = logging.getLogger("uvicorn").getChild("v1.admin.controllers.metrics")
+
+
+ROUTER = fastapi.APIRouter(
+    prefix="/metrics",
+)
+
+
+@ROUTER.get(
+    "/cache",
+    summary="Obtener métricas del cache de respuestas",
+    response_model=metrics_schema.CacheMetricsResponseSchema,
+    responses={
+        200: {
+            "description": "Respuesta exitosa",
+            "model": metrics_schema.CacheMetricsResponseSchema,
+        },
+    },
+)
+async def getCacheMetrics() -> metrics_schema.CacheMetricsResponseSchema:
+    """
+    Expone hits, misses, esperas coalescidas, desalojos, bytes almacenados y la
+    latencia del cálculo por endpoint cacheado.
+
+    Las métricas son por proceso: con varios workers cada uno reporta las suyas.
+    """
+
+    return metrics_service.getCacheMetrics()
+
+
+@ROUTER.get(
+    "/sessions",
+    summary="Obtener métricas de almacenamiento de sesiones",
+    response_model=metrics_schema.SessionStorageMetricsSchema,
+    responses={
+        200: {
+            "description": "Respuesta exitosa",
+            "model": metrics_schema.SessionStorageMetricsSchema,
+        },
+    },
+)
+async def getSessionStorageMetrics() -> metrics_schema.SessionStorageMetricsSchema:
+    """
+    Expone el tamaño de la colección de sesiones y de sus índices, y cuántas
+    sesiones vencidas esperan la purga del índice TTL.
+    """
+
+    return await metrics_service.getSessionStorageMetrics()
+
+
+@ROUTER.get(
+    "/auth-guard",
+    summary="Obtener latencias por etapa del guard de autenticación",
+    response_model=metrics_schema.AuthGuardMetricsResponseSchema,
+    responses={
+        200: {
+            "description": "Respuesta exitosa",
+            "model": metrics_schema.AuthGuardMetricsResponseSchema,
+        },
+    },
+)
+async def getAuthGuardMetrics() -> metrics_schema.AuthGuardMetricsResponseSchema:
+    """
+    Expone un histograma de latencia por cada etapa de `verifyAccessToken`.
+
+    Solo se registran datos con AUTH_GUARD_METRICS_ENABLED activo; son por proceso.
+    """
+
+    return metrics_service.getAuthGuardMetrics()
+
+
+@ROUTER.get(
+    "/pipeline-ingest",
+    summary="Obtener el estado de la ingesta de eventos del pipeline por WebSocket",
+    response_model=metrics_schema.PipelineIngestMetricsSchema,
+    responses={
+        200: {
+            "description": "Respuesta exitosa",
+            "model": metrics_schema.PipelineIngestMetricsSchema,
+        },
+    },
+)
+async def getPipelineIngestMetrics() -> metrics_schema.PipelineIngestMetricsSchema:
+    """
+    Expone si el WebSocket con la API de hipnosis está conectado, el último id
+    recibido y los contadores de eventos, duplicados y reconexiones.
+    """
+
+    return metrics_service.getPipelineIngestMetrics()
+
+
+@ROUTER.get(
+    "/pipeline-ws",
+    summary="Obtener las colas de envío del WebSocket de eventos del pipeline",
+    response_model=metrics_schema.PipelineWebSocketMetricsSchema,
+    responses={
+        200: {
+            "description": "Respuesta exitosa",
+            "model": metrics_schema.PipelineWebSocketMetricsSchema,
+        },
+    },
+)
+async def getPipelineWebSocketMetrics() -> metrics_schema.PipelineWebSocketMetricsSchema:
+    """
+    Expone la profundidad de la cola de envío de cada cliente conectado, los
+    eventos descartados por la política de consumidor lento, las conexiones
+    vivas frente a los límites y las cerradas por el heartbeat.
+    """
+
+    return metrics_service.getPipelineWebSocketMetrics()
+
+
+@ROUTER.get(
+    "/pipeline-buffer",
+    summary="Obtener la ocupación del buffer de replay de eventos del pipeline",
+    response_model=metrics_schema.PipelineEventBufferMetricsSchema,
+    responses={
+        200: {
+            "description": "Respuesta exitosa",
+            "model": metrics_schema.PipelineEventBufferMetricsSchema,
+        },
+    },
+)
+async def getPipelineEventBufferMetrics() -> metrics_schema.PipelineEventBufferMetricsSchema:
+    """
+    Expone los bytes y eventos retenidos por artefacto para snapshot y
+    `?since=`, junto con los límites configurados y los desalojos.
+    """
+
+    return metrics_service.getPipelineEventBufferMetrics()
@@ -0,0 +1,10 @@
+import fastapi
+from . import controllers
+
+ROUTER = fastapi.APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+)
+
+for controller in controllers.ALL_CONTROLLERS:
+    ROUTER.include_router(controller)
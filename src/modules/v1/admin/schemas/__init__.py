@@ -0,0 +1,3 @@
+from . import (
+    metrics_schema as metrics_schema,
+)
\ No newline at end of file
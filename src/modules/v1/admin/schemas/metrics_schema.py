@@ -0,0 +1,194 @@
+import datetime
+import typing
+
+import pydantic
+
+
+class LatencySummarySchema(pydantic.BaseModel):
+    """Resumen de un histograma de latencias en memoria."""
+
+    count: int = pydantic.Field(0, description="Cantidad de observaciones registradas.")
+    sumMs: float = pydantic.Field(0.0, description="Suma de las latencias en milisegundos.")
+    avgMs: typing.Optional[float] = pydantic.Field(None, description="Latencia promedio en milisegundos.")
+    maxMs: float = pydantic.Field(0.0, description="Latencia máxima observada en milisegundos.")
+    p50Ms: typing.Optional[float] = pydantic.Field(None, description="Percentil 50 estimado en milisegundos.")
+    p95Ms: typing.Optional[float] = pydantic.Field(None, description="Percentil 95 estimado en milisegundos.")
+    p99Ms: typing.Optional[float] = pydantic.Field(None, description="Percentil 99 estimado en milisegundos.")
+    buckets: typing.Dict[str, int] = pydantic.Field(
+        default_factory=dict,
+        description="Observaciones por bucket (`le_<ms>` = menor o igual a <ms>).",
+    )
+
+
+class CacheVariantMetricsSchema(pydantic.BaseModel):
+    """Métricas de las variantes comprimidas de un endpoint en una codificación."""
+
+    hits: int = pydantic.Field(0, description="Lecturas que encontraron la variante comprimida vigente.")
+    misses: int = pydantic.Field(0, description="Lecturas sin variante vigente (se comprimió la respuesta).")
+    hitRatio: typing.Optional[float] = pydantic.Field(None, description="hits / (hits + misses).")
+    evictions: int = pydantic.Field(0, description="Variantes desalojadas por vencimiento o limpieza.")
+    sets: int = pydantic.Field(0, description="Variantes escritas en el backend.")
+    bytesWritten: int = pydantic.Field(0, description="Bytes comprimidos escritos acumulados.")
+
+
+class CacheEndpointMetricsSchema(pydantic.BaseModel):
+    """Métricas del cache de respuestas para un endpoint."""
+
+    endpoint: str = pydantic.Field(..., description="Namespace del endpoint cacheado (`<módulo>.<función>`).")
+    hits: int = pydantic.Field(0, description="Lecturas que encontraron una entrada vigente.")
+    misses: int = pydantic.Field(0, description="Lecturas sin entrada vigente.")
+    hitRatio: typing.Optional[float] = pydantic.Field(None, description="hits / (hits + misses).")
+    coalescedWaits: int = pydantic.Field(
+        0, description="Misses concurrentes que esperaron un cálculo ya en curso en lugar de repetirlo."
+    )
+    evictions: int = pydantic.Field(0, description="Entradas desalojadas por vencimiento o limpieza.")
+    sets: int = pydantic.Field(0, description="Escrituras realizadas en el backend.")
+    bytesWritten: int = pydantic.Field(0, description="Bytes escritos acumulados.")
+    keys: int = pydantic.Field(0, description="Claves almacenadas actualmente (cardinalidad), variantes incluidas.")
+    bytesStored: int = pydantic.Field(0, description="Bytes ocupados actualmente por las entradas, variantes incluidas.")
+    expiredKeys: int = pydantic.Field(0, description="Entradas vencidas que aún no fueron desalojadas.")
+    computeLatency: LatencySummarySchema = pydantic.Field(
+        default_factory=LatencySummarySchema,
+        description="Latencia del cálculo envuelto (solo se ejecuta en misses).",
+    )
+    estimatedSavedMs: float = pydantic.Field(
+        0.0, description="Tiempo de cálculo ahorrado estimado: (hits + coalescedWaits) * latencia promedio."
+    )
+    variants: typing.Dict[str, CacheVariantMetricsSchema] = pydantic.Field(
+        default_factory=dict,
+        description="Variantes comprimidas por codificación (`gzip`, `br`); no cuentan en `hits`/`misses`.",
+    )
+
+
+class CacheMetricsResponseSchema(pydantic.BaseModel):
+    """Estado del cache de respuestas del proceso actual."""
+
+    totalKeys: int = pydantic.Field(0, description="Claves almacenadas en el backend.")
+    totalBytesStored: int = pydantic.Field(0, description="Bytes ocupados por todas las entradas.")
+    endpoints: typing.List[CacheEndpointMetricsSchema] = pydantic.Field(
+        default_factory=list, description="Métricas por endpoint."
+    )
+
+
+class SessionStorageMetricsSchema(pydantic.BaseModel):
+    """Tamaño de la colección de sesiones y estado de su purga por TTL."""
+
+    indexesReady: bool = pydantic.Field(False, description="Si los índices se verificaron al iniciar este proceso.")
+    documents: int = pydantic.Field(0, description="Sesiones almacenadas.")
+    dataSizeBytes: int = pydantic.Field(0, description="Tamaño sin comprimir de los documentos.")
+    storageSizeBytes: int = pydantic.Field(0, description="Espacio reservado en disco para los documentos.")
+    totalIndexSizeBytes: int = pydantic.Field(0, description="Espacio ocupado por todos los índices.")
+    indexSizesBytes: typing.Dict[str, int] = pydantic.Field(
+        default_factory=dict, description="Espacio ocupado por índice."
+    )
+    expiredSessions: int = pydantic.Field(
+        0, description="Sesiones con refresh vencido que el monitor TTL de Mongo aún no purgó."
+    )
+    oldestExpiredAt: typing.Optional[datetime.datetime] = pydantic.Field(
+        None, description="Vencimiento más antiguo aún presente."
+    )
+    expiryBacklogSeconds: float = pydantic.Field(
+        0.0, description="Atraso de la purga: segundos desde el vencimiento más antiguo aún presente."
+    )
+
+
+class AuthGuardMetricsResponseSchema(pydantic.BaseModel):
+    """Latencias por etapa del guard de autenticación en el proceso actual."""
+
+    enabled: bool = pydantic.Field(False, description="Si AUTH_GUARD_METRICS_ENABLED está activo.")
+    stages: typing.Dict[str, LatencySummarySchema] = pydantic.Field(
+        default_factory=dict,
+        description=(
+            "Histograma por etapa: total, parse, cacheLookup, sessionLookup, sessionValidate, decrypt, "
+            "hmacVerify, statelessVerify y accessRecord."
+        ),
+    )
+
+
+class PipelineIngestMetricsSchema(pydantic.BaseModel):
+    """Estado del consumidor WebSocket de eventos del pipeline en el proceso actual."""
+
+    enabled: bool = pydantic.Field(False, description="Si HYPNOSIS_WS_INGEST_ENABLED está activo.")
+    connected: bool = pydantic.Field(False, description="Si el WebSocket con el upstream está abierto.")
+    lastEventId: typing.Optional[str] = pydantic.Field(
+        None, description="Último id recibido; se usa para reanudar al reconectar."
+    )
+    reconnects: int = pydantic.Field(0, description="Reconexiones desde el inicio del proceso.")
+    received: int = pydantic.Field(0, description="Eventos recibidos y despachados.")
+    duplicates: int = pydantic.Field(0, description="Eventos descartados por id repetido.")
+    invalid: int = pydantic.Field(0, description="Mensajes o eventos descartados por no ser válidos.")
+
+
+class PipelineWebSocketClientSchema(pydantic.BaseModel):
+    """Cola de envío de un cliente conectado a /pipeline/logging/ws."""
+
+    id: int = pydantic.Field(..., description="Identificador de la conexión dentro del proceso.")
+    host: str = pydantic.Field("unknown", description="IP del cliente.")
+    filters: typing.Dict[str, typing.List[str]] = pydantic.Field(
+        default_factory=dict, description="Filtros de suscripción activos; vacío si recibe todos los eventos."
+    )
+    queued: int = pydantic.Field(0, description="Eventos en cola pendientes de envío.")
+    highWatermark: int = pydantic.Field(0, description="Máximo de eventos en cola alcanzado.")
+    sent: int = pydantic.Field(0, description="Eventos en vivo enviados.")
+    dropped: int = pydantic.Field(0, description="Eventos descartados por la política de consumidor lento.")
+    heartbeat: bool = pydantic.Field(False, description="Si el cliente responde los pings del servidor.")
+    idleSeconds: float = pydantic.Field(0.0, description="Segundos sin eventos enviados ni mensajes del cliente.")
+    sendingSeconds: typing.Optional[float] = pydantic.Field(
+        None, description="Segundos que lleva el envío en curso; None si no hay ninguno."
+    )
+
+
+class PipelineWebSocketMetricsSchema(pydantic.BaseModel):
+    """Colas de envío del WebSocket de eventos del pipeline en el proceso actual."""
+
+    slowConsumerPolicy: str = pydantic.Field(..., description="Política aplicada cuando una cola se llena.")
+    queueCapacity: int = pydantic.Field(..., description="Eventos en cola permitidos por cliente.")
+    connections: int = pydantic.Field(0, description="Clientes conectados.")
+    maxConnections: int = pydantic.Field(..., description="Conexiones simultáneas permitidas por proceso.")
+    maxConnectionsPerHost: int = pydantic.Field(..., description="Conexiones simultáneas permitidas por IP.")
+    reservedSlots: int = pydantic.Field(0, description="Lugares ocupados, incluidos los handshakes en curso.")
+    hosts: int = pydantic.Field(0, description="IPs distintas con conexiones.")
+    maxConnectionsPerHostInUse: int = pydantic.Field(0, description="Conexiones de la IP con más conexiones.")
+    acceptingConnections: bool = pydantic.Field(True, description="False mientras el proceso se apaga.")
+    rejectedConnections: int = pydantic.Field(0, description="Conexiones rechazadas por los límites o por apagado.")
+    reapedUnresponsive: int = pydantic.Field(0, description="Conexiones cerradas por no responder el ping.")
+    reapedStalled: int = pydantic.Field(0, description="Conexiones cerradas por un envío bloqueado.")
+    reapedIdle: int = pydantic.Field(0, description="Conexiones cerradas por inactividad.")
+    totalQueued: int = pydantic.Field(0, description="Eventos en cola sumando todos los clientes.")
+    maxQueued: int = pydantic.Field(0, description="Cola más larga entre los clientes conectados.")
+    totalDropped: int = pydantic.Field(0, description="Eventos descartados entre los clientes conectados.")
+    clients: typing.List[PipelineWebSocketClientSchema] = pydantic.Field(
+        default_factory=list, description="Detalle por cliente."
+    )
+
+
+class PipelineEventChannelSchema(pydantic.BaseModel):
+    """Eventos retenidos para snapshot y replay de un artefacto."""
+
+    artifact: str = pydantic.Field(..., description="Artefacto del canal.")
+    events: int = pydantic.Field(0, description="Eventos retenidos.")
+    bytes: int = pydantic.Field(0, description="Bytes que ocupan los eventos retenidos.")
+    oldestSeq: typing.Optional[int] = pydantic.Field(None, description="Secuencia del evento más antiguo retenido.")
+    newestSeq: typing.Optional[int] = pydantic.Field(None, description="Secuencia del evento más reciente retenido.")
+    lastEventAt: float = pydantic.Field(0.0, description="Instante Unix del último evento retenido.")
+
+
+class PipelineEventBufferMetricsSchema(pydantic.BaseModel):
+    """Ocupación del buffer de replay del WebSocket de eventos del pipeline en el proceso actual."""
+
+    maxEventsPerArtifact: int = pydantic.Field(..., description="Eventos retenidos como máximo por artefacto.")
+    maxBytesPerArtifact: int = pydantic.Field(..., description="Bytes retenidos como máximo por artefacto.")
+    maxTotalBytes: int = pydantic.Field(..., description="Bytes retenidos como máximo entre todos los artefactos.")
+    allowedArtifacts: typing.List[str] = pydantic.Field(
+        default_factory=list, description="Artefactos que se retienen; vacío si se retienen todos."
+    )
+    totalBytes: int = pydantic.Field(0, description="Bytes retenidos entre todos los artefactos.")
+    events: int = pydantic.Field(0, description="Eventos retenidos entre todos los artefactos.")
+    lastSequence: int = pydantic.Field(0, description="Última secuencia recibida.")
+    evictedEvents: int = pydantic.Field(0, description="Eventos desalojados por los límites del buffer.")
+    evictedChannels: int = pydantic.Field(0, description="Canales desalojados completos por el límite total.")
+    rejectedEvents: int = pydantic.Field(0, description="Eventos no retenidos por no estar su artefacto permitido.")
+    oversizedEvents: int = pydantic.Field(0, description="Eventos no retenidos por superar el límite de un canal.")
+    channels: typing.List[PipelineEventChannelSchema] = pydantic.Field(
+        default_factory=list, description="Detalle por artefacto, del usado más recientemente al más antiguo."
+    )
@@ -0,0 +1,83 @@
+from fastapi_cache import FastAPICache
+
+from src.config import ENVIRONMENT_CONFIG
+
+from src.modules.auth.guards.token_guard import AUTH_GUARD_METRICS
+from src.modules.auth.services.session_lifecycle_service import SESSION_LIFECYCLE_MANAGER
+from src.modules.v1.hypnosis.services import pipeline_events_stream_service
+from src.modules.v1.hypnosis.services.pipeline_events_ingest_service import PIPELINE_EVENTS_INGESTOR
+from src.modules.v1.shared.utils import cache as cache_utils
+from ..schemas import metrics_schema
+
+
+def getCacheMetrics() -> metrics_schema.CacheMetricsResponseSchema:
+    """Construye el reporte de métricas del cache de respuestas."""
+
+    storage: dict[str, dict[str, int]] = {}
+    backend = FastAPICache.get_backend()
+    if isinstance(backend, cache_utils.InstrumentedInMemoryBackend):
+        storage = backend.storageSnapshot()
+
+    endpoints = [
+        metrics_schema.CacheEndpointMetricsSchema.model_validate(item)
+        for item in cache_utils.CACHE_METRICS.snapshot(storage)
+    ]
+
+    return metrics_schema.CacheMetricsResponseSchema(
+        totalKeys=sum(item.keys for item in endpoints),
+        totalBytesStored=sum(item.bytesStored for item in endpoints),
+        endpoints=endpoints,
+    )
+
+
+async def getSessionStorageMetrics() -> metrics_schema.SessionStorageMetricsSchema:
+    """Construye el reporte de tamaño y purga de la colección de sesiones."""
+
+    stats = await SESSION_LIFECYCLE_MANAGER.getStats()
+    return metrics_schema.SessionStorageMetricsSchema.model_validate(stats)
+
+
+def getAuthGuardMetrics() -> metrics_schema.AuthGuardMetricsResponseSchema:
+    """Construye el reporte de latencias por etapa del guard de autenticación."""
+
+    return metrics_schema.AuthGuardMetricsResponseSchema(
+        enabled=AUTH_GUARD_METRICS.enabled,
+        stages={
+            stage: metrics_schema.LatencySummarySchema.model_validate(summary)
+            for stage, summary in AUTH_GUARD_METRICS.snapshot().items()
+        },
+    )
+
+
+def getPipelineIngestMetrics() -> metrics_schema.PipelineIngestMetricsSchema:
+    """Construye el reporte del consumidor WebSocket de eventos del pipeline."""
+
+    return metrics_schema.PipelineIngestMetricsSchema.model_validate(PIPELINE_EVENTS_INGESTOR.snapshot())
+
+
+def getPipelineWebSocketMetrics() -> metrics_schema.PipelineWebSocketMetricsSchema:
+    """Construye el reporte de las colas de envío del WebSocket de eventos del pipeline."""
+
+    clients = [
+        metrics_schema.PipelineWebSocketClientSchema.model_validate(item)
+        for item in pipeline_events_stream_service.getConnectionsSnapshot()
+    ]
+    return metrics_schema.PipelineWebSocketMetricsSchema(
+        **pipeline_events_stream_service.getConnectionGauges(),
+        slowConsumerPolicy=ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG.PIPELINE_WS_SLOW_CONSUMER_POLICY,
+        queueCapacity=ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG.PIPELINE_WS_SEND_QUEUE_SIZE,
+        maxConnections=ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG.PIPELINE_WS_MAX_CONNECTIONS,
+        maxConnectionsPerHost=ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG.PIPELINE_WS_MAX_CONNECTIONS_PER_HOST,
+        totalQueued=sum(client.queued for client in clients),
+        maxQueued=max((client.queued for client in clients), default=0),
+        totalDropped=sum(client.dropped for client in clients),
+        clients=clients,
+    )
+
+
+def getPipelineEventBufferMetrics() -> metrics_schema.PipelineEventBufferMetricsSchema:
+    """Construye el reporte de ocupación del buffer de replay de eventos del pipeline."""
+
+    return metrics_schema.PipelineEventBufferMetricsSchema.model_validate(
+        pipeline_events_stream_service.getBufferSnapshot()
+    )
@@ -0,0 +1,149 @@
+import time
+import typing
+
+import httpx
+
+from src.config import ENVIRONMENT_CONFIG
+from src.modules.v1.shared.utils.metrics import LatencyHistogram
+from src.modules.v1.shared.utils.resilience import CLOSED, CircuitBreaker, hedgedCall
+
+# Muestras mínimas antes de confiar en el p95 para decidir cuándo duplicar una solicitud.
+_HEDGE_MIN_SAMPLES = 20
+
+
+class HypnosisApi:
+    """Cliente HTTP compartido por el proceso hacia la API de hipnosis.
+
+    Mantiene un pool de conexiones keep-alive con la URL base, el API key y los
+    timeouts de `HypnosisConfig`. Se abre en el lifespan (`open`) y se cierra al
+    apagar (`close`); si se pide antes de abrirlo, se abre de forma perezosa.
+
+    Las llamadas hechas con `get` pasan por un circuit breaker compartido y,
+    si se piden con `hedge=True`, se duplican cuando tardan más que el p95
+    observado para esa operación.
+    """
+
+    def __init__(
+        self,
+        baseUrl: str,
+        apiKey: str,
+        timeout: httpx.Timeout,
+        limits: httpx.Limits,
+        breaker: CircuitBreaker,
+        hedgeEnabled: bool = False,
+        hedgeMinDelaySeconds: float = 0.05,
+        hedgeMaxDelaySeconds: float = 1.0,
+    ):
+        self._baseUrl = baseUrl
+        self._headers = {"x-api-key": apiKey}
+        self._timeout = timeout
+        self._limits = limits
+        self._client: httpx.AsyncClient | None = None
+        self.breaker = breaker
+        self._hedgeEnabled = hedgeEnabled
+        self._hedgeMinDelaySeconds = hedgeMinDelaySeconds
+        self._hedgeMaxDelaySeconds = hedgeMaxDelaySeconds
+        self._latencies: dict[str, LatencyHistogram] = {}
+        self.hedgedRequests = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self._baseUrl,
+                headers=self._headers,
+                timeout=self._timeout,
+                limits=self._limits,
+            )
+        return self._client
+
+    async def open(self) -> None:
+        self.client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get(
+        self,
+        path: str,
+        params: dict[str, typing.Any] | None = None,
+        operation: str | None = None,
+        hedge: bool = False,
+    ) -> httpx.Response:
+        """GET protegido por el circuit breaker.
+
+        Las respuestas 5xx se lanzan como `httpx.HTTPStatusError` y cuentan como
+        fallo; las 4xx se devuelven tal cual.
+
+        Args:
+            operation: Nombre con el que se agrupan las latencias (por defecto, `path`).
+            hedge: Duplica la solicitud si supera el p95 de `operation`. Solo para GET idempotentes.
+
+        Raises:
+            CircuitOpenError: Si el circuito está abierto.
+        """
+        operation = operation or path
+
+        async def attempt() -> httpx.Response:
+            startedAt = time.perf_counter()
+            response = await self.client.get(path, params=params)
+            self._histogram(operation).observe(time.perf_counter() - startedAt)
+            if response.status_code >= 500:
+                response.raise_for_status()
+            return response
+
+        async def guarded() -> httpx.Response:
+            if hedge and self._hedgeEnabled and self.breaker.state == CLOSED:
+                response, hedged = await hedgedCall(attempt, self._hedgeDelaySeconds(operation))
+                if hedged:
+                    self.hedgedRequests += 1
+                return response
+            return await attempt()
+
+        return await self.breaker.call(guarded)
+
+    def _hedgeDelaySeconds(self, operation: str) -> float:
+        histogram = self._latencies.get(operation)
+        if histogram is None or histogram.count < _HEDGE_MIN_SAMPLES:
+            return self._hedgeMaxDelaySeconds
+
+        p95Seconds = (histogram.percentile(0.95) or 0.0) / 1_000.0
+        return min(max(p95Seconds, self._hedgeMinDelaySeconds), self._hedgeMaxDelaySeconds)
+
+    def _histogram(self, operation: str) -> LatencyHistogram:
+        histogram = self._latencies.get(operation)
+        if histogram is None:
+            histogram = self._latencies[operation] = LatencyHistogram()
+        return histogram
+
+
+config = ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG
+
+HYPNOSIS_API_CONNECTION = HypnosisApi(
+    baseUrl=config.HYPNOSIS_API_URL,
+    apiKey=config.HYPNOSIS_API_KEY,
+    timeout=httpx.Timeout(
+        timeout=config.HYPNOSIS_API_TIMEOUT_SECONDS,
+        connect=config.HYPNOSIS_API_CONNECT_TIMEOUT_SECONDS,
+    ),
+    limits=httpx.Limits(
+        max_connections=config.HYPNOSIS_API_MAX_CONNECTIONS,
+        max_keepalive_connections=config.HYPNOSIS_API_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=config.HYPNOSIS_API_KEEPALIVE_EXPIRY_SECONDS,
+    ),
+    breaker=CircuitBreaker(
+        name="hypnosis-api",
+        failureRateThreshold=config.HYPNOSIS_BREAKER_FAILURE_RATE_THRESHOLD,
+        slowCallSeconds=config.HYPNOSIS_BREAKER_SLOW_CALL_SECONDS,
+        slowCallRateThreshold=config.HYPNOSIS_BREAKER_SLOW_CALL_RATE_THRESHOLD,
+        windowSize=config.HYPNOSIS_BREAKER_WINDOW_SIZE,
+        minimumCalls=config.HYPNOSIS_BREAKER_MINIMUM_CALLS,
+        openSeconds=config.HYPNOSIS_BREAKER_OPEN_SECONDS,
+        halfOpenProbes=config.HYPNOSIS_BREAKER_HALF_OPEN_PROBES,
+    ),
+    hedgeEnabled=config.HYPNOSIS_HEDGE_ENABLED,
+    hedgeMinDelaySeconds=config.HYPNOSIS_HEDGE_MIN_DELAY_SECONDS,
+    hedgeMaxDelaySeconds=config.HYPNOSIS_HEDGE_MAX_DELAY_SECONDS,
+)
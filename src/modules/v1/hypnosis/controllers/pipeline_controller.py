@@ -7,6 +7,7 @@ from fastapi import (
     Body,
     Depends,
     Request,
+    Response,
     WebSocket,
     WebSocketDisconnect,
     Query,
@@ -16,32 +17,126 @@ from fastapi import (
     status,
 )
 
+from fastapi.responses import StreamingResponse
+
 from src.config import ENVIRONMENT_CONFIG
+from src.modules.v1.hypnosis.connections.hypnosis_api import HYPNOSIS_API_CONNECTION
 from src.modules.v1.hypnosis.services.pipeline_service import PipelineService
-from src.modules.v1.hypnosis.schemas.pipeline_schema import LoggingEventsResponse, RemainingTasksResponse, LoggingSchema
+from src.modules.v1.hypnosis.schemas.pipeline_schema import (
+    AggregatedRemainingTasksResponse,
+    LoggingEventsResponse,
+    LoggingSchema,
+    QueueDepthHistoryResponse,
+    RemainingTasksResponse,
+)
+from src.modules.v1.shared.utils.cache import cache
 from src.modules.v1.hypnosis.services import pipeline_events_stream_service
+from src.modules.v1.hypnosis.services.pipeline_events_ingest_service import ingestPipelineEvent
+from src.modules.v1.hypnosis.services.queue_depth_service import QUEUE_DEPTH_SAMPLER
 
 router = APIRouter(prefix="/pipeline", tags=["Hypnosis Pipeline"])
 webhookLogger = logging.getLogger("uvicorn").getChild("v1.hypnosis.pipeline.webhook")
 
 def getPipelineService() -> PipelineService:
-    return PipelineService(ENVIRONMENT_CONFIG)
+    return PipelineService(ENVIRONMENT_CONFIG, HYPNOSIS_API_CONNECTION)
 
-@router.get("/logging/events", response_model=LoggingEventsResponse)
+@router.get(
+    "/logging/events",
+    response_model=LoggingEventsResponse,
+    responses={
+        200: {
+            "content": {
+                "application/x-ndjson": {
+                    "schema": {"type": "string", "description": "One LoggingSchema JSON object per line."}
+                }
+            },
+            "description": "JSON document, or NDJSON when `stream=true`.",
+        }
+    },
+)
 async def getLoggingEvents(
     fromDate: int = Query(..., description="Start of the time range (Unix timestamp in seconds)."),
     toDate: int = Query(..., description="End of the time range (Unix timestamp in seconds)."),
     eventType: typing.Annotated[typing.Optional[str], Query(description="Type of logging event to filter by.")] = None,
+    limit: typing.Annotated[
+        typing.Optional[int],
+        Query(ge=1, description="Maximum number of events to return."),
+    ] = None,
+    offset: int = Query(0, ge=0, description="Number of events to skip."),
+    stream: bool = Query(
+        False,
+        description=(
+            "Stream events as NDJSON straight from the upstream response, with flat memory usage. "
+            "Always reads from upstream; the non-streaming mode is served from the local event store."
+        ),
+    ),
+    validate: bool = Query(
+        False,
+        description="When streaming, validate every event against LoggingSchema and drop invalid ones.",
+    ),
     service: PipelineService = Depends(getPipelineService)
 ):
-    return await service.getLoggingEvents(fromDate=fromDate, toDate=toDate, eventType=eventType)
+    if stream:
+        lines = await service.streamLoggingEvents(
+            fromDate=fromDate,
+            toDate=toDate,
+            eventType=eventType,
+            limit=limit,
+            offset=offset,
+            validate=validate,
+        )
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    return await service.getLoggingEvents(
+        fromDate=fromDate,
+        toDate=toDate,
+        eventType=eventType,
+        limit=limit,
+        offset=offset,
+    )
+
+@router.get("/tasks/count-remaining", response_model=AggregatedRemainingTasksResponse)
+@cache(expire=ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG.HYPNOSIS_REMAINING_TASKS_CACHE_SECONDS)
+async def getAllRemainingTasks() -> AggregatedRemainingTasksResponse:
+    """
+    Remaining tasks of every artifact, fetched concurrently with a per-artifact
+    timeout. Artifacts that fail are reported in `errors` instead of failing the
+    whole response. Cached for a few seconds; concurrent misses share one fan-out.
+    """
+    # Sin `Depends`: el servicio no debe formar parte de la clave del cache.
+    return await getPipelineService().getAllRemainingTasks()
+
+@router.get("/tasks/history", response_model=QueueDepthHistoryResponse)
+async def getRemainingTasksHistory(
+    artifact: str = Query(..., description="Artifact identifier (maker, export, decorator, ...)."),
+    window: int = Query(
+        3600,
+        ge=60,
+        le=7 * 24 * 60 * 60,
+        description="Time window to return, in seconds.",
+    ),
+) -> QueueDepthHistoryResponse:
+    """
+    Remaining-tasks samples of an artifact over the window, with the backlog
+    rate and an estimated drain time. Served from the in-process sampler, so
+    the upstream load does not depend on how many clients poll this endpoint.
+    """
+    return QUEUE_DEPTH_SAMPLER.getHistory(artifact, window)
 
 @router.get("/{artifact}/tasks/count-remaining", response_model=RemainingTasksResponse)
 async def getRemainingTasks(
+    response: Response,
     artifact: str = Path(..., description="Artifact identifier (maker, export, decorator)."),
     service: PipelineService = Depends(getPipelineService)
 ):
-    return await service.getRemainingTasks(artifact=artifact)
+    """
+    Remaining tasks of one artifact. While the upstream circuit is open the last
+    known value is served with `stale=true` and a `Warning: 110` header.
+    """
+    remainingTasks = await service.getRemainingTasks(artifact=artifact)
+    if remainingTasks.stale:
+        response.headers["Warning"] = '110 - "Response is Stale"'
+    return remainingTasks
 
 @router.websocket("/logging/ws")
 async def websocketLoggingProxy(
@@ -50,34 +145,125 @@ async def websocketLoggingProxy(
         typing.Optional[str],
         Query(description="Artifact to observe in realtime (omit to receive all events)."),
     ] = None,
+    eventType: typing.Annotated[
+        typing.Optional[list[str]],
+        Query(description="Only receive these event types (repeatable)."),
+    ] = None,
+    userLevel: typing.Annotated[
+        typing.Optional[list[int]],
+        Query(description="Only receive events of these user levels (repeatable)."),
+    ] = None,
+    userLanguage: typing.Annotated[
+        typing.Optional[list[str]],
+        Query(description="Only receive events of these user languages (repeatable)."),
+    ] = None,
+    audioRequestID: typing.Annotated[
+        typing.Optional[list[str]],
+        Query(description="Only receive events of these audio requests (repeatable)."),
+    ] = None,
     skipSnapshot: bool = Query(
         default=False,
         description="Cuando es true, omite el envío inicial de eventos recientes.",
     ),
+    since: typing.Annotated[
+        typing.Optional[int],
+        Query(
+            ge=0,
+            description=(
+                "Last `seq` received before reconnecting: only later events are replayed. "
+                "Falls back to the full snapshot when the buffer no longer covers the gap."
+            ),
+        ),
+    ] = None,
+    epoch: typing.Annotated[
+        typing.Optional[str],
+        Query(
+            max_length=64,
+            description=(
+                "`epoch` of the event whose `seq` is sent in `since`. Sequences restart when the server "
+                "restarts; a missing or different epoch replays the full snapshot instead."
+            ),
+        ),
+    ] = None,
+    batchMs: int = Query(
+        0,
+        ge=0,
+        le=1000,
+        description=(
+            "Opt-in micro-batching: when > 0, messages are sent as JSON array frames grouping up to "
+            "`batchSize` messages within this many milliseconds. The first message after an idle "
+            "period is sent immediately."
+        ),
+    ),
+    batchSize: int = Query(100, ge=1, le=1000, description="Maximum messages per batched frame."),
+    control: bool = Query(
+        False,
+        description=(
+            "Opt into the control protocol: the server also sends `{\"type\": \"ping\"}` frames and, "
+            "with the `gap_notice` slow-consumer policy, `{\"type\": \"gap\", \"dropped\": n}` notices; "
+            "invalid control messages are answered with `{\"type\": \"error\"}` instead of being ignored. "
+            "Sending any valid control message enables it as well."
+        ),
+    ),
 ):
-    filterKey = pipeline_events_stream_service.normalizeArtifactFilter(artifact)
-    await websocket.accept()
-    await pipeline_events_stream_service.registerConnection(filterKey, websocket)
+    """
+    Realtime pipeline events matching the subscription filters. Filters can be
+    replaced mid-connection by sending
+    `{"type": "subscribe", "filters": {...}, "since": <seq>, "epoch": <epoch>}`.
+
+    Without `control=true` only events are sent until the client sends a valid
+    control message. Clients on the control protocol receive `{"type": "ping"}`
+    periodically; those that answer with `{"type": "pong"}` are closed with 1001
+    once a pong is overdue. Dead peers are detected by protocol-level pings.
+    Connections over the global or per-IP limit are rejected with 1013.
+    """
+    filters = pipeline_events_stream_service.parseSubscriptionFilters(
+        {
+            "artifact": artifact,
+            "eventType": eventType,
+            "userLevel": userLevel,
+            "userLanguage": userLanguage,
+            "audioRequestID": audioRequestID,
+        }
+    )
+    # Con FORWARDED_ALLOW_IPS configurado, uvicorn ya reemplazó el peer por la IP de X-Forwarded-For.
+    host = websocket.client.host if websocket.client else "unknown"
+    if not pipeline_events_stream_service.acquireConnectionSlot(host):
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Too many connections")
+        return
 
-    if not skipSnapshot:
-        snapshot = await pipeline_events_stream_service.snapshotEvents(filterKey)
-        for item in snapshot:
-            await websocket.send_json(item.model_dump(mode="json", by_alias=True, round_trip=True))
+    try:
+        await websocket.accept()
+        connection = await pipeline_events_stream_service.registerConnection(
+            filters,
+            websocket,
+            includeSnapshot=not skipSnapshot or since is not None,
+            since=since,
+            epoch=epoch,
+            batchSeconds=batchMs / 1000,
+            batchSize=batchSize,
+            host=host,
+            controlProtocol=control,
+        )
+    except BaseException:
+        pipeline_events_stream_service.releaseConnectionSlot(host)
+        raise
 
     try:
         while True:
-            await websocket.receive_text()
+            message = await websocket.receive_text()
+            await pipeline_events_stream_service.handleControlMessage(connection, message)
     except WebSocketDisconnect:
         logging.getLogger("uvicorn").getChild("v1.hypnosis.pipeline.ws").info(
             "Client disconnected from logging websocket",
         )
-        await pipeline_events_stream_service.removeConnection(filterKey, websocket)
     except Exception:
         logging.getLogger("uvicorn").getChild("v1.hypnosis.pipeline.ws").exception(
             "Unexpected error in websocket connection",
         )
-        await pipeline_events_stream_service.removeConnection(filterKey, websocket)
         raise
+    finally:
+        await pipeline_events_stream_service.removeConnection(connection)
 
 
 @router.post(
@@ -126,5 +312,6 @@ async def receiveLoggingEventWebhook(
         event.eventType,
         event.audioRequestID,
     )
-    await pipeline_events_stream_service.dispatchRealtimeEvent(event)
+    if not await ingestPipelineEvent(event):
+        return {"message": "Duplicate webhook event ignored"}
     return {"message": "Webhook event accepted"}
@@ -1,4 +1,8 @@
 from .hypnosis_repository import (
     HypnosisRepository as HypnosisRepository,
     HYPNOSIS_REPOSITORY as HYPNOSIS_REPOSITORY,
-)
\ No newline at end of file
+)
+from .pipeline_events_repository import (
+    PipelineEventsRepository as PipelineEventsRepository,
+    PIPELINE_EVENTS_REPOSITORY as PIPELINE_EVENTS_REPOSITORY,
+)
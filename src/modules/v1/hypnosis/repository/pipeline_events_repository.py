@@ -0,0 +1,151 @@
+import logging
+import typing
+
+import pydantic_mongo
+import pymongo
+import pymongo.errors
+
+from src.config import ENVIRONMENT_CONFIG
+from src.modules.v1.shared.utils import dates as dates_utils
+from ..schemas import pipeline_schema
+from .hypnosis_repository import HYPNOSIS_MONGO_CLIENT
+
+LOGGER = logging.getLogger("uvicorn").getChild("v1.hypnosis.repository.pipeline_events")
+
+_TIME_FIELD = "eventAt"
+_META_FIELD = "meta"
+
+# Campos de almacenamiento que no forman parte de LoggingSchema.
+_STORAGE_PROJECTION = {"_id": 0, _TIME_FIELD: 0, _META_FIELD: 0}
+
+
+class PipelineEventsRepository(
+    pydantic_mongo.AsyncAbstractRepository[pipeline_schema.LoggingSchema]
+):
+    """Eventos del pipeline en una colección time-series de Mongo.
+
+    Cada documento guarda el evento tal como llegó más `eventAt` (campo de
+    tiempo) y `meta.artifact` / `meta.eventType` (campo de metadatos), que es por
+    lo que Mongo agrupa los buckets.
+
+    Aparte, una colección normal guarda las ventanas de cobertura: los tramos
+    en que un escritor estuvo activo y persistió todo lo que recibió. Fuera de
+    ellas el almacén no es confiable y hay que consultar el upstream.
+    """
+
+    class Meta:
+        collection_name = ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG.PIPELINE_EVENTS_COLLECTION_NAME
+
+    async def ensureCollection(self, retentionSeconds: int) -> None:
+        """Crea la colección time-series (si no existe), sus índices secundarios y los de la cobertura."""
+        collection = self.get_collection()
+        try:
+            await collection.database.create_collection(
+                collection.name,
+                timeseries={
+                    "timeField": _TIME_FIELD,
+                    "metaField": _META_FIELD,
+                    "granularity": "seconds",
+                },
+                expireAfterSeconds=retentionSeconds,
+            )
+        except pymongo.errors.CollectionInvalid:
+            pass
+
+        await collection.create_indexes(
+            [
+                pymongo.IndexModel(
+                    [(f"{_META_FIELD}.artifact", pymongo.ASCENDING), (_TIME_FIELD, pymongo.DESCENDING)],
+                    name="artifact_eventAt",
+                ),
+                pymongo.IndexModel(
+                    [(f"{_META_FIELD}.eventType", pymongo.ASCENDING), (_TIME_FIELD, pymongo.DESCENDING)],
+                    name="eventType_eventAt",
+                ),
+                pymongo.IndexModel(
+                    [("audioRequestID", pymongo.ASCENDING), (_TIME_FIELD, pymongo.DESCENDING)],
+                    name="audioRequestID_eventAt",
+                ),
+            ]
+        )
+        # Las ventanas de cobertura se purgan junto con los eventos que describen.
+        await self._coverageCollection().create_indexes(
+            [
+                pymongo.IndexModel([("end", pymongo.ASCENDING)], name="end_ttl", expireAfterSeconds=retentionSeconds),
+                pymongo.IndexModel([("start", pymongo.ASCENDING), ("end", pymongo.ASCENDING)], name="start_end"),
+            ]
+        )
+
+    async def insertEvents(self, events: typing.Sequence[pipeline_schema.LoggingSchema]) -> int:
+        if not events:
+            return 0
+
+        documents = [_toDocument(event) for event in events]
+        result = await self.get_collection().insert_many(documents, ordered=False)
+        return len(result.inserted_ids)
+
+    async def findEvents(
+        self,
+        fromDate: int,
+        toDate: int,
+        eventType: str | None = None,
+    ) -> list[dict[str, typing.Any]]:
+        """Eventos en el rango `[fromDate, toDate]` (segundos), en orden cronológico."""
+        query: dict[str, typing.Any] = {
+            _TIME_FIELD: {
+                "$gte": dates_utils.timestampToDatetime(fromDate),
+                "$lte": dates_utils.timestampToDatetime(toDate),
+            }
+        }
+        if eventType is not None:
+            query[f"{_META_FIELD}.eventType"] = eventType
+
+        cursor = (
+            self.get_collection()
+            .find(query, _STORAGE_PROJECTION)
+            .sort(_TIME_FIELD, pymongo.ASCENDING)
+        )
+        return await cursor.to_list(length=None)
+
+    async def markCoverage(self, windowId: str, start: float, end: float) -> None:
+        """Registra (o extiende) la ventana `[start, end]` en que el escritor `windowId` persistió todo lo recibido."""
+        await self._coverageCollection().update_one(
+            {"_id": windowId},
+            {
+                "$setOnInsert": {"start": dates_utils.timestampToDatetime(start)},
+                "$max": {"end": dates_utils.timestampToDatetime(end)},
+            },
+            upsert=True,
+        )
+
+    async def findCoverage(self, fromDate: int, toDate: int) -> list[tuple[float, float]]:
+        """Ventanas de cobertura que se solapan con `[fromDate, toDate]`, como timestamps `(start, end)`."""
+        cursor = self._coverageCollection().find(
+            {
+                "start": {"$lte": dates_utils.timestampToDatetime(toDate)},
+                "end": {"$gte": dates_utils.timestampToDatetime(fromDate)},
+            },
+            {"_id": 0, "start": 1, "end": 1},
+        )
+        return [
+            (dates_utils.datetimeToTimestamp(document["start"]), dates_utils.datetimeToTimestamp(document["end"]))
+            for document in await cursor.to_list(length=None)
+        ]
+
+    def _coverageCollection(self):
+        return self.get_collection().database[ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG.PIPELINE_EVENTS_COVERAGE_COLLECTION_NAME]
+
+
+def _toDocument(event: pipeline_schema.LoggingSchema) -> dict[str, typing.Any]:
+    document = event.model_dump(mode="json", by_alias=True)
+    document[_TIME_FIELD] = dates_utils.timestampToDatetime(event.timestamp)
+    document[_META_FIELD] = {
+        "artifact": (event.receivedArtifact or "UNKNOWN").upper(),
+        "eventType": event.eventType,
+    }
+    return document
+
+
+PIPELINE_EVENTS_REPOSITORY = PipelineEventsRepository(
+    database=HYPNOSIS_MONGO_CLIENT[ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG.HYPNOSIS_DATABASE_NAME]
+)
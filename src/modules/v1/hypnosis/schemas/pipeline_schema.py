@@ -73,3 +73,57 @@ class RemainingTasksResponse(pydantic.BaseModel):
     queues: Dict[str, QueueCount] = pydantic.Field(
         ..., description="Breakdown per logical queue key."
     )
+    stale: bool = pydantic.Field(
+        False,
+        description="True when served from the last known value because the upstream circuit is open.",
+    )
+
+
+class QueueDepthSample(pydantic.BaseModel):
+    timestamp: float = pydantic.Field(..., description="Unix timestamp of the sample (seconds).")
+    total: int = pydantic.Field(..., description="Pending tasks of the artifact at that moment.", ge=0)
+
+
+class QueueDepthTrend(pydantic.BaseModel):
+    current: Optional[int] = pydantic.Field(
+        None, description="Latest sampled value within the window."
+    )
+    ratePerMinute: Optional[float] = pydantic.Field(
+        None,
+        description="Least-squares slope over the window, in tasks per minute. Negative means the backlog is draining.",
+    )
+    drainSeconds: Optional[float] = pydantic.Field(
+        None, description="Estimated seconds until empty at the current rate. Null when not draining."
+    )
+
+
+class QueueDepthHistoryResponse(QueueDepthTrend):
+    artifact: str = pydantic.Field(..., description="Artifact identifier.")
+    windowSeconds: int = pydantic.Field(..., description="Requested window, in seconds.")
+    intervalSeconds: float = pydantic.Field(..., description="Sampling interval, in seconds.")
+    samples: List[QueueDepthSample] = pydantic.Field(
+        default_factory=list, description="Samples within the window, oldest first."
+    )
+    queues: Dict[str, QueueDepthTrend] = pydantic.Field(
+        default_factory=dict, description="Trend per logical queue key (messages)."
+    )
+
+
+class AggregatedRemainingTasksResponse(pydantic.BaseModel):
+    total: int = pydantic.Field(
+        0, description="Total pending tasks across every artifact that answered.", ge=0
+    )
+    artifacts: Dict[str, RemainingTasksResponse] = pydantic.Field(
+        default_factory=dict, description="Remaining tasks per artifact that answered in time."
+    )
+    errors: Dict[str, str] = pydantic.Field(
+        default_factory=dict,
+        description="Artifacts that failed or timed out, with the reason. Empty when the result is complete.",
+    )
+    staleArtifacts: List[str] = pydantic.Field(
+        default_factory=list,
+        description="Artifacts served from the last known value because the upstream circuit is open.",
+    )
+    partial: bool = pydantic.Field(
+        False, description="True when at least one artifact is missing from `artifacts` or is stale."
+    )
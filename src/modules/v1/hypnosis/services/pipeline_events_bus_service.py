@@ -0,0 +1,252 @@
+import asyncio
+import itertools
+import logging
+import random
+import typing
+import uuid
+
+try:  # redis llega como dependencia de fastapi-guard; solo se usa con el backend `redis`.
+    import redis.asyncio as redis_asyncio
+except ImportError:  # pragma: no cover - depende del entorno
+    redis_asyncio = None
+
+LOGGER = logging.getLogger("uvicorn").getChild("v1.hypnosis.services.pipeline_events_bus")
+
+
+# XADD con un número de secuencia global tomado con INCR, en una sola ida y vuelta atómica.
+# Si el evento trae id y otro worker ya lo publicó (SET NX falla), devuelve 0 sin publicar.
+_PUBLISH_SCRIPT = """
+if ARGV[9] ~= '' and not redis.call('SET', KEYS[3], '1', 'NX', 'PX', ARGV[10]) then
+    return 0
+end
+local seq = redis.call('INCR', KEYS[2])
+redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[1], '*',
+    'seq', seq, 'artifact', ARGV[2], 'timestamp', ARGV[3], 'event', ARGV[4],
+    'eventType', ARGV[5], 'userLevel', ARGV[6], 'userLanguage', ARGV[7], 'audioRequestID', ARGV[8])
+return seq
+"""
+
+
+class EventKeys(typing.NamedTuple):
+    """Campos del evento por los que se pueden filtrar las suscripciones, como texto."""
+
+    eventType: str | None = None
+    userLevel: str | None = None
+    userLanguage: str | None = None
+    audioRequestID: str | None = None
+
+
+class EventRecord(typing.NamedTuple):
+    """Evento ya serializado: se codifica una vez al llegar y se reenvía tal cual a todos.
+
+    `text` incluye `seq` y `epoch` como primeras claves, para que los clientes
+    puedan reanudar con `?since=&epoch=`. `seq` es None solo en eventos
+    entregados sin pasar por el bus (Redis caído), que no se guardan para replay.
+    """
+
+    seq: int | None
+    artifact: str
+    timestamp: int
+    keys: EventKeys
+    text: str
+
+
+def buildEventRecord(
+    seq: int | None,
+    epoch: str,
+    artifact: str,
+    timestamp: int,
+    keys: EventKeys,
+    eventJson: str,
+) -> EventRecord:
+    """Antepone `"seq"` y `"epoch"` al objeto JSON del evento sin volver a serializarlo."""
+    text = eventJson if seq is None else f'{{"seq":{seq},"epoch":"{epoch}",{eventJson[1:]}'
+    return EventRecord(seq, artifact, timestamp, keys, text)
+
+
+# Recibe (registro, broadcast). Con broadcast=False solo se guarda en el buffer local.
+DeliverCallback = typing.Callable[[EventRecord, bool], None]
+
+
+class LocalEventBus:
+    """Bus de un solo proceso: lo publicado se entrega directamente a los sockets locales.
+
+    La secuencia es del proceso y vuelve a empezar al reiniciarlo; por eso cada
+    proceso tiene su propio `epoch`, y un `since` de otro epoch no se reanuda.
+    """
+
+    def __init__(self, deliver: DeliverCallback) -> None:
+        self._deliver = deliver
+        self._sequence = itertools.count(1)
+        self.epoch = uuid.uuid4().hex[:12]
+
+    async def publish(
+        self,
+        artifact: str,
+        timestamp: int,
+        keys: EventKeys,
+        eventJson: str,
+        eventId: str | None = None,
+    ) -> bool:
+        """Entrega el evento; siempre True, los repetidos ya se descartan por proceso antes de publicar."""
+        self._deliver(buildEventRecord(next(self._sequence), self.epoch, artifact, timestamp, keys, eventJson), True)
+        return True
+
+    async def start(self) -> None:
+        return None
+
+    async def stop(self) -> None:
+        return None
+
+
+class RedisEventBus:
+    """Bus compartido entre workers y réplicas sobre un stream de Redis acotado.
+
+    Cada worker publica con `XADD ... MAXLEN ~ maxLength` (con una secuencia
+    global tomada con `INCR` en el mismo script) y no entrega localmente. Una tarea de fondo lee el stream con `XREAD BLOCK` y entrega
+    cada evento a sus sockets, incluidos los que publicó él mismo. Así todos los
+    workers ven los eventos en el mismo orden.
+
+    Al iniciar, la cola del stream carga el buffer local: es el snapshot
+    compartido. El `epoch` de la secuencia se guarda en Redis junto al contador
+    y lo comparten todos los workers; solo cambia si Redis pierde ambos. Al reconectar, la lectura sigue desde el último id entregado,
+    así que no se pierden eventos mientras sigan en el stream.
+
+    Los eventos con id se publican una sola vez entre todos los workers: el
+    script guarda el id con `SET NX PX dedupeTtlMilliseconds` y descarta los
+    que ya estaban. Así, aunque cada worker consuma el WebSocket del upstream
+    o reciba el mismo webhook, solo uno publica y persiste cada evento.
+
+    Si Redis no responde al publicar, el evento se entrega solo localmente.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        stream: str,
+        maxLength: int,
+        deliver: DeliverCallback,
+        dedupeTtlSeconds: int = 600,
+        readCount: int = 500,
+        blockMilliseconds: int = 5_000,
+        reconnectMaxSeconds: float = 30.0,
+    ) -> None:
+        if redis_asyncio is None:
+            raise RuntimeError("El backend `redis` del bus de eventos requiere el paquete `redis`")
+
+        self._redis = redis_asyncio.from_url(url, decode_responses=True)
+        self._publishScript = self._redis.register_script(_PUBLISH_SCRIPT)
+        self._stream = stream
+        self._maxLength = maxLength
+        self._dedupeTtlMilliseconds = dedupeTtlSeconds * 1_000
+        self._deliver = deliver
+        self._readCount = readCount
+        self._blockMilliseconds = blockMilliseconds
+        self._reconnectMaxSeconds = reconnectMaxSeconds
+        self._lastId: str | None = None
+        self.epoch = ""
+        self._runner: asyncio.Task[None] | None = None
+
+    async def publish(
+        self,
+        artifact: str,
+        timestamp: int,
+        keys: EventKeys,
+        eventJson: str,
+        eventId: str | None = None,
+    ) -> bool:
+        """Publica el evento en el stream; devuelve False si otro worker ya publicó ese id."""
+        try:
+            seq = await self._publishScript(
+                keys=[self._stream, f"{self._stream}:seq", f"{self._stream}:id:{eventId or ''}"],
+                args=[
+                    self._maxLength,
+                    artifact,
+                    timestamp,
+                    eventJson,
+                    *(value or "" for value in keys),
+                    eventId or "",
+                    self._dedupeTtlMilliseconds,
+                ],
+            )
+        except Exception:
+            LOGGER.exception("No se pudo publicar el evento en Redis; se entrega solo en este worker")
+            self._deliver(buildEventRecord(None, self.epoch, artifact, timestamp, keys, eventJson), True)
+            return True
+
+        return bool(seq)
+
+    async def start(self) -> None:
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run(), name="pipeline-events-bus")
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+
+        await self._redis.aclose()
+
+    async def _run(self) -> None:
+        attempt = 0
+        while True:
+            try:
+                if self._lastId is None:
+                    await self._loadEpoch()
+                    await self._loadSnapshot()
+                attempt = 0
+                await self._relay()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                delay = min(self._reconnectMaxSeconds, 0.5 * 2**attempt)
+                attempt += 1
+                LOGGER.warning("Bus de eventos en Redis no disponible (%s); reintento en %.1fs", e, delay)
+                await asyncio.sleep(random.uniform(delay / 2, delay))
+
+    async def _loadEpoch(self) -> None:
+        key = f"{self._stream}:epoch"
+        await self._redis.set(key, uuid.uuid4().hex[:12], nx=True)
+        self.epoch = await self._redis.get(key)
+
+    async def _loadSnapshot(self) -> None:
+        entries = await self._redis.xrevrange(self._stream, count=self._maxLength)
+        for entryId, fields in reversed(entries):
+            self._deliverEntry(entryId, fields, broadcast=False)
+        self._lastId = entries[0][0] if entries else "0-0"
+
+    async def _relay(self) -> None:
+        while True:
+            response = await self._redis.xread(
+                {self._stream: self._lastId},
+                count=self._readCount,
+                block=self._blockMilliseconds,
+            )
+            for _, entries in response or ():
+                for entryId, fields in entries:
+                    self._deliverEntry(entryId, fields, broadcast=True)
+
+    def _deliverEntry(self, entryId: str, fields: dict[str, str], broadcast: bool) -> None:
+        self._lastId = entryId
+        try:
+            record = buildEventRecord(
+                int(fields["seq"]),
+                self.epoch,
+                fields["artifact"],
+                int(fields["timestamp"]),
+                EventKeys(*(fields.get(name) or None for name in EventKeys._fields)),
+                fields["event"],
+            )
+            self._deliver(record, broadcast)
+        except (KeyError, ValueError):
+            LOGGER.warning("Entrada %s inválida en el stream de eventos; se omite", entryId)
+
+
+EventBus = LocalEventBus | RedisEventBus
+
+
+__all__ = ["DeliverCallback", "EventBus", "EventKeys", "EventRecord", "LocalEventBus", "RedisEventBus", "buildEventRecord"]
@@ -0,0 +1,199 @@
+import asyncio
+import collections
+import json
+import logging
+import random
+import typing
+import urllib.parse
+
+import pydantic
+import websockets
+from websockets.asyncio.client import connect
+
+from src.config import ENVIRONMENT_CONFIG
+from ..schemas.pipeline_schema import LoggingSchema
+from . import pipeline_events_stream_service
+from .pipeline_events_store_service import PIPELINE_EVENTS_WRITER, PipelineEventsWriter
+
+LOGGER = logging.getLogger("uvicorn").getChild("v1.hypnosis.services.pipeline_events_ingest")
+
+# Parámetro con el que se pide al upstream reanudar después del último evento recibido.
+_RESUME_PARAM = "lastEventId"
+
+
+class RecentEventIds:
+    """Ventana acotada de ids de eventos ya aceptados en el proceso.
+
+    La comparten el webhook y el WebSocket: un evento que llega por ambos
+    caminos, o que el upstream reenvía al reconectar, se acepta una sola vez.
+    """
+
+    def __init__(self, size: int) -> None:
+        self._size = size
+        self._ids: collections.OrderedDict[str, None] = collections.OrderedDict()
+
+    def add(self, eventId: str) -> bool:
+        """Registra `eventId`; devuelve False si ya estaba en la ventana."""
+        if eventId in self._ids:
+            return False
+        if self._size:
+            self._ids[eventId] = None
+            if len(self._ids) > self._size:
+                self._ids.popitem(last=False)
+        return True
+
+
+class PipelineEventsIngestor:
+    """Consumidor de los eventos del pipeline por un WebSocket persistente con la API de hipnosis.
+
+    Reemplaza el costo por evento del webhook (una solicitud HTTP completa con
+    su firma) por un único socket. Cada evento recibido pasa por
+    `ingestPipelineEvent`, igual que los del webhook.
+
+    Si la conexión se cae, reconecta con backoff exponencial con jitter y pide
+    reanudar desde el último id visto; lo que el upstream reenvíe se descarta
+    por id.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        apiKey: str,
+        writer: PipelineEventsWriter,
+        enabled: bool,
+        reconnectMinSeconds: float,
+        reconnectMaxSeconds: float,
+    ) -> None:
+        self._url = url
+        self._headers = {"x-api-key": apiKey}
+        self._writer = writer
+        self.enabled = enabled
+        self._reconnectMinSeconds = reconnectMinSeconds
+        self._reconnectMaxSeconds = reconnectMaxSeconds
+        self._runner: asyncio.Task[None] | None = None
+        self.lastEventId: str | None = None
+        self.connected = False
+        self.reconnects = 0
+        self.received = 0
+        self.duplicates = 0
+        self.invalid = 0
+
+    async def start(self) -> None:
+        if not self.enabled:
+            return
+
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run(), name="pipeline-events-ingestor")
+
+    async def stop(self) -> None:
+        if self._runner is None:
+            return
+
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        self._runner = None
+        self.connected = False
+
+    async def _run(self) -> None:
+        attempt = 0
+        while True:
+            try:
+                async with connect(self._resumeUrl(), additional_headers=self._headers) as websocket:
+                    LOGGER.info("WebSocket de eventos del pipeline conectado (lastEventId=%s)", self.lastEventId)
+                    self.connected = True
+                    attempt = 0
+                    async for message in websocket:
+                        await self._handleMessage(message)
+            except asyncio.CancelledError:
+                raise
+            except (websockets.exceptions.WebSocketException, OSError, asyncio.TimeoutError) as e:
+                LOGGER.warning("WebSocket de eventos del pipeline desconectado: %s", e)
+            except Exception:
+                LOGGER.exception("Error inesperado en el WebSocket de eventos del pipeline")
+            finally:
+                self.connected = False
+
+            delay = min(self._reconnectMaxSeconds, self._reconnectMinSeconds * 2**attempt)
+            attempt += 1
+            self.reconnects += 1
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+
+    async def _handleMessage(self, message: str | bytes) -> None:
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            self.invalid += 1
+            LOGGER.warning("Mensaje no JSON en el WebSocket de eventos del pipeline")
+            return
+
+        # El upstream puede enviar un evento por frame o un arreglo de eventos.
+        for item in payload if isinstance(payload, list) else (payload,):
+            try:
+                event = LoggingSchema.model_validate(item)
+            except pydantic.ValidationError:
+                self.invalid += 1
+                continue
+
+            if event.id is not None:
+                self.lastEventId = event.id
+
+            if await ingestPipelineEvent(event, self._writer):
+                self.received += 1
+            else:
+                self.duplicates += 1
+
+    def _resumeUrl(self) -> str:
+        if self.lastEventId is None:
+            return self._url
+
+        separator = "&" if urllib.parse.urlsplit(self._url).query else "?"
+        return f"{self._url}{separator}{urllib.parse.urlencode({_RESUME_PARAM: self.lastEventId})}"
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        return {
+            "enabled": self.enabled,
+            "connected": self.connected,
+            "lastEventId": self.lastEventId,
+            "reconnects": self.reconnects,
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+        }
+
+
+config = ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG
+
+RECENT_EVENT_IDS = RecentEventIds(config.HYPNOSIS_WS_DEDUPE_WINDOW)
+
+
+async def ingestPipelineEvent(event: LoggingSchema, writer: PipelineEventsWriter = PIPELINE_EVENTS_WRITER) -> bool:
+    """Despacha y persiste un evento llegado por webhook o por WebSocket.
+
+    Devuelve False, sin hacer nada, si el id ya se aceptó por cualquiera de
+    los dos caminos en este proceso o, con el bus en Redis, en otro worker.
+    Solo persiste el worker cuya publicación fue aceptada. Los eventos sin id
+    no se pueden deduplicar.
+    """
+    if event.id is not None and not RECENT_EVENT_IDS.add(event.id):
+        return False
+    if not await pipeline_events_stream_service.dispatchRealtimeEvent(event):
+        return False
+
+    writer.record(event)
+    return True
+
+
+PIPELINE_EVENTS_INGESTOR = PipelineEventsIngestor(
+    url=config.HYPNOSIS_WS_URL.rstrip("/") + config.HYPNOSIS_WS_EVENTS_PATH,
+    apiKey=config.HYPNOSIS_API_KEY,
+    writer=PIPELINE_EVENTS_WRITER,
+    enabled=config.HYPNOSIS_WS_INGEST_ENABLED,
+    reconnectMinSeconds=config.HYPNOSIS_WS_RECONNECT_MIN_SECONDS,
+    reconnectMaxSeconds=config.HYPNOSIS_WS_RECONNECT_MAX_SECONDS,
+)
+
+
+__all__ = ["PIPELINE_EVENTS_INGESTOR", "RECENT_EVENT_IDS", "PipelineEventsIngestor", "RecentEventIds", "ingestPipelineEvent"]
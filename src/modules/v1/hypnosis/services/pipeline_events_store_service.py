@@ -0,0 +1,171 @@
+import asyncio
+import collections
+import logging
+import time
+import uuid
+
+from src.config import ENVIRONMENT_CONFIG
+from ..repository import pipeline_events_repository
+from ..schemas.pipeline_schema import LoggingSchema
+
+LOGGER = logging.getLogger("uvicorn").getChild("v1.hypnosis.services.pipeline_events_store")
+
+
+class PipelineEventsWriter:
+    """Escritor por lotes de los eventos del pipeline hacia la colección time-series.
+
+    El webhook solo encola el evento (sin I/O); una tarea de fondo los inserta
+    con un único `insert_many` cada `flushIntervalSeconds` o al acumular
+    `batchSize`. Si Mongo no responde, los eventos esperan en memoria hasta
+    `maxPending` y luego se descartan los más antiguos.
+
+    Tras cada inserción exitosa extiende su ventana de cobertura hasta el
+    momento en que se tomó el lote: todo lo recibido antes ya está en Mongo.
+    Si se descartan eventos, la ventana se cierra y se abre otra nueva, para
+    que el hueco se consulte al upstream.
+    """
+
+    def __init__(
+        self,
+        repository: pipeline_events_repository.PipelineEventsRepository,
+        enabled: bool,
+        retentionSeconds: int,
+        flushIntervalSeconds: float,
+        batchSize: int,
+        maxPending: int,
+    ) -> None:
+        self._repository = repository
+        self.enabled = enabled
+        self._retentionSeconds = retentionSeconds
+        self._flushIntervalSeconds = flushIntervalSeconds
+        self._batchSize = batchSize
+        self._pending: collections.deque[LoggingSchema] = collections.deque(maxlen=maxPending)
+        self._flushRequested = asyncio.Event()
+        self._runner: asyncio.Task[None] | None = None
+        self.ready = False
+        self.dropped = 0
+        self._windowId: str | None = None
+        self._windowStart = 0.0
+        self._coveredUntil = 0.0
+
+    @property
+    def pendingCount(self) -> int:
+        return len(self._pending)
+
+    def record(self, event: LoggingSchema) -> None:
+        """Encola un evento para persistirlo; no hace I/O."""
+        if not self.enabled:
+            return
+
+        if len(self._pending) == self._pending.maxlen:
+            self._drop(1)
+        self._pending.append(event)
+
+        if len(self._pending) >= self._batchSize:
+            self._flushRequested.set()
+
+    async def flush(self) -> int:
+        """Inserta los eventos pendientes. Devuelve cuántos se enviaron."""
+        takenAt = time.time()
+        if not self._pending:
+            self._coveredUntil = max(self._coveredUntil, takenAt)
+            return 0
+
+        batch = list(self._pending)
+        self._pending.clear()
+        try:
+            await self._repository.insertEvents(batch)
+        except asyncio.CancelledError:
+            # `stop()` canceló una inserción en curso: el lote vuelve a la cola para el volcado final.
+            self._restore(batch)
+            raise
+        except Exception:
+            LOGGER.exception("No se pudieron insertar %s eventos del pipeline; se reintentará", len(batch))
+            self._restore(batch)
+            return 0
+
+        # Si se abrió una ventana nueva durante la inserción, no se retrocede su inicio.
+        self._coveredUntil = max(self._coveredUntil, takenAt)
+        return len(batch)
+
+    def _restore(self, batch: list[LoggingSchema]) -> None:
+        """Reincorpora un lote delante de lo recibido mientras tanto, respetando el tope."""
+        room = self._pending.maxlen - len(self._pending)
+        if room > 0:
+            self._pending.extendleft(reversed(batch[-room:]))
+        self._drop(max(len(batch) - room, 0))
+
+    def _drop(self, count: int) -> None:
+        if count <= 0:
+            return
+        self.dropped += count
+        # Lo descartado rompe la cobertura: la ventana siguiente empieza después del hueco.
+        self._openWindow()
+
+    def _openWindow(self) -> None:
+        self._windowId = uuid.uuid4().hex
+        self._windowStart = self._coveredUntil = time.time()
+
+    async def markCoverage(self) -> None:
+        """Persiste la ventana de cobertura actual; un fallo solo deja la ventana sin extender."""
+        if self._windowId is None or not self.ready:
+            return
+        try:
+            await self._repository.markCoverage(self._windowId, self._windowStart, self._coveredUntil)
+        except Exception:
+            LOGGER.exception("No se pudo registrar la cobertura del almacén de eventos del pipeline")
+
+    async def start(self) -> None:
+        if not self.enabled:
+            return
+
+        try:
+            await self._repository.ensureCollection(self._retentionSeconds)
+            self.ready = True
+        except Exception:
+            LOGGER.exception("No se pudo preparar la colección de eventos del pipeline")
+
+        self._openWindow()
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run(), name="pipeline-events-writer")
+
+    async def stop(self) -> None:
+        """Detiene la tarea de fondo e inserta lo pendiente (llamar en el shutdown)."""
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+
+        await self.flush()
+        await self.markCoverage()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flushRequested.wait(), timeout=self._flushIntervalSeconds)
+            except asyncio.TimeoutError:
+                pass
+
+            self._flushRequested.clear()
+            flushed = await self.flush()
+            await self.markCoverage()
+            if flushed == 0 and self._pending:
+                await asyncio.sleep(self._flushIntervalSeconds)
+
+
+config = ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG
+
+PIPELINE_EVENTS_WRITER = PipelineEventsWriter(
+    repository=pipeline_events_repository.PIPELINE_EVENTS_REPOSITORY,
+    enabled=config.PIPELINE_EVENTS_STORE_ENABLED,
+    retentionSeconds=config.PIPELINE_EVENTS_RETENTION_SECONDS,
+    flushIntervalSeconds=config.PIPELINE_EVENTS_FLUSH_INTERVAL_SECONDS,
+    batchSize=config.PIPELINE_EVENTS_FLUSH_BATCH_SIZE,
+    maxPending=config.PIPELINE_EVENTS_MAX_PENDING,
+)
+
+
+__all__ = ["PIPELINE_EVENTS_WRITER", "PipelineEventsWriter"]
@@ -1,23 +1,459 @@
 import asyncio
+import itertools
+import json
 import logging
+import math
+import sys
+import time
 import typing
-from collections import defaultdict, deque
+from collections import Counter, OrderedDict, defaultdict, deque
 
 import fastapi
+from starlette.websockets import WebSocketState
 
+from src.config import ENVIRONMENT_CONFIG
 from ..schemas.pipeline_schema import LoggingSchema
+from .pipeline_events_bus_service import EventBus, EventKeys, EventRecord, LocalEventBus, RedisEventBus
 
 LOGGER = logging.getLogger("uvicorn").getChild("v1.hypnosis.pipeline.events")
 
-_EVENT_BUFFER_MAX_LENGTH = 50
 _ALL_ARTIFACT_KEY = "ALL"
 
-_eventBuffer: dict[str, deque[LoggingSchema]] = defaultdict(
-    lambda: deque(maxlen=_EVENT_BUFFER_MAX_LENGTH),
+DROP_OLDEST = "drop_oldest"
+GAP_NOTICE = "gap_notice"
+DISCONNECT = "disconnect"
+
+# Código de cierre "Try Again Later" para los clientes desconectados por lentos.
+_SLOW_CONSUMER_CLOSE_CODE = 1013
+# Código de cierre "Going Away" para las conexiones cerradas por el heartbeat o al apagar.
+_GOING_AWAY_CLOSE_CODE = 1001
+# Espera máxima del frame de cierre: en un socket muerto nunca se completa.
+_CLOSE_TIMEOUT_SECONDS = 5.0
+
+# Dimensiones por las que se puede filtrar una suscripción, de la más a la
+# menos selectiva: cada conexión se indexa solo por la primera que restringe.
+FILTER_DIMENSIONS = ("audioRequestID", "eventType", "userLanguage", "userLevel", "artifact")
+
+SubscriptionFilters = dict[str, frozenset[str]]
+
+class ArtifactChannel:
+    """Secuencias retenidas de un artefacto y los bytes que ocupan sus eventos."""
+
+    __slots__ = ("sequences", "bytes", "evictedThrough", "lastEventAt")
+
+    def __init__(self) -> None:
+        self.sequences: deque[int] = deque()
+        self.bytes = 0
+        self.evictedThrough = 0
+        self.lastEventAt = 0.0
+
+
+class EventBuffer:
+    """Buffer de snapshot y replay acotado en eventos y en bytes.
+
+    `records` guarda cada evento una sola vez por secuencia y, como se
+    entregan en orden, su orden de inserción ya es el orden global. Cada
+    artefacto tiene un canal con sus secuencias, limitado a `maxEvents` y
+    `maxBytes`. Si la suma supera `maxTotalBytes`, se desalojan completos los
+    canales usados hace más tiempo (LRU).
+
+    Solo se crean canales para `allowedArtifacts` (vacío: todos). Los eventos
+    de otros artefactos se envían en vivo pero no se retienen.
+    """
+
+    def __init__(
+        self,
+        maxEvents: int,
+        maxBytes: int,
+        maxTotalBytes: int,
+        allowedArtifacts: typing.Iterable[str] = (),
+    ) -> None:
+        self.maxEvents = maxEvents
+        self.maxBytes = maxBytes
+        self.maxTotalBytes = maxTotalBytes
+        self.allowedArtifacts = frozenset(artifact.upper() for artifact in allowedArtifacts)
+        self.records: dict[int, EventRecord] = {}
+        self.channels: OrderedDict[str, ArtifactChannel] = OrderedDict()
+        self.totalBytes = 0
+        self.lastSequence = 0
+        # Última secuencia de los canales desalojados completos: acota el replay de cualquier artefacto sin canal.
+        self.droppedThrough = 0
+        self.evictedEvents = 0
+        self.evictedChannels = 0
+        self.rejectedEvents = 0
+        self.oversizedEvents = 0
+
+    def add(self, record: EventRecord) -> None:
+        if record.seq is None or record.seq <= self.lastSequence:
+            return
+        self.lastSequence = record.seq
+
+        if self.allowedArtifacts and record.artifact not in self.allowedArtifacts:
+            self.rejectedEvents += 1
+            return
+
+        channel = self.channels.get(record.artifact)
+        if channel is None:
+            channel = self.channels[record.artifact] = ArtifactChannel()
+            channel.evictedThrough = self.droppedThrough
+        else:
+            self.channels.move_to_end(record.artifact)
+
+        size = sys.getsizeof(record.text)
+        if size > self.maxBytes:
+            # No cabe ni solo en el canal: se envía en vivo y se marca como hueco para el replay.
+            self.oversizedEvents += 1
+            channel.evictedThrough = record.seq
+            return
+
+        channel.sequences.append(record.seq)
+        channel.bytes += size
+        channel.lastEventAt = time.time()
+        self.records[record.seq] = record
+        self.totalBytes += size
+
+        while len(channel.sequences) > self.maxEvents or channel.bytes > self.maxBytes:
+            self._evictOldest(channel)
+
+        while self.totalBytes > self.maxTotalBytes:
+            artifact, oldest = next(iter(self.channels.items()))
+            if oldest is channel:
+                # Solo queda el canal actual: se recorta desde su evento más antiguo.
+                self._evictOldest(channel)
+                continue
+            self._dropChannel(artifact, oldest)
+
+    def sequences(self, artifact: str) -> typing.Iterable[int]:
+        channel = self.channels.get(artifact)
+        return channel.sequences if channel is not None else ()
+
+    def evictedThrough(self, artifact: str | None = None) -> int:
+        """Última secuencia desalojada de un artefacto, o de cualquiera si `artifact` es None."""
+        if self.allowedArtifacts and artifact is not None and artifact not in self.allowedArtifacts:
+            # Nunca se retiene: no hay desde dónde reanudar.
+            return self.lastSequence
+        if artifact is None:
+            return max(
+                (channel.evictedThrough for channel in self.channels.values()),
+                default=self.droppedThrough,
+            )
+        channel = self.channels.get(artifact)
+        return channel.evictedThrough if channel is not None else self.droppedThrough
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        return {
+            "maxEventsPerArtifact": self.maxEvents,
+            "maxBytesPerArtifact": self.maxBytes,
+            "maxTotalBytes": self.maxTotalBytes,
+            "allowedArtifacts": sorted(self.allowedArtifacts),
+            "totalBytes": self.totalBytes,
+            "events": len(self.records),
+            "lastSequence": self.lastSequence,
+            "evictedEvents": self.evictedEvents,
+            "evictedChannels": self.evictedChannels,
+            "rejectedEvents": self.rejectedEvents,
+            "oversizedEvents": self.oversizedEvents,
+            "channels": [
+                {
+                    "artifact": artifact,
+                    "events": len(channel.sequences),
+                    "bytes": channel.bytes,
+                    "oldestSeq": channel.sequences[0] if channel.sequences else None,
+                    "newestSeq": channel.sequences[-1] if channel.sequences else None,
+                    "lastEventAt": channel.lastEventAt,
+                }
+                for artifact, channel in reversed(self.channels.items())
+            ],
+        }
+
+    def _evictOldest(self, channel: ArtifactChannel) -> None:
+        seq = channel.sequences.popleft()
+        record = self.records.pop(seq)
+        size = sys.getsizeof(record.text)
+        channel.bytes -= size
+        channel.evictedThrough = seq
+        self.totalBytes -= size
+        self.evictedEvents += 1
+
+    def _dropChannel(self, artifact: str, channel: ArtifactChannel) -> None:
+        for seq in channel.sequences:
+            self.records.pop(seq, None)
+        self.totalBytes -= channel.bytes
+        self.evictedEvents += len(channel.sequences)
+        self.evictedChannels += 1
+        if channel.sequences:
+            self.droppedThrough = max(self.droppedThrough, channel.sequences[-1])
+        del self.channels[artifact]
+
+
+# Todas las operaciones sobre el buffer y el registro de conexiones son
+# síncronas dentro del event loop, por lo que no necesitan locks.
+EVENT_BUFFER = EventBuffer(
+    maxEvents=ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG.PIPELINE_EVENTS_BUFFER_MAX_EVENTS,
+    maxBytes=ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG.PIPELINE_EVENTS_BUFFER_MAX_BYTES,
+    maxTotalBytes=ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG.PIPELINE_EVENTS_BUFFER_MAX_TOTAL_BYTES,
+    allowedArtifacts=ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG.PIPELINE_EVENTS_BUFFER_ALLOWED_ARTIFACTS,
 )
-_activeConnections: dict[str, set[fastapi.WebSocket]] = defaultdict(set)
-_bufferLock = asyncio.Lock()
-_connectionsLock = asyncio.Lock()
+
+# Índice de suscripciones: `_subscriptionIndex[dimensión][valor]` tiene las
+# conexiones cuya dimensión más selectiva es esa; `_unfiltered`, las que no
+# filtran nada. Al despachar solo se revisan los candidatos de los valores del
+# evento, no todas las conexiones.
+_subscriptionIndex: dict[str, dict[str, set["RealtimeConnection"]]] = {
+    dimension: defaultdict(set) for dimension in FILTER_DIMENSIONS
+}
+_unfiltered: set["RealtimeConnection"] = set()
+_connections: set["RealtimeConnection"] = set()
+_connectionIds = itertools.count(1)
+
+# Lugares ocupados por IP de cliente, contando los handshakes en curso.
+_hostSlots: Counter[str] = Counter()
+_acceptingConnections = True
+CONNECTION_STATS: Counter[str] = Counter()
+
+
+class RealtimeConnection:
+    """Cliente WebSocket con sus filtros de suscripción y su propia cola de envío.
+
+    `dispatchRealtimeEvent` solo encola; una tarea por conexión envía en orden.
+    Así un cliente lento no demora a los demás ni al webhook. Si la cola se
+    llena se aplica `slowConsumerPolicy`:
+
+    - `drop_oldest`: se descarta el evento más antiguo en cola.
+    - `gap_notice`: se descartan los nuevos hasta que haya lugar y luego se
+      envía `{"type": "gap", "dropped": n}` en la posición del hueco. Solo a
+      los clientes con `controlProtocol`; al resto se le aplica `drop_oldest`.
+    - `disconnect`: se cierra la conexión con el código 1013.
+
+    Con `batchSeconds` > 0 los mensajes se envían como arreglos JSON: el
+    primero tras un período sin envíos sale de inmediato y los siguientes se
+    agrupan hasta `batchSeconds` o `batchSize` mensajes por frame.
+
+    `lastSeenAt`, `lastActivityAt` y `sendingSince` son los instantes
+    (`time.monotonic()`) que revisa `RealtimeHeartbeat` para cerrar los
+    sockets muertos o inactivos.
+
+    Los clientes anteriores esperan solo eventos en el socket: los frames de
+    control que el cliente no pidió (pings, avisos de hueco, errores) se envían únicamente si
+    `controlProtocol` es True, lo que ocurre con `control=true` al conectar o
+    con el primer mensaje de control válido.
+    """
+
+    def __init__(
+        self,
+        filters: SubscriptionFilters,
+        websocket: fastapi.WebSocket,
+        initialFrames: list[str],
+        maxQueued: int,
+        slowConsumerPolicy: str,
+        batchSeconds: float = 0.0,
+        batchSize: int = 1,
+        host: str = "unknown",
+        controlProtocol: bool = False,
+    ) -> None:
+        self.id = next(_connectionIds)
+        self.filters = filters
+        self.websocket = websocket
+        self.host = host
+        self.slowConsumerPolicy = slowConsumerPolicy
+        self.batchSeconds = batchSeconds
+        self.batchSize = batchSize
+        self._initialFrames = initialFrames
+        self._queue: deque[str] = deque()
+        self._maxQueued = maxQueued
+        self._ready = asyncio.Event()
+        self._pendingGap = 0
+        self._closing = False
+        self.sent = 0
+        self.dropped = 0
+        self.highWatermark = 0
+        now = time.monotonic()
+        self.lastSeenAt = now
+        self.lastActivityAt = now
+        self.lastPingAt = now
+        self.sendingSince: float | None = None
+        # Solo se exige el pong a los clientes que ya respondieron alguno.
+        self.heartbeat = False
+        self.controlProtocol = controlProtocol
+        self._disconnecting: asyncio.Task[None] | None = None
+        self._writer = asyncio.create_task(self._write(), name=f"pipeline-ws-writer-{self.id}")
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def matches(self, record: EventRecord) -> bool:
+        return all(_recordValue(record, dimension) in values for dimension, values in self.filters.items())
+
+    def enqueue(self, frame: str) -> None:
+        if self._closing:
+            return
+
+        if len(self._queue) >= self._maxQueued or (self._pendingGap and len(self._queue) + 1 >= self._maxQueued):
+            self._handleOverflow(frame)
+        else:
+            if self._pendingGap:
+                self._queue.append(self._takeGapNotice())
+            self._queue.append(frame)
+
+        self.lastActivityAt = time.monotonic()
+        self.highWatermark = max(self.highWatermark, len(self._queue))
+        self._ready.set()
+
+    def enqueueControl(self, message: dict[str, typing.Any]) -> None:
+        """Encola una respuesta de control; no cuenta para el límite de la cola."""
+        if self._closing:
+            return
+        self._queue.append(json.dumps(message, separators=(",", ":")))
+        self._ready.set()
+
+    async def close(self) -> None:
+        """Detiene el envío y quita la conexión del registro."""
+        self._closing = True
+        _unregister(self)
+        if self._writer is not asyncio.current_task() and not self._writer.done():
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+
+    def disconnect(self, code: int, reason: str) -> asyncio.Task[None] | None:
+        """Descarta la cola y cierra el socket en segundo plano; devuelve la tarea del cierre."""
+        if self._closing:
+            return self._disconnecting
+        self.dropped += len(self._queue)
+        self._queue.clear()
+        self._closing = True
+        _unregister(self)
+        self._disconnecting = asyncio.create_task(self._disconnect(code, reason))
+        return self._disconnecting
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        now = time.monotonic()
+        return {
+            "id": self.id,
+            "host": self.host,
+            "filters": {dimension: sorted(values) for dimension, values in self.filters.items()},
+            "queued": self.queued,
+            "highWatermark": self.highWatermark,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "heartbeat": self.heartbeat,
+            "controlProtocol": self.controlProtocol,
+            "idleSeconds": round(now - self.lastActivityAt, 3),
+            "sendingSeconds": round(now - self.sendingSince, 3) if self.sendingSince is not None else None,
+        }
+
+    def _handleOverflow(self, frame: str) -> None:
+        policy = self.slowConsumerPolicy
+        if policy == GAP_NOTICE and not self.controlProtocol:
+            policy = DROP_OLDEST
+
+        if policy == DROP_OLDEST:
+            self._queue.popleft()
+            self._queue.append(frame)
+            self.dropped += 1
+        elif policy == GAP_NOTICE:
+            self._pendingGap += 1
+            self.dropped += 1
+        else:
+            LOGGER.warning(
+                "[PIPELINE][EVENTS] Cliente %s desconectado por lento (%s eventos en cola)",
+                self.id,
+                len(self._queue),
+            )
+            self.dropped += 1
+            self.disconnect(_SLOW_CONSUMER_CLOSE_CODE, "Slow consumer")
+
+    def _takeGapNotice(self) -> str:
+        notice = json.dumps({"type": "gap", "dropped": self._pendingGap}, separators=(",", ":"))
+        self._pendingGap = 0
+        return notice
+
+    async def _write(self) -> None:
+        try:
+            if self.batchSeconds > 0:
+                await self._writeBatches()
+            else:
+                await self._writeFrames()
+        except asyncio.CancelledError:
+            raise
+        except (fastapi.WebSocketDisconnect, RuntimeError):
+            pass
+        except Exception:  # pragma: no cover - diagnostic logging only
+            LOGGER.exception("[PIPELINE][EVENTS] Failed to send realtime event")
+        self._closing = True
+        _unregister(self)
+
+    async def _writeFrames(self) -> None:
+        for frame in self._initialFrames:
+            await self._send(frame)
+        self._initialFrames = []
+
+        while True:
+            if not self._queue:
+                if self._pendingGap:
+                    await self._send(self._takeGapNotice())
+                    continue
+                await self._waitForMessages()
+                continue
+
+            await self._send(self._queue.popleft())
+            self.sent += 1
+
+    async def _writeBatches(self) -> None:
+        for start in range(0, len(self._initialFrames), self.batchSize):
+            await self._send(_joinFrames(self._initialFrames[start : start + self.batchSize]))
+        self._initialFrames = []
+
+        lastFlushAt = -math.inf
+        while True:
+            if not self._queue:
+                if self._pendingGap:
+                    self._queue.append(self._takeGapNotice())
+                    continue
+                await self._waitForMessages()
+                continue
+
+            # Tras un período sin envíos se envía de inmediato; si no, se junta
+            # hasta completar el lote o cumplir la ventana desde el último envío.
+            deadline = lastFlushAt + self.batchSeconds
+            while len(self._queue) < self.batchSize:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._waitForMessages(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = [self._queue.popleft() for _ in range(min(self.batchSize, len(self._queue)))]
+            await self._send(_joinFrames(batch))
+            self.sent += len(batch)
+            lastFlushAt = time.monotonic()
+
+    async def _send(self, text: str) -> None:
+        self.sendingSince = time.monotonic()
+        await self.websocket.send_text(text)
+        self.sendingSince = None
+
+    async def _waitForMessages(self) -> None:
+        self._ready.clear()
+        await self._ready.wait()
+
+    async def _disconnect(self, code: int, reason: str) -> None:
+        await self.close()
+        if self.websocket.application_state == WebSocketState.CONNECTED:
+            try:
+                await asyncio.wait_for(self.websocket.close(code=code, reason=reason), _CLOSE_TIMEOUT_SECONDS)
+            except (RuntimeError, OSError, asyncio.TimeoutError):
+                pass
+
+
+def _joinFrames(frames: list[str]) -> str:
+    """Une mensajes ya serializados en un arreglo JSON sin volver a codificarlos."""
+    return f"[{','.join(frames)}]"
 
 
 def normalizeArtifact(value: typing.Optional[str]) -> str:
@@ -34,79 +470,428 @@ def normalizeArtifactFilter(value: typing.Optional[str]) -> str:
     return _ALL_ARTIFACT_KEY
 
 
-async def snapshotEvents(artifact: str) -> list[LoggingSchema]:
-    """Obtiene una copia de los eventos recientes para un artefacto o para todos."""
-    async with _bufferLock:
-        if artifact == _ALL_ARTIFACT_KEY:
-            aggregated: list[LoggingSchema] = []
-            for events in _eventBuffer.values():
-                aggregated.extend(event.model_copy(deep=True) for event in events)
-            aggregated.sort(key=lambda evt: getattr(evt, "timestamp", 0))
-            return aggregated
-        return [event.model_copy(deep=True) for event in _eventBuffer.get(artifact, [])]
+def parseSubscriptionFilters(raw: typing.Mapping[str, typing.Any]) -> SubscriptionFilters:
+    """Valida y normaliza filtros de suscripción.
 
+    Cada dimensión acepta un valor o una lista; las ausentes, vacías o con
+    artifact `ALL` no restringen.
 
-async def registerConnection(artifact: str, websocket: fastapi.WebSocket) -> None:
-    """Asocia un websocket a un artefacto para recibir eventos en vivo."""
-    async with _connectionsLock:
-        _activeConnections[artifact].add(websocket)
+    Raises:
+        ValueError: Si hay una dimensión desconocida o un valor que no es escalar.
+    """
+    unknown = set(raw) - set(FILTER_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown filter(s): {', '.join(sorted(unknown))}")
 
+    filters: SubscriptionFilters = {}
+    for dimension in FILTER_DIMENSIONS:
+        value = raw.get(dimension)
+        values = value if isinstance(value, (list, tuple, set, frozenset)) else [value]
+        normalized: set[str] = set()
+        for item in values:
+            if item is None or item == "":
+                continue
+            if not isinstance(item, (str, int)) or isinstance(item, bool):
+                raise ValueError(f"Invalid value for filter '{dimension}'")
+            normalized.add(normalizeArtifactFilter(item) if dimension == "artifact" else str(item))
 
-async def removeConnection(artifact: str, websocket: fastapi.WebSocket) -> None:
-    """Elimina la conexión registrada y limpia el canal si queda vacío."""
-    async with _connectionsLock:
-        sockets = _activeConnections.get(artifact)
-        if sockets is None:
+        if dimension == "artifact":
+            normalized.discard(_ALL_ARTIFACT_KEY)
+        if normalized:
+            filters[dimension] = frozenset(normalized)
+    return filters
+
+
+def _recordValue(record: EventRecord, dimension: str) -> str | None:
+    if dimension == "artifact":
+        return record.artifact
+    return getattr(record.keys, dimension)
+
+
+async def snapshotEvents(
+    filters: SubscriptionFilters,
+    since: int | None = None,
+    epoch: str | None = None,
+) -> list[str]:
+    """Eventos recientes que cumplen los filtros, ya serializados y en orden de secuencia.
+
+    Con `since`, devuelve solo los eventos posteriores a esa secuencia. Si el
+    buffer ya no cubre el hueco, o `epoch` no es el de la secuencia actual (por
+    ejemplo tras un reinicio), devuelve el snapshot completo. Con el mismo
+    epoch el cliente descarta por `seq` lo que ya tenía; con otro, debe olvidar
+    las secuencias anteriores.
+
+    Los registros son inmutables, así que no hace falta copiarlos.
+    """
+    artifacts = filters.get("artifact")
+    if since is not None and not _canResume(artifacts, since, epoch):
+        since = None
+
+    if artifacts is not None and len(artifacts) == 1:
+        (artifact,) = artifacts
+        sequences: typing.Iterable[int] = EVENT_BUFFER.sequences(artifact)
+    else:
+        sequences = EVENT_BUFFER.records.keys()
+
+    frames: list[str] = []
+    # Se recorre desde el final hacia atrás: con `since` solo se visita el delta.
+    for seq in reversed(sequences):
+        if since is not None and seq <= since:
+            break
+        record = EVENT_BUFFER.records[seq]
+        if all(_recordValue(record, dimension) in values for dimension, values in filters.items()):
+            frames.append(record.text)
+    frames.reverse()
+    return frames
+
+
+def _canResume(artifacts: frozenset[str] | None, since: int, epoch: str | None) -> bool:
+    if epoch != PIPELINE_EVENTS_BUS.epoch or since > EVENT_BUFFER.lastSequence:
+        return False
+    if artifacts is None:
+        return since >= EVENT_BUFFER.evictedThrough()
+    return all(since >= EVENT_BUFFER.evictedThrough(artifact) for artifact in artifacts)
+
+
+async def registerConnection(
+    filters: SubscriptionFilters,
+    websocket: fastapi.WebSocket,
+    includeSnapshot: bool = True,
+    since: int | None = None,
+    epoch: str | None = None,
+    batchSeconds: float = 0.0,
+    batchSize: int = 1,
+    host: str = "unknown",
+    controlProtocol: bool = False,
+) -> RealtimeConnection:
+    """Registra un websocket para recibir en vivo los eventos que cumplen `filters`.
+
+    Si `includeSnapshot` es True, los eventos recientes (o solo los posteriores
+    a `since`) se envían antes que cualquier evento en vivo: la copia y el
+    registro ocurren sin ceder el event loop, así que ningún evento se pierde ni
+    se duplica entre ambos.
+    """
+    initialFrames = await snapshotEvents(filters, since, epoch) if includeSnapshot else []
+
+    connection = RealtimeConnection(
+        filters,
+        websocket,
+        initialFrames,
+        maxQueued=ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG.PIPELINE_WS_SEND_QUEUE_SIZE,
+        slowConsumerPolicy=ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG.PIPELINE_WS_SLOW_CONSUMER_POLICY,
+        batchSeconds=batchSeconds,
+        batchSize=batchSize,
+        host=host,
+        controlProtocol=controlProtocol,
+    )
+    _connections.add(connection)
+    _index(connection)
+    return connection
+
+
+async def removeConnection(connection: RealtimeConnection) -> None:
+    """Elimina la conexión registrada y la quita del índice de suscripciones."""
+    await connection.close()
+
+
+def acquireConnectionSlot(host: str) -> bool:
+    """Reserva un lugar para una conexión nueva desde `host`, antes del handshake.
+
+    Devuelve False si el proceso se está apagando o si se alcanzó el límite
+    global o el de la IP. Al registrar la conexión, la reserva pasa a ella y se
+    libera cuando sale del registro, aunque el socket siga sin cerrarse; si el
+    handshake falla antes, se libera con `releaseConnectionSlot`.
+    """
+    config = ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG
+    if (
+        not _acceptingConnections
+        or _hostSlots.total() >= config.PIPELINE_WS_MAX_CONNECTIONS
+        or _hostSlots[host] >= config.PIPELINE_WS_MAX_CONNECTIONS_PER_HOST
+    ):
+        CONNECTION_STATS["rejected"] += 1
+        return False
+
+    _hostSlots[host] += 1
+    return True
+
+
+def releaseConnectionSlot(host: str) -> None:
+    _hostSlots[host] -= 1
+    if _hostSlots[host] <= 0:
+        del _hostSlots[host]
+
+
+async def closeAllConnections() -> None:
+    """Deja de aceptar conexiones y cierra las activas con 1001 al apagar el proceso."""
+    global _acceptingConnections
+    _acceptingConnections = False
+
+    pending = [
+        task
+        for connection in list(_connections)
+        if (task := connection.disconnect(_GOING_AWAY_CLOSE_CODE, "Server shutting down")) is not None
+    ]
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def handleControlMessage(connection: RealtimeConnection, message: str) -> None:
+    """Procesa un mensaje de control enviado por el cliente.
+
+    `{"type": "subscribe", "filters": {...}, "since": <seq>, "epoch": <epoch>}`
+    reemplaza los filtros de la conexión; con `since` (opcional) se reenvían
+    los eventos posteriores que cumplen los filtros nuevos, o el snapshot
+    completo si `epoch` no coincide. Se responde con
+    `{"type": "subscribed", "filters": {...}, "epoch": ...}` o `{"type": "error", "detail": ...}`.
+
+    `{"type": "pong"}` responde al ping del servidor y no tiene respuesta.
+
+    Cualquiera de los dos, si es válido, activa el protocolo de control de la
+    conexión. Hasta entonces los mensajes inválidos se ignoran sin responder,
+    como antes de existir el protocolo.
+    """
+    now = time.monotonic()
+    connection.lastSeenAt = now
+    try:
+        try:
+            payload = json.loads(message)
+        except json.JSONDecodeError:
+            raise ValueError("Control messages must be JSON objects")
+        if isinstance(payload, dict) and payload.get("type") == "pong":
+            connection.heartbeat = True
+            connection.controlProtocol = True
             return
-        sockets.discard(websocket)
-        if not sockets:
-            _activeConnections.pop(artifact, None)
+        connection.lastActivityAt = now
+        if not isinstance(payload, dict) or payload.get("type") != "subscribe":
+            raise ValueError("Unsupported control message; expected type 'subscribe' or 'pong'")
+        rawFilters = payload.get("filters") or {}
+        if not isinstance(rawFilters, dict):
+            raise ValueError("'filters' must be an object")
+        since = payload.get("since")
+        if since is not None and (not isinstance(since, int) or isinstance(since, bool) or since < 0):
+            raise ValueError("'since' must be a non-negative integer")
+        epoch = payload.get("epoch")
+        if epoch is not None and not isinstance(epoch, str):
+            raise ValueError("'epoch' must be a string")
+        filters = parseSubscriptionFilters(rawFilters)
+    except ValueError as e:
+        if connection.controlProtocol:
+            connection.enqueueControl({"type": "error", "detail": str(e)})
+        return
+
+    connection.controlProtocol = True
+    _unindex(connection)
+    connection.filters = filters
+    _index(connection)
+    connection.enqueueControl(
+        {"type": "subscribed", "filters": connection.snapshot()["filters"], "epoch": PIPELINE_EVENTS_BUS.epoch}
+    )
+    if since is not None:
+        for frame in await snapshotEvents(filters, since, epoch):
+            connection.enqueue(frame)
 
 
-async def _getConnections(artifact: str) -> list[fastapi.WebSocket]:
-    """Devuelve una lista desconectada de websockets para el artefacto dado."""
-    async with _connectionsLock:
-        return list(_activeConnections.get(artifact, set()))
+def _index(connection: RealtimeConnection) -> None:
+    for dimension in FILTER_DIMENSIONS:
+        values = connection.filters.get(dimension)
+        if values:
+            for value in values:
+                _subscriptionIndex[dimension][value].add(connection)
+            return
+    _unfiltered.add(connection)
 
 
-async def dispatchRealtimeEvent(event: LoggingSchema) -> None:
-    """Bufferiza el evento y lo transmite a todos los sockets interesados."""
-    artifact = normalizeArtifact(event.receivedArtifact)
-    eventCopy = event.model_copy(deep=True)
+def _unindex(connection: RealtimeConnection) -> None:
+    _unfiltered.discard(connection)
+    for dimension in FILTER_DIMENSIONS:
+        values = connection.filters.get(dimension)
+        if values:
+            buckets = _subscriptionIndex[dimension]
+            for value in values:
+                bucket = buckets.get(value)
+                if bucket is not None:
+                    bucket.discard(connection)
+                    if not bucket:
+                        buckets.pop(value, None)
+            return
 
-    async with _bufferLock:
-        _eventBuffer[artifact].append(eventCopy)
 
-    payload = eventCopy.model_dump(mode="json", by_alias=True, round_trip=True)
+def _unregister(connection: RealtimeConnection) -> None:
+    if connection in _connections:
+        _connections.discard(connection)
+        _unindex(connection)
+        releaseConnectionSlot(connection.host)
 
-    directConnections = await _getConnections(artifact)
-    broadcastConnections = await _getConnections(_ALL_ARTIFACT_KEY)
 
-    targets: list[fastapi.WebSocket] = []
-    seen = set()
-    for socket in directConnections + broadcastConnections:
-        if id(socket) in seen:
+def _matchingConnections(record: EventRecord) -> set[RealtimeConnection]:
+    targets = set(_unfiltered)
+    for dimension in FILTER_DIMENSIONS:
+        value = _recordValue(record, dimension)
+        if value is None:
             continue
-        seen.add(id(socket))
-        targets.append(socket)
+        for connection in _subscriptionIndex[dimension].get(value, ()):
+            if connection.matches(record):
+                targets.add(connection)
+    return targets
 
-    if not targets:
+
+def getConnectionsSnapshot() -> list[dict[str, typing.Any]]:
+    """Estado de la cola de envío de cada conexión activa."""
+    return [connection.snapshot() for connection in _connections]
+
+
+def getConnectionGauges() -> dict[str, typing.Any]:
+    """Conexiones vivas, lugares reservados por IP y contadores de rechazos y cierres."""
+    return {
+        "connections": len(_connections),
+        "reservedSlots": _hostSlots.total(),
+        "hosts": len(_hostSlots),
+        "maxConnectionsPerHostInUse": max(_hostSlots.values(), default=0),
+        "acceptingConnections": _acceptingConnections,
+        "rejectedConnections": CONNECTION_STATS["rejected"],
+        "reapedUnresponsive": CONNECTION_STATS["reapedUnresponsive"],
+        "reapedStalled": CONNECTION_STATS["reapedStalled"],
+        "reapedIdle": CONNECTION_STATS["reapedIdle"],
+    }
+
+
+def getBufferSnapshot() -> dict[str, typing.Any]:
+    """Ocupación del buffer de replay, del canal usado más recientemente al más antiguo."""
+    return EVENT_BUFFER.snapshot()
+
+
+async def dispatchRealtimeEvent(event: LoggingSchema) -> bool:
+    """Serializa el evento una sola vez y lo publica en el bus de eventos.
+
+    Con el bus local se entrega de inmediato; con Redis llega a los sockets de
+    todos los workers, incluido este, a través del stream compartido.
+
+    Devuelve False si el bus descartó el evento porque otro worker ya publicó su id.
+    """
+    return await PIPELINE_EVENTS_BUS.publish(
+        normalizeArtifact(event.receivedArtifact),
+        event.timestamp,
+        EventKeys(
+            eventType=event.eventType,
+            userLevel=str(event.userLevel) if event.userLevel is not None else None,
+            userLanguage=event.userLanguage,
+            audioRequestID=event.audioRequestID,
+        ),
+        event.model_dump_json(by_alias=True, round_trip=True),
+        eventId=event.id,
+    )
+
+
+def deliverRecord(record: EventRecord, broadcast: bool = True) -> None:
+    """Guarda el evento en el buffer de replay y lo encola para los sockets interesados; no espera los envíos."""
+    EVENT_BUFFER.add(record)
+
+    if not broadcast:
         return
 
-    disconnected: list[tuple[str, fastapi.WebSocket]] = []
-    for socket in targets:
+    for connection in _matchingConnections(record):
+        connection.enqueue(record.text)
+
+
+class RealtimeHeartbeat:
+    """Envía pings a los clientes WebSocket y cierra los sockets muertos o inactivos.
+
+    Una sola tarea por proceso revisa todas las conexiones. Cada
+    `pingIntervalSeconds` encola `{"type": "ping"}` a las que usan el protocolo
+    de control, y cierra con 1001:
+
+    - las que ya respondieron algún pong y no responden el último en `pongTimeoutSeconds`;
+    - las que llevan más de `sendTimeoutSeconds` con un envío bloqueado (TCP medio abierto);
+    - si `idleTimeoutSeconds` > 0, las que no recibieron eventos ni enviaron mensajes en ese lapso.
+
+    Los sockets TCP medio abiertos de cualquier cliente los detecta el ping de
+    protocolo de uvicorn (`--ws-ping-interval`/`--ws-ping-timeout` en el
+    dockerfile), que los navegadores responden solos: uvicorn cierra el socket,
+    `receive_text` lanza `WebSocketDisconnect` y la conexión sale del registro.
+    El ping de aplicación detecta además a los clientes que siguen conectados
+    pero no procesan lo que se les envía.
+    """
+
+    def __init__(
+        self,
+        pingIntervalSeconds: float,
+        pongTimeoutSeconds: float,
+        sendTimeoutSeconds: float,
+        idleTimeoutSeconds: float,
+    ) -> None:
+        self.pingIntervalSeconds = pingIntervalSeconds
+        self.pongTimeoutSeconds = pongTimeoutSeconds
+        self.sendTimeoutSeconds = sendTimeoutSeconds
+        self.idleTimeoutSeconds = idleTimeoutSeconds
+        self._runner: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run(), name="pipeline-ws-heartbeat")
+
+    async def stop(self) -> None:
+        if self._runner is None:
+            return
+
+        self._runner.cancel()
         try:
-            await socket.send_json(payload)
-        except (fastapi.WebSocketDisconnect, RuntimeError):
-            disconnected.append(
-                (artifact if socket in directConnections else _ALL_ARTIFACT_KEY, socket)
-            )
-        except Exception:  # pragma: no cover - diagnostic logging only
-            LOGGER.exception("[PIPELINE][EVENTS] Failed to send realtime event")
-            disconnected.append(
-                (artifact if socket in directConnections else _ALL_ARTIFACT_KEY, socket)
-            )
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        self._runner = None
 
-    if disconnected:
-        for artifactKey, socket in disconnected:
-            await removeConnection(artifactKey, socket)
+    def check(self, now: float) -> None:
+        for connection in list(_connections):
+            reason = self._reapReason(connection, now)
+            if reason is not None:
+                CONNECTION_STATS[reason] += 1
+                LOGGER.info("[PIPELINE][EVENTS] Cliente %s (%s) cerrado: %s", connection.id, connection.host, reason)
+                connection.disconnect(_GOING_AWAY_CLOSE_CODE, "Connection timed out")
+            elif connection.controlProtocol and now - connection.lastPingAt >= self.pingIntervalSeconds:
+                connection.lastPingAt = now
+                connection.enqueueControl({"type": "ping"})
+
+    def _reapReason(self, connection: RealtimeConnection, now: float) -> str | None:
+        if connection.sendingSince is not None and now - connection.sendingSince > self.sendTimeoutSeconds:
+            return "reapedStalled"
+        if (
+            connection.heartbeat
+            and connection.lastPingAt > connection.lastSeenAt
+            and now - connection.lastPingAt > self.pongTimeoutSeconds
+        ):
+            return "reapedUnresponsive"
+        if self.idleTimeoutSeconds and now - connection.lastActivityAt > self.idleTimeoutSeconds:
+            return "reapedIdle"
+        return None
+
+    async def _run(self) -> None:
+        period = min(self.pingIntervalSeconds, self.pongTimeoutSeconds)
+        while True:
+            await asyncio.sleep(period)
+            try:
+                self.check(time.monotonic())
+            except Exception:  # pragma: no cover - diagnostic logging only
+                LOGGER.exception("[PIPELINE][EVENTS] Falló la revisión de conexiones WebSocket")
+
+
+def _createEventBus() -> EventBus:
+    config = ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG
+    if config.PIPELINE_EVENTS_BUS_BACKEND == "redis":
+        return RedisEventBus(
+            url=ENVIRONMENT_CONFIG.CONNECTIONS_CONFIG.REDIS_URL,
+            stream=config.PIPELINE_EVENTS_BUS_STREAM,
+            maxLength=config.PIPELINE_EVENTS_BUS_STREAM_MAXLEN,
+            deliver=deliverRecord,
+            dedupeTtlSeconds=config.PIPELINE_EVENTS_BUS_DEDUPE_TTL_SECONDS,
+        )
+    return LocalEventBus(deliver=deliverRecord)
+
+
+PIPELINE_EVENTS_BUS = _createEventBus()
+
+PIPELINE_WS_HEARTBEAT = RealtimeHeartbeat(
+    pingIntervalSeconds=ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG.PIPELINE_WS_PING_INTERVAL_SECONDS,
+    pongTimeoutSeconds=ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG.PIPELINE_WS_PONG_TIMEOUT_SECONDS,
+    sendTimeoutSeconds=ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG.PIPELINE_WS_SEND_TIMEOUT_SECONDS,
+    idleTimeoutSeconds=ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG.PIPELINE_WS_IDLE_TIMEOUT_SECONDS,
+)
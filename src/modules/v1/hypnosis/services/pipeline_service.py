@@ -1,77 +1,364 @@
+import asyncio
+import logging
+import math
+import typing
+
 import httpx
 from fastapi import HTTPException, status
 from src.config.environment import EnvironmentConfig
+from src.modules.v1.hypnosis.connections.hypnosis_api import HypnosisApi
 from src.modules.v1.hypnosis.schemas.pipeline_schema import (
+    AggregatedRemainingTasksResponse,
     LoggingEventsResponse,
+    LoggingSchema,
     RemainingTasksResponse,
 )
+from src.modules.v1.hypnosis.repository.pipeline_events_repository import PIPELINE_EVENTS_REPOSITORY
+from src.modules.v1.shared.utils.json_stream import iterJsonArrayItems
+from src.modules.v1.shared.utils.resilience import CircuitOpenError
+
+LOGGER = logging.getLogger("uvicorn").getChild("v1.hypnosis.services.pipeline")
+
+PIPELINE_ARTIFACTS = (
+    "maker",
+    "export",
+    "decorator",
+    "caronte",
+    "moderator",
+    "logging",
+)
+
+# Último conteo bueno por artifact; se sirve mientras el circuito hacia el upstream está abierto.
+_LAST_KNOWN_REMAINING_TASKS: dict[str, RemainingTasksResponse] = {}
 
 
 class PipelineService:
-    def __init__(self, settings: EnvironmentConfig):
+    def __init__(self, settings: EnvironmentConfig, api: HypnosisApi):
+        # `api` es la conexión compartida del proceso: pool, circuit breaker y hedging.
         self.settings = settings
-        self.base_url = self.settings.HYPNOSIS_CONFIG.HYPNOSIS_API_URL
-        self.api_key = self.settings.HYPNOSIS_CONFIG.HYPNOSIS_API_KEY
-        self.headers = {"x-api-key": self.api_key}
+        self.api = api
+        self.client = api.client
 
     async def getLoggingEvents(
-        self, fromDate: int, toDate: int, eventType: str | None = None
+        self,
+        fromDate: int,
+        toDate: int,
+        eventType: str | None = None,
+        limit: int | None = None,
+        offset: int = 0,
     ) -> LoggingEventsResponse:
-        async with httpx.AsyncClient() as client:
+        """Eventos de logging del rango, desde el almacén local cuando está habilitado.
+
+        Solo se leen del almacén los tramos cubiertos por alguna ventana de
+        cobertura del escritor; el resto del rango (antes de la primera
+        ventana, caídas, despliegues) se completa con el upstream. Si el
+        almacén falla, se consulta el upstream completo.
+        """
+        events: LoggingEventsResponse | None = None
+        if self.settings.HYPNOSIS_CONFIG.PIPELINE_EVENTS_STORE_ENABLED:
             try:
-                response = await client.get(
-                    f"{self.base_url}/v1/logging/events",
-                    params={
-                        "fromDate": fromDate,
-                        "toDate": toDate,
-                        "eventType": eventType,
-                    },
-                    headers=self.headers,
-                )
-                response.raise_for_status()
-                return LoggingEventsResponse(**response.json())
-            except httpx.HTTPStatusError as e:
-                raise HTTPException(
-                    status_code=e.response.status_code,
-                    detail=f"Error fetching logging events: {e.response.text}",
-                )
-            except Exception as e:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Internal server error: {str(e)}",
-                )
+                events = await self._getStoredLoggingEvents(fromDate, toDate, eventType)
+            except HTTPException:
+                raise
+            except Exception:
+                LOGGER.exception("No se pudo leer el almacén local de eventos; se consulta el upstream")
+
+        if events is None:
+            events = await self._fetchLoggingEvents(fromDate, toDate, eventType)
+
+        if offset or limit is not None:
+            end = offset + limit if limit is not None else None
+            events.items = events.items[offset:end]
+        return events
+
+    async def _getStoredLoggingEvents(
+        self,
+        fromDate: int,
+        toDate: int,
+        eventType: str | None,
+    ) -> LoggingEventsResponse | None:
+        """Combina el almacén local (tramos cubiertos) con el upstream (el resto del rango).
+
+        Devuelve None cuando ningún tramo del rango tiene cobertura local y debe ir completo al upstream.
+        """
+        windows = await PIPELINE_EVENTS_REPOSITORY.findCoverage(fromDate, toDate)
+        covered = _coveredRanges(
+            windows,
+            fromDate,
+            toDate,
+            self.settings.HYPNOSIS_CONFIG.PIPELINE_EVENTS_COVERAGE_LAG_SECONDS,
+        )
+        if not covered:
+            return None
+
+        async def stored(start: int, end: int) -> list[LoggingSchema]:
+            documents = await PIPELINE_EVENTS_REPOSITORY.findEvents(start, end, eventType)
+            return [LoggingSchema.model_validate(document) for document in documents]
+
+        async def upstream(start: int, end: int) -> list[LoggingSchema]:
+            return (await self._fetchLoggingEvents(start, end, eventType)).items
+
+        # Tramos en orden cronológico: los huecos entre ventanas de cobertura van al upstream.
+        pieces = []
+        cursor = fromDate
+        for start, end in covered:
+            if cursor < start:
+                pieces.append(upstream(cursor, start - 1))
+            pieces.append(stored(start, end))
+            cursor = end + 1
+        if cursor <= toDate:
+            pieces.append(upstream(cursor, toDate))
+
+        items: list[LoggingSchema] = []
+        for piece in await asyncio.gather(*pieces):
+            items.extend(piece)
+        return LoggingEventsResponse(items=items)
+
+    async def _fetchLoggingEvents(
+        self,
+        fromDate: int,
+        toDate: int,
+        eventType: str | None,
+    ) -> LoggingEventsResponse:
+        try:
+            response = await self.api.get(
+                "/v1/logging/events",
+                params=_loggingEventsParams(fromDate, toDate, eventType),
+                operation="logging-events",
+            )
+            response.raise_for_status()
+            return LoggingEventsResponse(**response.json())
+        except CircuitOpenError as e:
+            raise _circuitOpenException(e)
+        except httpx.HTTPStatusError as e:
+            raise HTTPException(
+                status_code=e.response.status_code,
+                detail=f"Error fetching logging events: {e.response.text}",
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Internal server error: {str(e)}",
+            )
+
+    async def streamLoggingEvents(
+        self,
+        fromDate: int,
+        toDate: int,
+        eventType: str | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+        validate: bool = False,
+    ) -> typing.AsyncIterator[bytes]:
+        """Abre la consulta al upstream y devuelve un iterador NDJSON de sus eventos.
+
+        El estado HTTP se verifica antes de devolver el iterador, para que los
+        errores del upstream lleguen al cliente como una respuesta de error
+        normal. Después, los eventos se reenvían uno por línea a medida que
+        llegan; solo se retiene el evento en curso.
+
+        Args:
+            limit: Máximo de eventos a emitir. Al alcanzarlo se corta la lectura del upstream.
+            offset: Eventos iniciales a omitir.
+            validate: Si es True, cada evento se valida con `LoggingSchema` y los inválidos se descartan.
+        """
+        request = self.client.build_request(
+            "GET",
+            "/v1/logging/events",
+            params=_loggingEventsParams(fromDate, toDate, eventType),
+        )
+        try:
+            response = await self.api.breaker.call(lambda: self._sendStream(request))
+        except CircuitOpenError as e:
+            raise _circuitOpenException(e)
+        except httpx.HTTPStatusError as e:
+            raise HTTPException(
+                status_code=e.response.status_code,
+                detail=f"Error fetching logging events: {e.response.text}",
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Internal server error: {str(e)}",
+            )
+
+        if response.is_error:
+            body = await response.aread()
+            await response.aclose()
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Error fetching logging events: {body.decode(errors='replace')}",
+            )
+
+        return self._iterNdjson(response, limit, offset, validate)
+
+    async def _sendStream(self, request: httpx.Request) -> httpx.Response:
+        # Los 5xx se lanzan para que el circuit breaker los cuente como fallo.
+        response = await self.client.send(request, stream=True)
+        if response.status_code >= 500:
+            await response.aread()
+            await response.aclose()
+            response.raise_for_status()
+        return response
+
+    async def _iterNdjson(
+        self,
+        response: httpx.Response,
+        limit: int | None,
+        offset: int,
+        validate: bool,
+    ) -> typing.AsyncIterator[bytes]:
+        skipped = 0
+        emitted = 0
+        invalid = 0
+        try:
+            async for item in iterJsonArrayItems(response.aiter_bytes()):
+                if limit is not None and emitted >= limit:
+                    break
+
+                if validate:
+                    try:
+                        line = LoggingSchema.model_validate_json(item).model_dump_json().encode()
+                    except ValueError:
+                        invalid += 1
+                        continue
+                else:
+                    # Fuera de los strings JSON los saltos de línea son solo espacios: se quitan para NDJSON.
+                    line = item.replace(b"\n", b"").replace(b"\r", b"")
+
+                if skipped < offset:
+                    skipped += 1
+                    continue
+
+                emitted += 1
+                yield line + b"\n"
+        finally:
+            await response.aclose()
+            if invalid:
+                LOGGER.warning("Se descartaron %s eventos de logging inválidos durante el streaming", invalid)
 
     async def getRemainingTasks(self, artifact: str) -> RemainingTasksResponse:
-        # Artifact should be one of: maker, export, decorator, caronte, moderator, logging
-        valid_artifacts = [
-            "maker",
-            "export",
-            "decorator",
-            "caronte",
-            "moderator",
-            "logging",
-        ]
-        if artifact.lower() not in valid_artifacts:
+        if artifact.lower() not in PIPELINE_ARTIFACTS:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid artifact. Must be one of: {', '.join(valid_artifacts)}",
+                detail=f"Invalid artifact. Must be one of: {', '.join(PIPELINE_ARTIFACTS)}",
             )
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/v1/{artifact.lower()}/tasks/count-remaining",
-                    headers=self.headers,
-                )
-                response.raise_for_status()
-                return RemainingTasksResponse(**response.json())
-            except httpx.HTTPStatusError as e:
-                raise HTTPException(
-                    status_code=e.response.status_code,
-                    detail=f"Error fetching remaining tasks for {artifact}: {e.response.text}",
-                )
-            except Exception as e:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Internal server error: {str(e)}",
-                )
+        try:
+            return await self._fetchRemainingTasks(artifact.lower())
+        except CircuitOpenError as e:
+            lastKnown = _LAST_KNOWN_REMAINING_TASKS.get(artifact.lower())
+            if lastKnown is not None:
+                return lastKnown.model_copy(update={"stale": True})
+            raise _circuitOpenException(e)
+        except httpx.HTTPStatusError as e:
+            raise HTTPException(
+                status_code=e.response.status_code,
+                detail=f"Error fetching remaining tasks for {artifact}: {e.response.text}",
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Internal server error: {str(e)}",
+            )
+
+    async def getAllRemainingTasks(self) -> AggregatedRemainingTasksResponse:
+        """Consulta en paralelo las tareas pendientes de todos los artifacts.
+
+        Cada artifact tiene su propio timeout; los que fallan o no responden a
+        tiempo se informan en `errors` y el resto se devuelve igual. Con el
+        circuito abierto se usa el último valor conocido y el artifact se marca
+        en `staleArtifacts`.
+        """
+        timeoutSeconds = self.settings.HYPNOSIS_CONFIG.HYPNOSIS_REMAINING_TASKS_TIMEOUT_SECONDS
+        results = await asyncio.gather(
+            *(
+                asyncio.wait_for(self._fetchRemainingTasks(artifact), timeout=timeoutSeconds)
+                for artifact in PIPELINE_ARTIFACTS
+            ),
+            return_exceptions=True,
+        )
+
+        response = AggregatedRemainingTasksResponse()
+        for artifact, result in zip(PIPELINE_ARTIFACTS, results):
+            if isinstance(result, RemainingTasksResponse):
+                response.artifacts[artifact] = result
+                response.total += result.total
+                continue
+
+            lastKnown = _LAST_KNOWN_REMAINING_TASKS.get(artifact)
+            if isinstance(result, CircuitOpenError) and lastKnown is not None:
+                response.artifacts[artifact] = lastKnown.model_copy(update={"stale": True})
+                response.total += lastKnown.total
+                response.staleArtifacts.append(artifact)
+                continue
+
+            response.errors[artifact] = _describeFetchError(result, timeoutSeconds)
+            LOGGER.warning("No se obtuvieron las tareas pendientes de %s: %s", artifact, response.errors[artifact])
+
+        response.partial = bool(response.errors or response.staleArtifacts)
+        return response
+
+    async def _fetchRemainingTasks(self, artifact: str) -> RemainingTasksResponse:
+        response = await self.api.get(
+            f"/v1/{artifact}/tasks/count-remaining",
+            operation="count-remaining",
+            hedge=True,
+        )
+        response.raise_for_status()
+        remainingTasks = RemainingTasksResponse(**response.json())
+        _LAST_KNOWN_REMAINING_TASKS[artifact] = remainingTasks
+        return remainingTasks
+
+
+def _loggingEventsParams(fromDate: int, toDate: int, eventType: str | None) -> dict[str, typing.Any]:
+    return {
+        "fromDate": fromDate,
+        "toDate": toDate,
+        "eventType": eventType,
+    }
+
+
+def _coveredRanges(
+    windows: typing.Iterable[tuple[float, float]],
+    fromDate: int,
+    toDate: int,
+    lagSeconds: int,
+) -> list[tuple[int, int]]:
+    """Tramos `[start, end]` (segundos enteros, inclusivos) de `[fromDate, toDate]` cubiertos por alguna ventana.
+
+    Al final de cada ventana se descuenta `lagSeconds`, para los eventos que
+    llegan con demora; las ventanas solapadas o contiguas se unen.
+    """
+    ranges = sorted(
+        (max(math.ceil(start), fromDate), min(math.floor(end - lagSeconds), toDate))
+        for start, end in windows
+    )
+
+    merged: list[tuple[int, int]] = []
+    for start, end in ranges:
+        if start > end:
+            continue
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _circuitOpenException(error: CircuitOpenError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Hypnosis API temporarily unavailable",
+        headers={"Retry-After": str(max(math.ceil(error.retryAfterSeconds), 1))},
+    )
+
+
+def _describeFetchError(error: BaseException, timeoutSeconds: float) -> str:
+    if isinstance(error, asyncio.TimeoutError):
+        return f"Timed out after {timeoutSeconds:g}s"
+    if isinstance(error, CircuitOpenError):
+        return "Circuit open"
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"Upstream responded {error.response.status_code}"
+    return f"{type(error).__name__}: {error}"
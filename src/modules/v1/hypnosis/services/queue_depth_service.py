@@ -0,0 +1,192 @@
+import array
+import asyncio
+import logging
+import math
+import time
+import typing
+
+from fastapi import HTTPException, status
+
+from src.config import ENVIRONMENT_CONFIG
+from ..connections.hypnosis_api import HYPNOSIS_API_CONNECTION
+from ..schemas.pipeline_schema import (
+    AggregatedRemainingTasksResponse,
+    QueueDepthHistoryResponse,
+    QueueDepthSample,
+    QueueDepthTrend,
+)
+from .pipeline_service import PIPELINE_ARTIFACTS, PipelineService
+
+LOGGER = logging.getLogger("uvicorn").getChild("v1.hypnosis.services.queue_depth")
+
+_TOTAL_SERIES = "total"
+
+
+class QueueDepthRing:
+    """Buffer circular de tamaño fijo con las muestras de un artifact.
+
+    Los instantes y cada serie (el total y una por cola) viven en `array('d')`
+    preasignados que comparten el mismo índice: agregar una muestra no reserva
+    memoria salvo la primera vez que aparece una cola. Una cola ausente en una
+    muestra queda como NaN.
+    """
+
+    __slots__ = ("_capacity", "_timestamps", "_series", "_next", "_size")
+
+    def __init__(self, capacity: int) -> None:
+        self._capacity = capacity
+        self._timestamps = array.array("d", [math.nan]) * capacity
+        self._series: dict[str, array.array] = {}
+        self._next = 0
+        self._size = 0
+
+    def append(self, timestamp: float, values: dict[str, float]) -> None:
+        index = self._next
+        self._timestamps[index] = timestamp
+        for key in values.keys() - self._series.keys():
+            self._series[key] = array.array("d", [math.nan]) * self._capacity
+        for key, series in self._series.items():
+            series[index] = values.get(key, math.nan)
+
+        self._next = (index + 1) % self._capacity
+        self._size = min(self._size + 1, self._capacity)
+
+    def window(self, since: float) -> tuple[list[float], dict[str, list[float]]]:
+        """Muestras con instante >= `since`, de la más antigua a la más reciente."""
+        start = (self._next - self._size) % self._capacity
+        indexes = [
+            index
+            for index in ((start + offset) % self._capacity for offset in range(self._size))
+            if self._timestamps[index] >= since
+        ]
+        timestamps = [self._timestamps[index] for index in indexes]
+        series = {key: [values[index] for index in indexes] for key, values in self._series.items()}
+        return timestamps, series
+
+
+class QueueDepthSampler:
+    """Muestrea en segundo plano las tareas pendientes de todos los artifacts.
+
+    Un único ciclo por proceso consulta el upstream cada `intervalSeconds`, sin
+    importar cuántos clientes lean el historial. Los artifacts que fallan o
+    llegan desde el último valor conocido (circuito abierto) no se registran.
+    """
+
+    def __init__(self, enabled: bool, intervalSeconds: float, capacity: int) -> None:
+        self.enabled = enabled
+        self.intervalSeconds = intervalSeconds
+        self.capacity = capacity
+        self._rings: dict[str, QueueDepthRing] = {}
+        self._runner: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        if not self.enabled:
+            return
+
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run(), name="queue-depth-sampler")
+
+    async def stop(self) -> None:
+        if self._runner is None:
+            return
+
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        self._runner = None
+
+    async def sample(self) -> None:
+        service = PipelineService(ENVIRONMENT_CONFIG, HYPNOSIS_API_CONNECTION)
+        self.record(time.time(), await service.getAllRemainingTasks())
+
+    def record(self, timestamp: float, response: AggregatedRemainingTasksResponse) -> None:
+        for artifact, remaining in response.artifacts.items():
+            if artifact in response.staleArtifacts:
+                continue
+
+            values = {f"queue:{key}": float(queue.messages) for key, queue in remaining.queues.items()}
+            values[_TOTAL_SERIES] = float(remaining.total)
+            ring = self._rings.get(artifact)
+            if ring is None:
+                ring = self._rings[artifact] = QueueDepthRing(self.capacity)
+            ring.append(timestamp, values)
+
+    def getHistory(self, artifact: str, windowSeconds: int) -> QueueDepthHistoryResponse:
+        artifact = artifact.lower()
+        if artifact not in PIPELINE_ARTIFACTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid artifact. Must be one of: {', '.join(PIPELINE_ARTIFACTS)}",
+            )
+        if not self.enabled:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Queue-depth sampling is disabled",
+            )
+
+        timestamps: list[float] = []
+        series: dict[str, list[float]] = {}
+        ring = self._rings.get(artifact)
+        if ring is not None:
+            timestamps, series = ring.window(time.time() - windowSeconds)
+
+        totals = series.pop(_TOTAL_SERIES, [])
+        queues = {key.removeprefix("queue:"): _trend(timestamps, values) for key, values in series.items()}
+        return QueueDepthHistoryResponse(
+            **_trend(timestamps, totals).model_dump(),
+            artifact=artifact,
+            windowSeconds=windowSeconds,
+            intervalSeconds=self.intervalSeconds,
+            samples=[
+                QueueDepthSample(timestamp=timestamp, total=int(total))
+                for timestamp, total in zip(timestamps, totals)
+            ],
+            queues={key: trend for key, trend in queues.items() if trend.current is not None},
+        )
+
+    async def _run(self) -> None:
+        while True:
+            startedAt = time.monotonic()
+            try:
+                await self.sample()
+            except Exception:
+                LOGGER.exception("No se pudieron muestrear las tareas pendientes")
+            await asyncio.sleep(max(self.intervalSeconds - (time.monotonic() - startedAt), 0.0))
+
+
+def _trend(timestamps: typing.Sequence[float], values: typing.Sequence[float]) -> QueueDepthTrend:
+    """Valor actual, pendiente por mínimos cuadrados y tiempo estimado de drenado."""
+    points = [(timestamp, value) for timestamp, value in zip(timestamps, values) if not math.isnan(value)]
+    if not points:
+        return QueueDepthTrend()
+
+    current = points[-1][1]
+    trend = QueueDepthTrend(current=int(current))
+    if len(points) < 2:
+        return trend
+
+    meanTime = sum(point[0] for point in points) / len(points)
+    meanValue = sum(point[1] for point in points) / len(points)
+    variance = sum((point[0] - meanTime) ** 2 for point in points)
+    if variance == 0:
+        return trend
+
+    slopePerSecond = sum((point[0] - meanTime) * (point[1] - meanValue) for point in points) / variance
+    trend.ratePerMinute = round(slopePerSecond * 60, 3)
+    if slopePerSecond < 0:
+        trend.drainSeconds = round(current / -slopePerSecond, 1)
+    return trend
+
+
+config = ENVIRONMENT_CONFIG.HYPNOSIS_CONFIG
+
+QUEUE_DEPTH_SAMPLER = QueueDepthSampler(
+    enabled=config.HYPNOSIS_QUEUE_SAMPLER_ENABLED,
+    intervalSeconds=config.HYPNOSIS_QUEUE_SAMPLER_INTERVAL_SECONDS,
+    capacity=config.HYPNOSIS_QUEUE_SAMPLER_CAPACITY,
+)
+
+
+__all__ = ["QUEUE_DEPTH_SAMPLER", "QueueDepthRing", "QueueDepthSampler"]
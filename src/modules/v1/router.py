@@ -2,6 +2,7 @@ import fastapi
 from src.modules.auth.security import oauth2Scheme
 from .users import ROUTER as USERS_ROUTER
 from .hypnosis import ROUTER as HYPNOSIS_ROUTER
+from .admin import ROUTER as ADMIN_ROUTER
 
 
 ROUTER = fastapi.APIRouter(
@@ -16,4 +17,8 @@ ROUTER.include_router(
 
 ROUTER.include_router(
     HYPNOSIS_ROUTER
+)
+
+ROUTER.include_router(
+    ADMIN_ROUTER
 )
\ No newline at end of file
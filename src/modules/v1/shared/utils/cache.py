@@ -0,0 +1,313 @@
+import dataclasses
+import functools
+import logging
+import time
+import typing
+
+import sentry_sdk
+from fastapi_cache.backends.inmemory import InMemoryBackend, Value
+from fastapi_cache.decorator import cache as fastapiCache
+
+from .metrics import LatencyHistogram
+from .single_flight import SingleFlight
+
+LOGGER = logging.getLogger("uvicorn").getChild("v1.shared.utils.cache")
+
+_UNKNOWN_ENDPOINT = "unknown"
+# Separa el endpoint de la codificación en las claves de variantes comprimidas.
+_VARIANT_SEPARATOR = "#"
+
+
+@dataclasses.dataclass
+class VariantCacheStats:
+    """Contadores acumulados de las variantes comprimidas de un endpoint en una codificación."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    sets: int = 0
+    bytesWritten: int = 0
+
+
+@dataclasses.dataclass
+class EndpointCacheStats:
+    """Contadores acumulados del cache para un endpoint.
+
+    Los de la respuesta cruda van en los campos propios; los de sus variantes
+    comprimidas, en `variants` por codificación, para no mezclar sus lookups
+    con el hit ratio del endpoint.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    coalescedWaits: int = 0
+    evictions: int = 0
+    sets: int = 0
+    bytesWritten: int = 0
+    computeLatency: LatencyHistogram = dataclasses.field(default_factory=LatencyHistogram)
+    variants: dict[str, VariantCacheStats] = dataclasses.field(default_factory=dict)
+
+
+class CacheMetrics:
+    """Registro en memoria de métricas del cache agrupadas por endpoint."""
+
+    def __init__(self) -> None:
+        self._endpoints: dict[str, EndpointCacheStats] = {}
+
+    def forEndpoint(self, endpoint: str) -> EndpointCacheStats:
+        stats = self._endpoints.get(endpoint)
+        if stats is None:
+            stats = self._endpoints[endpoint] = EndpointCacheStats()
+        return stats
+
+    def forKey(self, key: str) -> EndpointCacheStats | VariantCacheStats:
+        """Contadores de una clave: los del endpoint o los de su variante comprimida."""
+        endpoint, encoding = parseKey(key)
+        stats = self.forEndpoint(endpoint)
+        if encoding is None:
+            return stats
+
+        variant = stats.variants.get(encoding)
+        if variant is None:
+            variant = stats.variants[encoding] = VariantCacheStats()
+        return variant
+
+    def snapshot(
+        self,
+        storage: typing.Mapping[str, dict[str, int]] | None = None,
+    ) -> list[dict[str, typing.Any]]:
+        """Combina los contadores con el estado actual del almacenamiento.
+
+        Args:
+            storage: Ocupación por endpoint (`keys`, `bytesStored`, `expiredKeys`),
+                variantes comprimidas incluidas, tal como la reporta
+                `InstrumentedInMemoryBackend.storageSnapshot`.
+
+        Returns:
+            Lista de métricas por endpoint ordenada por nombre.
+        """
+        storage = storage or {}
+        items: list[dict[str, typing.Any]] = []
+
+        for endpoint in sorted(set(self._endpoints) | set(storage)):
+            stats = self.forEndpoint(endpoint)
+            usage = storage.get(endpoint, {})
+            lookups = stats.hits + stats.misses
+            latency = stats.computeLatency.snapshot()
+            avgComputeMs = latency["avgMs"] or 0.0
+
+            items.append(
+                {
+                    "endpoint": endpoint,
+                    "hits": stats.hits,
+                    "misses": stats.misses,
+                    "hitRatio": round(stats.hits / lookups, 4) if lookups else None,
+                    "coalescedWaits": stats.coalescedWaits,
+                    "evictions": stats.evictions,
+                    "sets": stats.sets,
+                    "bytesWritten": stats.bytesWritten,
+                    "keys": usage.get("keys", 0),
+                    "bytesStored": usage.get("bytesStored", 0),
+                    "expiredKeys": usage.get("expiredKeys", 0),
+                    "computeLatency": latency,
+                    # Cada hit o espera coalescida evita un cálculo completo.
+                    "estimatedSavedMs": round(
+                        (stats.hits + stats.coalescedWaits) * avgComputeMs, 3
+                    ),
+                    "variants": {
+                        encoding: _variantSnapshot(variant)
+                        for encoding, variant in sorted(stats.variants.items())
+                    },
+                }
+            )
+
+        return items
+
+    def reset(self) -> None:
+        self._endpoints.clear()
+
+
+def _variantSnapshot(variant: VariantCacheStats) -> dict[str, typing.Any]:
+    lookups = variant.hits + variant.misses
+    return {
+        "hits": variant.hits,
+        "misses": variant.misses,
+        "hitRatio": round(variant.hits / lookups, 4) if lookups else None,
+        "evictions": variant.evictions,
+        "sets": variant.sets,
+        "bytesWritten": variant.bytesWritten,
+    }
+
+
+CACHE_METRICS = CacheMetrics()
+
+
+def parseKey(key: str) -> tuple[str, str | None]:
+    """Separa claves `<prefix>:<endpoint>[#<encoding>]:<hash>` en endpoint y codificación de la variante."""
+    parts = key.split(":", 2)
+    if len(parts) != 3 or not parts[1]:
+        return _UNKNOWN_ENDPOINT, None
+
+    endpoint, _, encoding = parts[1].partition(_VARIANT_SEPARATOR)
+    return endpoint or _UNKNOWN_ENDPOINT, encoding or None
+
+
+def endpointFromKey(key: str) -> str:
+    """Extrae el endpoint de claves con formato `<prefix>:<endpoint>[#<encoding>]:<hash>`."""
+    return parseKey(key)[0]
+
+
+class InstrumentedInMemoryBackend(InMemoryBackend):
+    """Backend en memoria de fastapi-cache que registra hits, misses y desalojos.
+
+    Cada lectura y escritura se reporta también como span `cache.get` /
+    `cache.put` para que aparezca en el módulo de Caches de Sentry.
+    """
+
+    def __init__(self, metrics: CacheMetrics = CACHE_METRICS) -> None:
+        self._metrics = metrics
+
+    def _get(self, key: str) -> Value | None:
+        value = self._store.get(key)
+        if value is None:
+            return None
+        if value.ttl_ts < self._now:
+            del self._store[key]
+            self._metrics.forKey(key).evictions += 1
+            return None
+        return value
+
+    async def get_with_ttl(self, key: str) -> tuple[int, bytes | None]:
+        with sentry_sdk.start_span(op="cache.get", name=key) as span:
+            ttl, data = await super().get_with_ttl(key)
+            hit = data is not None
+
+            stats = self._metrics.forKey(key)
+            if hit:
+                stats.hits += 1
+            else:
+                stats.misses += 1
+
+            span.set_data("cache.key", [key])
+            span.set_data("cache.hit", hit)
+            if hit:
+                span.set_data("cache.item_size", len(data))
+                span.set_data("cache.ttl", ttl)
+
+        return ttl, data
+
+    async def set(self, key: str, value: bytes, expire: int | None = None) -> None:
+        with sentry_sdk.start_span(op="cache.put", name=key) as span:
+            await super().set(key, value, expire)
+
+            stats = self._metrics.forKey(key)
+            stats.sets += 1
+            stats.bytesWritten += len(value)
+
+            span.set_data("cache.key", [key])
+            span.set_data("cache.item_size", len(value))
+            if expire is not None:
+                span.set_data("cache.ttl", expire)
+
+    async def clear(self, namespace: str | None = None, key: str | None = None) -> int:
+        if namespace:
+            removedKeys = [storedKey for storedKey in self._store if storedKey.startswith(namespace)]
+        elif key and key in self._store:
+            removedKeys = [key]
+        else:
+            removedKeys = []
+
+        for removedKey in removedKeys:
+            self._metrics.forKey(removedKey).evictions += 1
+
+        if not removedKeys:
+            return 0
+        return await super().clear(namespace=namespace, key=key)
+
+    def storageSnapshot(self) -> dict[str, dict[str, int]]:
+        """Calcula claves, bytes y entradas vencidas (aún no desalojadas) por endpoint, variantes incluidas."""
+        now = self._now
+        usage: dict[str, dict[str, int]] = {}
+
+        for storedKey, value in list(self._store.items()):
+            endpointUsage = usage.setdefault(
+                endpointFromKey(storedKey),
+                {"keys": 0, "bytesStored": 0, "expiredKeys": 0},
+            )
+            endpointUsage["keys"] += 1
+            endpointUsage["bytesStored"] += len(value.data)
+            if value.ttl_ts < now:
+                endpointUsage["expiredKeys"] += 1
+
+        return usage
+
+
+_COMPUTE_FLIGHTS = SingleFlight()
+
+
+def cache(
+    expire: int,
+    namespace: str | None = None,
+) -> typing.Callable[[typing.Callable[..., typing.Awaitable[typing.Any]]], typing.Callable[..., typing.Awaitable[typing.Any]]]:
+    """Variante instrumentada de `fastapi_cache.decorator.cache`.
+
+    Usa el nombre del endpoint como namespace de las claves para poder agrupar
+    métricas, mide la latencia del cálculo envuelto y coalesce los misses
+    concurrentes con los mismos argumentos en una sola ejecución.
+
+    Args:
+        expire: Tiempo de vida de la entrada en segundos.
+        namespace: Nombre con el que se agrupan las métricas. Por defecto
+            `<módulo>.<función>` del endpoint decorado.
+    """
+
+    def decorator(
+        func: typing.Callable[..., typing.Awaitable[typing.Any]],
+    ) -> typing.Callable[..., typing.Awaitable[typing.Any]]:
+        endpoint = namespace or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        async def instrumented(*args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+            flightKey = (endpoint, repr(args), repr(sorted(kwargs.items())))
+            result, coalesced = await _COMPUTE_FLIGHTS.do(
+                flightKey,
+                lambda: _computeInstrumented(endpoint, func, args, kwargs),
+            )
+            if coalesced:
+                CACHE_METRICS.forEndpoint(endpoint).coalescedWaits += 1
+            return result
+
+        return fastapiCache(expire=expire, namespace=endpoint)(instrumented)
+
+    return decorator
+
+
+async def _computeInstrumented(
+    endpoint: str,
+    func: typing.Callable[..., typing.Awaitable[typing.Any]],
+    args: tuple[typing.Any, ...],
+    kwargs: dict[str, typing.Any],
+) -> typing.Any:
+    stats = CACHE_METRICS.forEndpoint(endpoint)
+
+    with sentry_sdk.start_span(op="cache.compute", name=endpoint) as span:
+        startedAt = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - startedAt
+            stats.computeLatency.observe(elapsed)
+            span.set_data("cache.endpoint", endpoint)
+            span.set_data("cache.compute_ms", round(elapsed * 1_000.0, 3))
+
+
+__all__ = [
+    "CACHE_METRICS",
+    "CacheMetrics",
+    "EndpointCacheStats",
+    "InstrumentedInMemoryBackend",
+    "VariantCacheStats",
+    "cache",
+    "endpointFromKey",
+    "parseKey",
+]
@@ -0,0 +1,252 @@
+import gzip
+import logging
+
+import anyio.to_thread
+from fastapi_cache import FastAPICache
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:  # brotli es opcional: sin el paquete solo se negocia gzip.
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+LOGGER = logging.getLogger("uvicorn").getChild("v1.shared.utils.compression")
+
+GZIP_ENCODING = "gzip"
+BROTLI_ENCODING = "br"
+
+# Cuerpos mayores a este tamaño se comprimen en un hilo para no bloquear el event loop.
+_THREAD_OFFLOAD_THRESHOLD_BYTES = 256 * 1024
+
+_COMPRESSIBLE_CONTENT_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "text/",
+)
+
+
+def supportedEncodings() -> tuple[str, ...]:
+    """Codificaciones disponibles en este proceso, en orden de preferencia."""
+    if brotli is not None:
+        return (BROTLI_ENCODING, GZIP_ENCODING)
+    return (GZIP_ENCODING,)
+
+
+def negotiateEncoding(acceptEncoding: str) -> str | None:
+    """Elige la codificación a usar según el header `Accept-Encoding`.
+
+    Respeta los valores `q` (incluido `q=0` para rechazar) y, ante empate,
+    prefiere brotli sobre gzip.
+
+    Args:
+        acceptEncoding: Valor crudo del header enviado por el cliente.
+
+    Returns:
+        La codificación elegida o None si el cliente no acepta ninguna soportada.
+    """
+    if not acceptEncoding:
+        return None
+
+    weights: dict[str, float] = {}
+    for item in acceptEncoding.split(","):
+        token, _, params = item.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[token] = quality
+
+    bestEncoding: str | None = None
+    bestQuality = 0.0
+    for encoding in supportedEncodings():
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > bestQuality:
+            bestEncoding, bestQuality = encoding, quality
+
+    return bestEncoding
+
+
+def compressBody(body: bytes, encoding: str, gzipLevel: int, brotliQuality: int) -> bytes:
+    """Comprime el cuerpo con la codificación indicada."""
+    if encoding == BROTLI_ENCODING and brotli is not None:
+        return brotli.compress(body, quality=brotliQuality)
+    return gzip.compress(body, compresslevel=gzipLevel, mtime=0)
+
+
+class CompressionMiddleware:
+    """Middleware ASGI que comprime respuestas según `Accept-Encoding`.
+
+    Las respuestas de endpoints cacheados (las que traen el header de estado de
+    fastapi-cache y un `ETag`) guardan la versión comprimida en el mismo backend
+    del cache, con el mismo TTL que la entrada cruda. Así los hits se sirven sin
+    volver a comprimir. Las respuestas en streaming y las ya codificadas pasan sin
+    cambios.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimumSize: int = 1024,
+        gzipLevel: int = 6,
+        brotliQuality: int = 5,
+    ) -> None:
+        self.app = app
+        self.minimumSize = minimumSize
+        self.gzipLevel = gzipLevel
+        self.brotliQuality = brotliQuality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiateEncoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, scope, send, encoding)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(
+        self,
+        middleware: CompressionMiddleware,
+        scope: Scope,
+        send: Send,
+        encoding: str,
+    ) -> None:
+        self._middleware = middleware
+        self._scope = scope
+        self._send = send
+        self._encoding = encoding
+        self._startMessage: Message | None = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if self._passthrough:
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            self._startMessage = message
+            return
+
+        if message["type"] != "http.response.body" or self._startMessage is None:
+            await self._send(message)
+            return
+
+        startMessage = self._startMessage
+        body: bytes = message.get("body", b"")
+
+        # Solo se comprimen cuerpos completos; el streaming pasa intacto.
+        if message.get("more_body", False) or not self._shouldCompress(startMessage, body):
+            self._passthrough = True
+            await self._send(startMessage)
+            await self._send(message)
+            return
+
+        compressed = await self._compressWithCache(startMessage, body)
+
+        headers = MutableHeaders(raw=startMessage["headers"])
+        headers["Content-Encoding"] = self._encoding
+        headers["Content-Length"] = str(len(compressed))
+        headers.add_vary_header("Accept-Encoding")
+
+        await self._send(startMessage)
+        await self._send({"type": "http.response.body", "body": compressed})
+
+    def _shouldCompress(self, startMessage: Message, body: bytes) -> bool:
+        if startMessage.get("status", 200) in (204, 304):
+            return False
+        if len(body) < self._middleware.minimumSize:
+            return False
+
+        headers = Headers(raw=startMessage["headers"])
+        if "content-encoding" in headers:
+            return False
+
+        contentType = headers.get("content-type", "")
+        return contentType.startswith(_COMPRESSIBLE_CONTENT_TYPES)
+
+    async def _compressWithCache(self, startMessage: Message, body: bytes) -> bytes:
+        cacheKey, expire = self._cacheKey(startMessage)
+
+        if cacheKey is not None:
+            try:
+                _, cached = await FastAPICache.get_backend().get_with_ttl(cacheKey)
+            except Exception:
+                LOGGER.warning("No se pudo leer la respuesta comprimida del cache", exc_info=True)
+                cached = None
+            if cached is not None:
+                return cached
+
+        compressed = await self._compress(body)
+
+        if cacheKey is not None:
+            try:
+                await FastAPICache.get_backend().set(cacheKey, compressed, expire)
+            except Exception:
+                LOGGER.warning("No se pudo guardar la respuesta comprimida en el cache", exc_info=True)
+
+        return compressed
+
+    async def _compress(self, body: bytes) -> bytes:
+        args = (body, self._encoding, self._middleware.gzipLevel, self._middleware.brotliQuality)
+        if len(body) >= _THREAD_OFFLOAD_THRESHOLD_BYTES:
+            return await anyio.to_thread.run_sync(compressBody, *args)
+        return compressBody(*args)
+
+    def _cacheKey(self, startMessage: Message) -> tuple[str | None, int | None]:
+        """Deriva la clave de la variante comprimida a partir del ETag del cache."""
+        if not FastAPICache.get_enable() or FastAPICache._backend is None:
+            return None, None
+
+        headers = Headers(raw=startMessage["headers"])
+        cacheStatusHeader = FastAPICache.get_cache_status_header()
+        etag = headers.get("etag")
+        if not etag or cacheStatusHeader.lower() not in headers:
+            return None, None
+
+        expire = _parseMaxAge(headers.get("cache-control", ""))
+        if not expire:
+            return None, None
+
+        endpoint = self._scope.get("endpoint")
+        endpointName = (
+            f"{endpoint.__module__.rsplit('.', 1)[-1]}.{endpoint.__name__}"
+            if endpoint is not None
+            else "unknown"
+        )
+        # `<prefix>:<endpoint>#<encoding>:<etag>`: las métricas la cuentan bajo el endpoint, en `variants[encoding]`.
+        return f"{FastAPICache.get_prefix()}:{endpointName}#{self._encoding}:{etag}", expire
+
+
+def _parseMaxAge(cacheControl: str) -> int | None:
+    for directive in cacheControl.split(","):
+        name, _, value = directive.strip().partition("=")
+        if name.lower() == "max-age":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+__all__ = [
+    "BROTLI_ENCODING",
+    "CompressionMiddleware",
+    "GZIP_ENCODING",
+    "compressBody",
+    "negotiateEncoding",
+    "supportedEncodings",
+]
@@ -0,0 +1,130 @@
+import re
+import typing
+
+_STRUCTURAL = re.compile(rb'[\[\]{}"]')
+_STRING_SPECIAL = re.compile(rb'["\\]')
+
+
+class JsonArrayItemSplitter:
+    """Separa de forma incremental los elementos de un arreglo JSON que llega por partes.
+
+    Recibe los bytes en el orden en que llegan (`feed`) y devuelve los bytes
+    crudos de cada elemento completo, sin parsear el documento entero. Sirve
+    para reenviar como NDJSON una respuesta del estilo `{"items": [...]}` con
+    memoria constante: solo se retiene el elemento en curso.
+
+    Solo se emiten elementos objeto o arreglo; los escalares se ignoran.
+    """
+
+    def __init__(self, key: str | None = "items") -> None:
+        """
+        Args:
+            key: Clave del objeto raíz que contiene el arreglo. None si la raíz
+                es directamente el arreglo.
+        """
+        self._key = key.encode() if key is not None else None
+        self._depth = 0
+        self._inString = False
+        self._escaped = False
+        self._arrayDepth: int | None = None
+        self._lastKey = b""
+        self._keyBuffer: bytearray | None = None
+        self._element: bytearray | None = None
+        self.done = False
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        items: list[bytes] = []
+        position = 0
+        length = len(chunk)
+        keyStart = 0
+        elementStart = 0
+
+        while position < length and not self.done:
+            if self._escaped:
+                self._escaped = False
+                position += 1
+                continue
+
+            if self._inString:
+                match = _STRING_SPECIAL.search(chunk, position)
+                if match is None:
+                    position = length
+                    break
+                index = match.start()
+                if chunk[index] == 0x5C:  # "\": el siguiente byte está escapado.
+                    if index + 1 >= length:
+                        self._escaped = True
+                        position = length
+                    else:
+                        position = index + 2
+                    continue
+
+                self._inString = False
+                if self._keyBuffer is not None:
+                    self._keyBuffer += chunk[keyStart:index]
+                    self._lastKey = bytes(self._keyBuffer)
+                    self._keyBuffer = None
+                position = index + 1
+                continue
+
+            match = _STRUCTURAL.search(chunk, position)
+            if match is None:
+                position = length
+                break
+
+            index = match.start()
+            character = chunk[index]
+            position = index + 1
+
+            if character == 0x22:  # '"'
+                self._inString = True
+                if self._arrayDepth is None and self._depth == 1:
+                    self._keyBuffer = bytearray()
+                    keyStart = index + 1
+                continue
+
+            if character in (0x7B, 0x5B):  # '{' o '['
+                if self._element is None and self._arrayDepth is not None and self._depth == self._arrayDepth:
+                    self._element = bytearray()
+                    elementStart = index
+                self._depth += 1
+                if character == 0x5B and self._arrayDepth is None and self._isTargetArray():
+                    self._arrayDepth = self._depth
+                continue
+
+            # '}' o ']'
+            self._depth -= 1
+            if self._element is not None and self._depth == self._arrayDepth:
+                self._element += chunk[elementStart : index + 1]
+                items.append(bytes(self._element))
+                self._element = None
+            elif self._arrayDepth is not None and self._depth == self._arrayDepth - 1:
+                self.done = True
+
+        if self._keyBuffer is not None:
+            self._keyBuffer += chunk[keyStart:length]
+        if self._element is not None:
+            self._element += chunk[elementStart:length]
+
+        return items
+
+    def _isTargetArray(self) -> bool:
+        if self._key is None:
+            return self._depth == 1
+        return self._depth == 2 and self._lastKey == self._key
+
+
+async def iterJsonArrayItems(
+    chunks: typing.AsyncIterable[bytes],
+    key: str | None = "items",
+) -> typing.AsyncIterator[bytes]:
+    """Itera los elementos crudos del arreglo `key` de un JSON recibido en partes."""
+    splitter = JsonArrayItemSplitter(key)
+    async for chunk in chunks:
+        for item in splitter.feed(chunk):
+            yield item
+        if splitter.done:
+            return
+
+
+__all__ = ["JsonArrayItemSplitter", "iterJsonArrayItems"]
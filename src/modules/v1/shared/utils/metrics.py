@@ -0,0 +1,152 @@
+import bisect
+import contextlib
+import time
+import typing
+
+import sentry_sdk
+
+
+DEFAULT_LATENCY_BOUNDS_MS: tuple[float, ...] = (
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    25.0,
+    50.0,
+    100.0,
+    250.0,
+    500.0,
+    1_000.0,
+    2_500.0,
+    5_000.0,
+    10_000.0,
+)
+
+
+class LatencyHistogram:
+    """Histograma de latencias en memoria con buckets fijos (en milisegundos).
+
+    Registrar una observación es O(log buckets) y no reserva memoria, por lo que
+    puede usarse en rutas calientes. Los percentiles se estiman con el límite
+    superior del bucket que contiene el cuantil solicitado.
+    """
+
+    __slots__ = ("_bounds", "_counts", "count", "sumMs", "maxMs")
+
+    def __init__(self, boundsMs: typing.Sequence[float] = DEFAULT_LATENCY_BOUNDS_MS):
+        self._bounds = tuple(boundsMs)
+        self._counts = [0] * (len(self._bounds) + 1)
+        self.count = 0
+        self.sumMs = 0.0
+        self.maxMs = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """Registra una duración expresada en segundos."""
+        elapsedMs = seconds * 1_000.0
+        self._counts[bisect.bisect_left(self._bounds, elapsedMs)] += 1
+        self.count += 1
+        self.sumMs += elapsedMs
+        if elapsedMs > self.maxMs:
+            self.maxMs = elapsedMs
+
+    def percentile(self, quantile: float) -> float | None:
+        """Estima el percentil indicado (0.0 - 1.0) en milisegundos."""
+        if self.count == 0:
+            return None
+
+        target = quantile * self.count
+        accumulated = 0
+        for index, bucketCount in enumerate(self._counts):
+            accumulated += bucketCount
+            if accumulated >= target and bucketCount:
+                if index < len(self._bounds):
+                    return min(self._bounds[index], self.maxMs)
+                return self.maxMs
+        return self.maxMs
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        """Devuelve un resumen serializable del histograma."""
+        buckets: dict[str, int] = {}
+        for index, bucketCount in enumerate(self._counts):
+            if not bucketCount:
+                continue
+            label = f"le_{self._bounds[index]:g}" if index < len(self._bounds) else "le_inf"
+            buckets[label] = bucketCount
+
+        return {
+            "count": self.count,
+            "sumMs": round(self.sumMs, 3),
+            "avgMs": round(self.sumMs / self.count, 3) if self.count else None,
+            "maxMs": round(self.maxMs, 3),
+            "p50Ms": _roundOrNone(self.percentile(0.50)),
+            "p95Ms": _roundOrNone(self.percentile(0.95)),
+            "p99Ms": _roundOrNone(self.percentile(0.99)),
+            "buckets": buckets,
+        }
+
+
+class StageTimings:
+    """Tiempos por etapa de una ruta caliente, agregados en histogramas por proceso.
+
+    `stage(nombre)` devuelve un context manager que mide la etapa y, si la
+    transacción actual de Sentry está muestreada, la registra como span hijo.
+    Deshabilitado, `stage` devuelve siempre el mismo `nullcontext`, así que el
+    costo se reduce a una llamada y un `with` vacío.
+    """
+
+    def __init__(self, enabled: bool, spanOp: str) -> None:
+        self.enabled = enabled
+        self._spanOp = spanOp
+        self._histograms: dict[str, LatencyHistogram] = {}
+
+    def stage(self, name: str) -> typing.ContextManager[None]:
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return _StageTimer(self, name)
+
+    def observe(self, name: str, seconds: float) -> None:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    def snapshot(self) -> dict[str, dict[str, typing.Any]]:
+        return {name: histogram.snapshot() for name, histogram in self._histograms.items()}
+
+    def reset(self) -> None:
+        self._histograms.clear()
+
+
+class _StageTimer:
+    __slots__ = ("_owner", "_name", "_start", "_span")
+
+    def __init__(self, owner: StageTimings, name: str) -> None:
+        self._owner = owner
+        self._name = name
+        self._start = 0.0
+        self._span = None
+
+    def __enter__(self) -> None:
+        parent = sentry_sdk.get_current_span()
+        if parent is not None and parent.sampled:
+            self._span = parent.start_child(op=self._owner._spanOp, name=self._name)
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc: typing.Any) -> None:
+        self._owner.observe(self._name, time.perf_counter() - self._start)
+        if self._span is not None:
+            self._span.finish()
+
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+def _roundOrNone(value: float | None) -> float | None:
+    return round(value, 3) if value is not None else None
+
+
+__all__ = ["DEFAULT_LATENCY_BOUNDS_MS", "LatencyHistogram", "StageTimings"]
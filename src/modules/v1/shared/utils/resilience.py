@@ -0,0 +1,212 @@
+import asyncio
+import collections
+import logging
+import time
+import typing
+
+LOGGER = logging.getLogger("uvicorn").getChild("v1.shared.utils.resilience")
+
+T = typing.TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """La llamada se rechazó sin intentarla porque el circuito está abierto."""
+
+    def __init__(self, name: str, retryAfterSeconds: float) -> None:
+        super().__init__(f"Circuito '{name}' abierto; reintentar en {retryAfterSeconds:.1f}s")
+        self.name = name
+        self.retryAfterSeconds = retryAfterSeconds
+
+
+class CircuitBreaker:
+    """Circuit breaker por tasa de fallos y de llamadas lentas sobre una ventana deslizante.
+
+    - Cerrado: las llamadas pasan y su resultado se registra en una ventana de
+      las últimas `windowSize` llamadas. Con al menos `minimumCalls`, si la tasa
+      de fallos o la de llamadas lentas supera su umbral, el circuito se abre.
+    - Abierto: las llamadas fallan al instante con `CircuitOpenError` durante
+      `openSeconds`.
+    - Semiabierto: se permiten hasta `halfOpenProbes` llamadas de prueba; si
+      todas salen bien se cierra, y al primer fallo vuelve a abrirse.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failureRateThreshold: float = 0.5,
+        slowCallSeconds: float = 2.0,
+        slowCallRateThreshold: float = 0.8,
+        windowSize: int = 20,
+        minimumCalls: int = 10,
+        openSeconds: float = 15.0,
+        halfOpenProbes: int = 2,
+    ) -> None:
+        self.name = name
+        self._failureRateThreshold = failureRateThreshold
+        self._slowCallSeconds = slowCallSeconds
+        self._slowCallRateThreshold = slowCallRateThreshold
+        self._minimumCalls = minimumCalls
+        self._openSeconds = openSeconds
+        self._halfOpenProbes = halfOpenProbes
+        self._outcomes: collections.deque[tuple[bool, bool]] = collections.deque(maxlen=windowSize)
+        self._state = CLOSED
+        self._openedAt = 0.0
+        self._probesStarted = 0
+        self._probesSucceeded = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._remainingOpenSeconds() <= 0:
+            return HALF_OPEN
+        return self._state
+
+    async def call(self, factory: typing.Callable[[], typing.Awaitable[T]]) -> T:
+        """Ejecuta `factory` si el circuito lo permite y registra su resultado.
+
+        Raises:
+            CircuitOpenError: Si el circuito está abierto o sin cupo de pruebas.
+        """
+        self._acquire()
+        startedAt = time.perf_counter()
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            # Una llamada cancelada por timeout cuenta como lenta; una cancelación temprana no cuenta.
+            elapsed = time.perf_counter() - startedAt
+            if elapsed >= self._slowCallSeconds:
+                self._record(failed=False, elapsed=elapsed)
+            else:
+                self._release()
+            raise
+        except Exception:
+            self._record(failed=True, elapsed=time.perf_counter() - startedAt)
+            raise
+
+        self._record(failed=False, elapsed=time.perf_counter() - startedAt)
+        return result
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        calls = len(self._outcomes)
+        return {
+            "name": self.name,
+            "state": self.state,
+            "calls": calls,
+            "failureRate": self._rate(0),
+            "slowCallRate": self._rate(1),
+            "retryAfterSeconds": max(self._remainingOpenSeconds(), 0.0) if self._state == OPEN else 0.0,
+        }
+
+    def _acquire(self) -> None:
+        if self._state == OPEN:
+            remaining = self._remainingOpenSeconds()
+            if remaining > 0:
+                raise CircuitOpenError(self.name, remaining)
+            self._state = HALF_OPEN
+            self._probesStarted = 0
+            self._probesSucceeded = 0
+
+        if self._state == HALF_OPEN:
+            if self._probesStarted >= self._halfOpenProbes:
+                raise CircuitOpenError(self.name, self._openSeconds)
+            self._probesStarted += 1
+
+    def _release(self) -> None:
+        if self._state == HALF_OPEN and self._probesStarted > 0:
+            self._probesStarted -= 1
+
+    def _record(self, failed: bool, elapsed: float) -> None:
+        slow = elapsed >= self._slowCallSeconds
+
+        if self._state == HALF_OPEN:
+            if failed or slow:
+                self._trip()
+                return
+            self._probesSucceeded += 1
+            if self._probesSucceeded >= self._halfOpenProbes:
+                LOGGER.info("Circuito '%s' cerrado tras las llamadas de prueba", self.name)
+                self._state = CLOSED
+                self._outcomes.clear()
+            return
+
+        if self._state == OPEN:
+            return
+
+        self._outcomes.append((failed, slow))
+        if len(self._outcomes) < self._minimumCalls:
+            return
+
+        if self._rate(0) >= self._failureRateThreshold or self._rate(1) >= self._slowCallRateThreshold:
+            self._trip()
+
+    def _trip(self) -> None:
+        LOGGER.warning(
+            "Circuito '%s' abierto por %ss (fallos=%.2f, lentas=%.2f)",
+            self.name,
+            self._openSeconds,
+            self._rate(0),
+            self._rate(1),
+        )
+        self._state = OPEN
+        self._openedAt = time.monotonic()
+        self._outcomes.clear()
+
+    def _remainingOpenSeconds(self) -> float:
+        return self._openSeconds - (time.monotonic() - self._openedAt)
+
+    def _rate(self, index: int) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(1 for outcome in self._outcomes if outcome[index]) / len(self._outcomes)
+
+
+async def hedgedCall(
+    factory: typing.Callable[[], typing.Awaitable[T]],
+    delaySeconds: float,
+) -> tuple[T, bool]:
+    """Lanza una segunda copia de la llamada si la primera no terminó en `delaySeconds`.
+
+    Devuelve el primer resultado exitoso y cancela la otra copia. Solo debe
+    usarse con operaciones idempotentes.
+
+    Returns:
+        Tupla con el resultado y un booleano que indica si se lanzó la copia.
+    """
+    tasks = [asyncio.ensure_future(factory())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delaySeconds)
+        if done:
+            return tasks[0].result(), False
+
+        tasks.append(asyncio.ensure_future(factory()))
+        pending = set(tasks)
+        lastError: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                error = task.exception()
+                if error is None:
+                    return task.result(), True
+                lastError = error
+        assert lastError is not None
+        raise lastError
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                # Marca como recuperada la excepción de la copia perdedora.
+                task.exception()
+
+
+__all__ = [
+    "CLOSED",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "HALF_OPEN",
+    "OPEN",
+    "hedgedCall",
+]
@@ -0,0 +1,55 @@
+import asyncio
+import typing
+
+
+T = typing.TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce llamadas concurrentes con la misma clave en una sola ejecución.
+
+    La primera corrutina que llega con una clave lanza la tarea; las que llegan
+    mientras sigue en curso esperan el mismo resultado (o excepción). La tarea
+    está protegida con `asyncio.shield`, por lo que la cancelación de un
+    llamador (por ejemplo, un cliente que cierra la conexión) no afecta al resto.
+    """
+
+    def __init__(self) -> None:
+        self._inFlight: dict[typing.Hashable, asyncio.Task[typing.Any]] = {}
+
+    def isInFlight(self, key: typing.Hashable) -> bool:
+        return key in self._inFlight
+
+    async def do(
+        self,
+        key: typing.Hashable,
+        factory: typing.Callable[[], typing.Awaitable[T]],
+    ) -> tuple[T, bool]:
+        """Ejecuta `factory` una sola vez por clave concurrente.
+
+        Args:
+            key: Identificador de la operación a coalescer.
+            factory: Función que crea la corrutina a ejecutar.
+
+        Returns:
+            Tupla con el resultado y un booleano que indica si el llamador
+            esperó a otra ejecución en curso (True) o la inició él mismo.
+        """
+        task = self._inFlight.get(key)
+        if task is not None:
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(factory())
+        self._inFlight[key] = task
+        task.add_done_callback(lambda finished: self._release(key, finished))
+        return await asyncio.shield(task), False
+
+    def _release(self, key: typing.Hashable, task: asyncio.Task[typing.Any]) -> None:
+        if self._inFlight.get(key) is task:
+            del self._inFlight[key]
+        if not task.cancelled():
+            # Marca la excepción como recuperada aunque todos los llamadores se hayan ido.
+            task.exception()
+
+
+__all__ = ["SingleFlight"]
@@ -3,7 +3,7 @@ import fastapi
 import logging
 from ..schemas import suscribers_schema
 from ..services import suscribers_service
-from fastapi_cache.decorator import cache
+from src.modules.v1.shared.utils.cache import cache
 
 LOGGER = logging.getLogger("uvicorn").getChild("v1.users.controllers.suscribers")
 
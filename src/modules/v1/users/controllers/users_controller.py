@@ -2,7 +2,7 @@ import typing
 import fastapi
 from ..schemas import user_schema
 from ..services import users_service
-from fastapi_cache.decorator import cache
+from src.modules.v1.shared.utils.cache import cache
 
 
 ROUTER = fastapi.APIRouter()